@@ -1,6 +1,6 @@
 import tkinter as tk
 
-from model import TowerGame
+from remote import RemoteGame
 from tower import SimpleTower, MissileTower
 from enemy import SimpleEnemy
 from utilities import Stepper
@@ -25,27 +25,25 @@ class MyLevel(AbstractLevel):
             wave_n (int): The nth wave
 
         Return:
-            list[tuple[int, AbstractEnemy]]: A list of (step, enemy) pairs in the
-                                             wave, sorted by step in ascending order 
+            iter[tuple[int, callable]]: The (step, enemy factory) pairs in the wave,
+                                        sorted by step in ascending order
         """
-        enemies = []
-
         if wave == 1:
-            # A hardcoded singleton list of (step, enemy) pairs
+            # A hardcoded singleton list of (step, enemy factory) pairs
 
-            enemies = [(10, SimpleEnemy())]
+            enemies = [(10, SimpleEnemy)]
         elif wave == 2:
-            # A hardcoded list of multiple (step, enemy) pairs
+            # A hardcoded list of multiple (step, enemy factory) pairs
 
-            enemies = [(10, SimpleEnemy()), (15, SimpleEnemy()), (30, SimpleEnemy())]
+            enemies = [(10, SimpleEnemy), (15, SimpleEnemy), (30, SimpleEnemy)]
         elif 3 <= wave < 10:
-            # List of (step, enemy) pairs spread across an interval of time (steps)
+            # (step, enemy factory) pairs spread across an interval of time (steps),
+            # generated as the wave spawns
 
             steps = int(40 * (wave ** .5))  # The number of steps to spread the enemies across
             count = wave * 2  # The number of enemies to spread across the (time) steps
 
-            for step in self.generate_intervals(steps, count):
-                enemies.append((step, SimpleEnemy()))
+            enemies = ((step, SimpleEnemy) for step in self.generate_intervals(steps, count))
 
         elif wave == 10:
             # Generate sub waves
@@ -104,7 +102,12 @@ class TowerGameApp(Stepper):
         self._master = master
         super().__init__(master, delay=delay)
 
-        self._game = game = TowerGame()
+        # Level
+        self._level = MyLevel()
+
+        # simulate the game in a worker process, stepping once per delay, so that
+        # slow steps & path searches never stall the interface
+        self._game = game = RemoteGame(self._level, rate=1000 / delay)
 
         self.setup_menu()
 
@@ -124,13 +127,18 @@ class TowerGameApp(Stepper):
         game.on("enemy_death", self._handle_death)
         game.on("enemy_escape", self._handle_escape)
         game.on("cleared", self._handle_wave_clear)
+        game.on("placement", self._handle_placement)
+        game.on("placed", self._handle_placed)
+
+        # buffer game events received from the worker, & deliver them once per frame
+        game.defer()
+
+        # keep the deaths of each step as a separate batch, since the score bonus is per step
+        game.merge("enemy_death", lambda batches, new_batches: batches + new_batches)
 
         # Task 1.2 (Tower Placement): bind mouse events to canvas here
         # ...
 
-        # Level
-        self._level = MyLevel()
-
         self.select_tower(SimpleTower)
 
         view.draw_borders(game.grid.get_border_coordinates())
@@ -138,6 +146,9 @@ class TowerGameApp(Stepper):
         # Get ready for the game
         self._setup_game()
 
+        # deliver events & draw the game, even while it is paused
+        super().start()
+
         # Remove the relevant lines while attempting the corresponding section
         # Hint: Comment them out to keep for reference
 
@@ -152,7 +163,7 @@ class TowerGameApp(Stepper):
                 self._game.place(position, tower_type=tower)
 
         # Task 1.5 (Tower Placement): remove these lines
-        self._game.queue_wave([], clear=True)
+        self._game.queue_wave(clear=True)
         self._wave = 4 - 1  # first (next) wave will be wave 4
         self.next_wave()
 
@@ -164,6 +175,24 @@ class TowerGameApp(Stepper):
         # ...
         pass
 
+    def start(self):
+        """Starts (or resumes) the game"""
+        super().start()
+        self._game.start()
+
+    def pause(self):
+        """Pauses the game, which is still drawn & delivers events while paused"""
+        self._game.pause()
+
+    def stop(self):
+        """Stops the game"""
+        super().stop()
+        self._game.pause()
+
+    def close(self):
+        """Stops the game's worker process"""
+        self._game.close()
+
     def _toggle_paused(self, paused=None):
         """Toggles or sets the paused state
 
@@ -213,25 +242,29 @@ class TowerGameApp(Stepper):
 
     def refresh_view(self):
         """Refreshes the game view"""
-        if self._step_number % 2 == 0:
-            self._view.draw_enemies(self._game.enemies)
-        self._view.draw_towers(self._game.towers)
+        self._view.draw_enemies(self._game.enemies)
+        changed, removed = self._game.pop_tower_changes()
+        self._view.draw_towers(self._game.towers, changed=changed, removed=removed)
         self._view.draw_obstacles(self._game.obstacles)
 
     def _step(self):
         """
-        Perform a step every interval
+        Receive the game's progress every interval
 
-        Triggers a game step and updates the view
+        Reads the latest state of the game from its worker process
 
         Returns:
             (bool) True if the game is still running
         """
-        self._game.step()
-        self.refresh_view()
+        self._game.update()
 
         return not self._won
 
+    def _render(self):
+        """Delivers the game events received since the last frame, & updates the view"""
+        self._game.flush()
+        self.refresh_view()
+
     # Task 1.2 (Tower Placement): Complete event handlers here (including docstrings!)
     # Event handlers: _move, _mouse_leave, _left_click
     def _move(self, event):
@@ -248,11 +281,24 @@ class TowerGameApp(Stepper):
         position = event.x, event.y
         self._current_tower.position = position
 
-        legal, grid_path = self._game.attempt_placement(position)
+        # the preview is drawn once the worker replies (see _handle_placement)
+        self._game.attempt_placement(position)
+
+    def _handle_placement(self, position, legal, cells):
+        """
+        Handles learning whether a tower can be placed at a position
+
+        Parameters:
+            position (tuple<int, int>): The pixel position of the tower
+            legal (bool): True iff the tower can be placed
+            cells (list<tuple<int, int>>): The cells of the path enemies would take
+        """
+        # ignore replies for positions the mouse has since left
+        if position != self._current_tower.position:
+            return
 
-        # find the best path and covert positions to pixel positions
-        path = [self._game.grid.cell_to_pixel_centre(position)
-                for position in grid_path.get_shortest()]
+        # covert path positions to pixel positions
+        path = [self._game.grid.cell_to_pixel_centre(cell) for cell in cells]
 
         # Task 1.2 (Tower placement): Draw the tower preview here
         # ...
@@ -272,7 +318,18 @@ class TowerGameApp(Stepper):
         position = event.x, event.y
         cell_position = self._game.grid.pixel_to_cell(position)
 
-        if self._game.place(cell_position, tower_type=self._current_tower.__class__):
+        # the outcome arrives once the worker has tried (see _handle_placed)
+        self._game.place(cell_position, tower_type=self._current_tower.__class__)
+
+    def _handle_placed(self, cell, placed):
+        """
+        Handles the outcome of attempting to place a tower
+
+        Parameters:
+            cell (tuple<int, int>): The cell the tower was to be placed in
+            placed (bool): True iff the tower was placed
+        """
+        if placed:
             # Task 1.2 (Tower placement): Attempt to place the tower being previewed
             pass
 
@@ -289,12 +346,8 @@ class TowerGameApp(Stepper):
         # Task 1.5 (Play Controls): Disable the add wave button here (if this is the last wave)
         # ...
 
-        # Generate wave and enqueue
-        wave = self._level.get_wave(self._wave)
-        for step, enemy in wave:
-            enemy.set_cell_size(self._game.grid.cell_size)
-
-        self._game.queue_wave(wave)
+        # Generate wave and enqueue (waves are generated by the game's worker process)
+        self._game.queue_wave(self._wave)
 
     def select_tower(self, tower):
         """
@@ -305,17 +358,19 @@ class TowerGameApp(Stepper):
         """
         self._current_tower = tower(self._game.grid.cell_size)
 
-    def _handle_death(self, enemies):
+    def _handle_death(self, *batches):
         """
         Handles enemies dying
 
         Parameters:
-            enemies (list<AbstractEnemy>): The enemies which died in a step
+            *batches (list<AbstractEnemy>): The enemies which died in each step
+                                            since the last frame
         """
-        bonus = len(enemies) ** .5
-        for enemy in enemies:
-            self._coins += enemy.points
-            self._score += int(enemy.points * bonus)
+        for enemies in batches:
+            bonus = len(enemies) ** .5
+            for enemy in enemies:
+                self._coins += enemy.points
+                self._score += int(enemy.points * bonus)
 
         # Task 1.3 (Status Bar): Update coins & score displays here
         # ...
@@ -366,7 +421,10 @@ def main():
     """create the tower game GUI"""
     root=tk.Tk()
     tower_game = TowerGameApp(root)
-    root.mainloop()
+    try:
+        root.mainloop()
+    finally:
+        tower_game.close()
 
 if __name__ =="__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,199 @@
+"""Monte Carlo wave balancing
+
+Plays many headless games in parallel over a matrix of levels, tower layouts,
+difficulties & seeds, & reports survival rates, lives lost per wave & score
+distributions for each combination
+
+Levels are measured as they ship. A level's difficulty & seed (via its rng) only
+vary its waves if the level uses them; MyLevel uses neither, so its trials only
+differ by layout
+
+Usage:
+    python balance.py [--level NAME ...] [--layout NAME ...] [--difficulty NAME ...]
+                      [--seeds N] [--workers N] [--output FILE]
+"""
+
+import argparse
+import itertools
+import json
+import os
+import statistics
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from a3 import MyLevel
+from level import AbstractLevel
+from simulation import simulate
+from tower import SimpleTower, MissileTower, PulseTower
+
+__license__ = "MIT"
+__version__ = "1.0.0"
+
+LEVELS = {
+    'simple': MyLevel,
+}
+
+# (cell, tower type) pairs for each tower in a layout
+LAYOUTS = {
+    'empty': [],
+    'starter': [((2, 2), SimpleTower), ((3, 0), SimpleTower), ((4, 1), SimpleTower),
+                ((4, 2), SimpleTower), ((4, 3), SimpleTower), ((2, 5), MissileTower)],
+    'missiles': [((1, 2), MissileTower), ((3, 2), MissileTower), ((5, 2), MissileTower)],
+    'mixed': [((1, 0), SimpleTower), ((1, 2), PulseTower), ((3, 2), MissileTower),
+              ((4, 0), SimpleTower), ((5, 2), SimpleTower)],
+}
+
+DIFFICULTIES = {
+    'easy': AbstractLevel.EASY,
+    'normal': AbstractLevel.NORMAL,
+    'hard': AbstractLevel.HARD,
+}
+
+DEFAULT_SEEDS = 16
+DEFAULT_MAX_STEPS = 200000
+
+
+def run_trial(trial):
+    """Plays a single game
+
+    Parameters:
+        trial (tuple<str, str, str, int, int>): The level, layout & difficulty
+            names, the seed, & the maximum number of steps
+
+    Returns:
+        tuple<tuple<str, str, str>, dict<str, *>>: The (level, layout, difficulty)
+                                                   combination, & the result
+    """
+    level_name, layout_name, difficulty_name, seed, max_steps = trial
+    level = LEVELS[level_name](difficulty=DIFFICULTIES[difficulty_name])
+    result = simulate(level, towers=LAYOUTS[layout_name], seed=seed, max_steps=max_steps)
+
+    return (level_name, layout_name, difficulty_name), result.to_dict()
+
+
+def summarise(values):
+    """(dict<str, float>) Returns the distribution of a non-empty list of numbers"""
+    values = sorted(values)
+    quartiles = statistics.quantiles(values, n=4) if len(values) > 1 else values * 3
+
+    return {
+        'min': values[0],
+        'p25': quartiles[0],
+        'median': quartiles[1],
+        'p75': quartiles[2],
+        'max': values[-1],
+        'mean': statistics.mean(values),
+        'stdev': statistics.stdev(values) if len(values) > 1 else 0.,
+    }
+
+
+def aggregate(results):
+    """Combines the results of every trial of each combination
+
+    Parameters:
+        results (list<dict<str, *>>): The result of each trial of a combination
+
+    Returns:
+        dict<str, *>: The survival rate, mean lives lost per wave, & score & wave reached
+                      distributions over the trials
+    """
+    waves = max(len(result['wave_escapes']) for result in results)
+
+    lives_lost = []
+    for wave in range(waves):
+        lost = [result['wave_escapes'][wave] for result in results if len(result['wave_escapes']) > wave]
+        lives_lost.append(sum(lost) / len(results))
+
+    return {
+        'trials': len(results),
+        'survival_rate': sum(result['won'] for result in results) / len(results),
+        'lives_lost_per_wave': lives_lost,
+        'score': summarise([result['score'] for result in results]),
+        'waves_reached': summarise([result['waves'] for result in results]),
+        'steps': sum(result['steps'] for result in results),
+    }
+
+
+def run(levels, layouts, difficulties, seeds, max_steps=DEFAULT_MAX_STEPS, workers=None):
+    """Plays every combination of levels, layouts & difficulties with each seed
+
+    Parameters:
+        levels (list<str>): The names of the levels to play
+        layouts (list<str>): The names of the tower layouts to play with
+        difficulties (list<str>): The names of the difficulties to play at
+        seeds (list<int>): The seeds to play each combination with
+        max_steps (int): The maximum number of steps of any game
+        workers (int): The number of processes to play with, or None for one per core
+
+    Returns:
+        dict<str, *>: The aggregate results of each combination
+    """
+    trials = [(level, layout, difficulty, seed, max_steps)
+              for level, layout, difficulty, seed in itertools.product(levels, layouts, difficulties, seeds)]
+
+    workers = workers or os.cpu_count() or 1
+    # enough chunks to balance uneven game lengths, but few enough to amortise transfers
+    chunk_size = max(1, len(trials) // (workers * 8))
+
+    results = {}
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for combination, result in executor.map(run_trial, trials, chunksize=chunk_size):
+            results.setdefault(combination, []).append(result)
+    elapsed = time.perf_counter() - start
+
+    return {
+        'workers': workers,
+        'trials': len(trials),
+        'elapsed': elapsed,
+        'steps_per_second': sum(result['steps'] for trials_ in results.values()
+                                for result in trials_) / elapsed,
+        'combinations': [dict(zip(('level', 'layout', 'difficulty'), combination), **aggregate(trials_))
+                         for combination, trials_ in results.items()],
+    }
+
+
+def format_report(report):
+    """(str) Returns a human-readable table of a report"""
+    lines = ["{:<10} {:<10} {:<10} {:>8} {:>10} {:>10} {:>10}".format(
+        'level', 'layout', 'difficulty', 'survived', 'score p50', 'score p75', 'wave p50')]
+
+    for combination in report['combinations']:
+        score = combination['score']
+        lines.append("{:<10} {:<10} {:<10} {:>7.0%} {:>10.0f} {:>10.0f} {:>10.0f}".format(
+            combination['level'], combination['layout'], combination['difficulty'],
+            combination['survival_rate'], score['median'], score['p75'], combination['waves_reached']['median']))
+
+    lines.append("")
+    lines.append("{} trials on {} workers in {:.1f}s ({:.0f} steps/s)".format(
+        report['trials'], report['workers'], report['elapsed'], report['steps_per_second']))
+
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument('--level', nargs='+', choices=sorted(LEVELS), default=sorted(LEVELS))
+    parser.add_argument('--layout', nargs='+', choices=sorted(LAYOUTS), default=sorted(LAYOUTS))
+    parser.add_argument('--difficulty', nargs='+', choices=list(DIFFICULTIES), default=['normal'])
+    parser.add_argument('--seeds', type=int, default=DEFAULT_SEEDS, help="number of seeds per combination")
+    parser.add_argument('--max-steps', type=int, default=DEFAULT_MAX_STEPS)
+    parser.add_argument('--workers', type=int, help="number of processes (default: one per core)")
+    parser.add_argument('--output', help="write the report as JSON to this file")
+    args = parser.parse_args(argv)
+
+    report = run(args.level, args.layout, args.difficulty, list(range(args.seeds)),
+                 max_steps=args.max_steps, workers=args.workers)
+
+    print(format_report(report))
+
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump(report, file, indent=2)
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
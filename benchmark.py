@@ -0,0 +1,471 @@
+"""Micro-benchmarks for the simulation hot paths
+
+Runs headless, writes machine-readable JSON & compares against a stored baseline,
+reporting the change in time per call as a percentage
+
+Also reports the memory taken by each kind of unit in its slotted layout, against
+the memory recorded for it before units were slotted
+
+Usage:
+    python benchmark.py [-k FILTER] [--output FILE] [--baseline FILE] [--save-baseline FILE]
+
+benchmark_baseline.json holds reference results, from CPython 3.11 on Linux x86-64,
+to compare against with --baseline benchmark_baseline.json. Timings only compare
+on similar machines, so for a local baseline run on the unchanged code first:
+    python benchmark.py --save-baseline my_baseline.json
+    (make changes)
+    python benchmark.py --baseline my_baseline.json
+"""
+
+import argparse
+import gc
+import json
+import math
+import platform
+import random
+import statistics
+import sys
+import time
+import tracemalloc
+
+from model import TowerGame, CELL_SIZE
+from enemy import SimpleEnemy, EnemyStore
+from tower import SimpleTower, MissileTower, PulseTower, Missile
+from modules.ee import EventEmitter
+import utilities
+
+__license__ = "MIT"
+__version__ = "1.0.0"
+
+# (name, setup function, list of parameter dicts, fixed number of calls per repeat)
+BENCHMARKS = []
+
+SEED = 1
+DEFAULT_REPEAT = 5
+DEFAULT_MIN_TIME = .2  # seconds per repeat when calibrating the number of calls
+DEFAULT_THRESHOLD = 10.  # percentage slower than baseline considered a regression
+MEMORY_UNITS = 10000  # units created when measuring the memory per unit
+
+
+def benchmark(*parameters, number=None):
+    """Decorator registering a benchmark
+
+    The decorated setup function is called with each set of parameters, & returns
+    a function taking no arguments, which is timed. Setup is repeated before each
+    repeat, so stateful benchmarks should give a fixed number of calls per repeat
+
+    Parameters:
+        *parameters (dict<str, *>): Keyword arguments for each run of the benchmark
+        number (int): The number of calls per repeat, or None to calibrate
+    """
+    def register(setup):
+        BENCHMARKS.append((setup.__name__, setup, list(parameters) or [{}], number))
+        return setup
+
+    return register
+
+
+def format_name(name, parameters):
+    """(str) Returns a unique name for a run of a benchmark with 'parameters'"""
+    if not parameters:
+        return name
+    return "{}[{}]".format(name, ",".join(f"{key}={value}" for key, value in parameters.items()))
+
+
+def build_game(size, towers=0, enemies=0, seed=SEED):
+    """Builds a game with towers placed randomly & enemies spread along the path
+
+    Parameters:
+        size (tuple<int, int>): The number of (column, row) cells in the grid
+        towers (int): The number of towers to attempt to place
+        enemies (int): The number of enemies to spawn
+        seed (int): Seed for random placement
+
+    Returns:
+        TowerGame: The game
+    """
+    rng = random.Random(seed)
+    game = TowerGame(size=size)
+    columns, rows = size
+
+    tower_types = (SimpleTower, MissileTower, PulseTower)
+    for _ in range(towers * 4):
+        if len(game.towers) >= towers:
+            break
+        cell = rng.randrange(columns), rng.randrange(rows)
+        game.place(cell, tower_type=tower_types[len(game.towers) % len(tower_types)])
+
+    # spread the enemies over the first half of the path
+    cells = list(game.path.get_shortest())
+    cells = cells[:max(1, len(cells) // 2)]
+    units = []
+    for i in range(enemies):
+        enemy = SimpleEnemy(game.grid.cell_size)
+        enemy.position = game.grid.cell_to_pixel_centre(cells[i % len(cells)])
+        units.append(enemy)
+    game.enemies = units
+
+    return game
+
+
+@benchmark({'size': (6, 6)}, {'size': (24, 12)}, {'size': (80, 60)})
+def path_construction(size):
+    game = TowerGame(size=size)
+    return game.generate_path
+
+
+@benchmark({'size': (6, 6), 'towers': 6, 'enemies': 20},
+           {'size': (24, 12), 'towers': 40, 'enemies': 500},
+           {'size': (40, 20), 'towers': 40, 'enemies': 2000},
+           number=20)
+def game_step(size, towers, enemies):
+    return build_game(size, towers=towers, enemies=enemies).step
+
+
+@benchmark({'enemies': 100}, {'enemies': 1000}, number=10)
+def simple_enemy_step(enemies):
+    game = build_game((24, 12), enemies=enemies)
+    units = list(game.enemies)
+    game.enemies = []  # detach, so each enemy steps itself
+    grid, path = game.grid, game.path
+
+    def step():
+        for enemy in units:
+            enemy.step(grid, path)
+
+    return step
+
+
+@benchmark({'enemies': 100}, {'enemies': 1000}, number=10)
+def enemy_store_step(enemies):
+    game = build_game((24, 12), enemies=enemies)
+    units = list(game.enemies)
+    game.enemies = []
+
+    store = EnemyStore()
+    for enemy in units:
+        store.add(enemy)
+
+    return lambda: store.step(game.grid, game.path)
+
+
+@benchmark({'missiles': 100}, {'missiles': 1000}, number=10)
+def missile_step(missiles):
+    game = build_game((24, 12), enemies=100)
+    enemies = game.enemies
+    cell_size = game.grid.cell_size
+
+    # fire from the far corner, so that no missile reaches its target during a repeat
+    obstacles = []
+    for i in range(missiles):
+        missile = Missile(cell_size, enemies[i % len(enemies)])
+        missile.position = game.grid.pixels
+        obstacles.append(missile)
+    game.obstacles = obstacles
+
+    return game._step_obstacles
+
+
+@benchmark({'towers': 1, 'enemies': 500}, {'towers': 1, 'enemies': 2000},
+           {'towers': 8, 'enemies': 2000}, number=20)
+def pulse_step(towers, enemies):
+    game = build_game((24, 12), enemies=enemies)
+
+    # place pulse towers beside the crowded first half of the path
+    cells = list(game.path.get_shortest())
+    cells = cells[:max(1, len(cells) // 2)]
+    pulse_towers = []
+    for column, row in cells:
+        if len(pulse_towers) >= towers:
+            break
+        for cell in ((column, row - 1), (column, row + 1), (column - 1, row), (column + 1, row)):
+            if game.place(cell, tower_type=PulseTower):
+                pulse_towers.append(game.towers[cell])
+                break
+
+    def step():
+        # pulse every call, rather than once per cool down
+        for tower in pulse_towers:
+            tower.cool_down.current = 0
+        game._step_towers()
+
+    return step
+
+
+@benchmark({'tower': 'SimpleTower', 'enemies': 1000}, {'tower': 'MissileTower', 'enemies': 1000},
+           {'tower': 'PulseTower', 'enemies': 1000})
+def is_position_in_range(tower, enemies):
+    rng = random.Random(SEED)
+    tower = {cls.__name__: cls for cls in (SimpleTower, MissileTower, PulseTower)}[tower](60)
+    tower.position = (300, 300)
+    positions = [(rng.uniform(0, 600), rng.uniform(0, 600)) for _ in range(enemies)]
+
+    def test():
+        for position in positions:
+            tower.is_position_in_range(position)
+
+    return test
+
+
+@benchmark({'listeners': 0}, {'listeners': 1}, {'listeners': 10})
+def event_emit(listeners):
+    emitter = EventEmitter()
+    for _ in range(listeners):
+        emitter.on("enemy_death", lambda enemies: None)
+
+    return lambda: emitter.emit("enemy_death", [])
+
+
+def _geometry(function, arguments):
+    """Returns a function calling 'function' with each tuple of 'arguments'"""
+    def call():
+        for args in arguments:
+            function(*args)
+
+    return call
+
+
+def _random_points(count):
+    rng = random.Random(SEED)
+    return [(rng.uniform(-500, 500), rng.uniform(-500, 500)) for _ in range(count)]
+
+
+@benchmark({'helper': 'euclidean_distance'}, {'helper': 'vector_length'}, {'helper': 'angle_between'},
+           {'helper': 'angular_difference'}, {'helper': 'rotate_toward'}, {'helper': 'rotate_point'},
+           {'helper': 'normalise_vector'}, {'helper': 'rectangles_intersect'})
+def geometry(helper):
+    points = _random_points(1000)
+    pairs = list(zip(points, reversed(points)))
+    angles = [(math.atan2(y, x), math.atan2(x, y)) for x, y in points]
+
+    arguments = {
+        'euclidean_distance': pairs,
+        'vector_length': [(point,) for point in points],
+        'angle_between': pairs,
+        'angular_difference': angles,
+        'rotate_toward': [(a, b, math.pi / 6) for a, b in angles],
+        'rotate_point': [(point, a) for point, (a, _) in zip(points, angles)],
+        'normalise_vector': [(point,) for point in points],
+        'rectangles_intersect': [(a, (a[0] + 15, a[1] + 15), (0, 0), (600, 600)) for a in points],
+    }[helper]
+
+    return _geometry(getattr(utilities, helper), arguments)
+
+
+def _make_unit(unit_type):
+    return unit_type(CELL_SIZE)
+
+
+def _make_enemy(enemy_type):
+    enemy = enemy_type(CELL_SIZE)
+    enemy.position = 1.5, 2.5
+    return enemy
+
+
+def _make_missile(missile_type, target=SimpleEnemy(CELL_SIZE)):
+    return missile_type(CELL_SIZE, target)
+
+
+# The bytes per unit recorded by measure_memory before units were slotted (on the
+# commit before "Give units a compact slotted layout"), when each unit had its own
+# __dict__ & size tuple. Only comparable on the same Python version
+UNSLOTTED_PYTHON = '3.11.7'
+
+# (name, function taking a unit type & returning a unit, unit type, bytes per unit
+# before units were slotted) for each unit measured
+MEMORY_BENCHMARKS = [
+    ('enemy', _make_enemy, SimpleEnemy, 208.3),
+    ('simple_tower', _make_unit, SimpleTower, 208.3),
+    ('missile_tower', _make_unit, MissileTower, 296.6),
+    ('missile', _make_missile, Missile, 232.2),
+]
+
+
+def measure_memory(factory, count=MEMORY_UNITS):
+    """(float) Returns the mean bytes allocated per unit, creating 'count' units with 'factory'"""
+    gc.collect()
+    tracemalloc.start()
+    try:
+        before, _ = tracemalloc.get_traced_memory()
+        units = [factory() for _ in range(count)]
+        after, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return (after - before - sys.getsizeof(units)) / count
+
+
+def memory_benchmark(make_unit, unit_type, unslotted, count=MEMORY_UNITS):
+    """Measures the memory per unit of a type, against its memory before units were slotted
+
+    Parameters:
+        make_unit (callable): Takes a unit type & returns a new unit of that type
+        unit_type (type): The (slotted) type of unit to measure
+        unslotted (float): The bytes per unit recorded before units were slotted
+        count (int): The number of units to create
+
+    Returns:
+        dict<str, *>: The bytes per unit when slotted & unslotted, the saving, & the
+                      Python version the unslotted bytes were recorded with
+    """
+    slotted = measure_memory(lambda: make_unit(unit_type), count)
+
+    return {
+        'slotted': slotted,
+        'unslotted': unslotted,
+        'saving': 1 - slotted / unslotted,
+        'unslotted_python': UNSLOTTED_PYTHON,
+    }
+
+
+def time_benchmark(setup, parameters, number=None, repeat=DEFAULT_REPEAT, min_time=DEFAULT_MIN_TIME):
+    """Times a single run of a benchmark
+
+    Parameters:
+        setup (callable): The benchmark's setup function
+        parameters (dict<str, *>): Keyword arguments for the setup function
+        number (int): The number of calls per repeat, or None to calibrate
+        repeat (int): The number of times to repeat the timing
+        min_time (float): The minimum seconds per repeat when calibrating
+
+    Returns:
+        dict<str, *>: The best & median seconds per call, & number of calls per repeat
+    """
+    if number is None:
+        function = setup(**parameters)
+        number = 1
+        while True:
+            start = time.perf_counter()
+            for _ in range(number):
+                function()
+            if time.perf_counter() - start >= min_time:
+                break
+            number *= 2
+
+    timings = []
+    for _ in range(repeat):
+        function = setup(**parameters)
+        start = time.perf_counter()
+        for _ in range(number):
+            function()
+        timings.append((time.perf_counter() - start) / number)
+
+    return {
+        'seconds': min(timings),
+        'median': statistics.median(timings),
+        'number': number,
+        'repeat': repeat,
+    }
+
+
+def run(name_filter=None, repeat=DEFAULT_REPEAT, min_time=DEFAULT_MIN_TIME, stream=None):
+    """Runs every registered benchmark whose name contains 'name_filter'
+
+    Returns:
+        dict<str, *>: Machine-readable results
+    """
+    results = {}
+    memory = {}
+    for name, setup, parameter_sets, number in BENCHMARKS:
+        for parameters in parameter_sets:
+            full_name = format_name(name, parameters)
+            if name_filter and name_filter not in full_name:
+                continue
+
+            results[full_name] = result = time_benchmark(setup, parameters, number=number,
+                                                         repeat=repeat, min_time=min_time)
+            if stream is not None:
+                print(f"{full_name:<70} {result['seconds'] * 1e6:>14.2f} us", file=stream)
+
+    for name, make_unit, unit_type, unslotted in MEMORY_BENCHMARKS:
+        full_name = format_name('memory', {'unit': name})
+        if name_filter and name_filter not in full_name:
+            continue
+
+        memory[full_name] = result = memory_benchmark(make_unit, unit_type, unslotted)
+        if stream is not None:
+            print(f"{full_name:<50} {result['slotted']:>8.0f} B/unit ({result['unslotted']:.0f} B unslotted "
+                  f"on Python {UNSLOTTED_PYTHON}, {result['saving']:.0%} saved)", file=stream)
+
+    return {
+        'python': platform.python_version(),
+        'implementation': platform.python_implementation(),
+        'platform': platform.platform(),
+        'results': results,
+        'memory': memory,
+    }
+
+
+def compare(current, baseline, threshold=DEFAULT_THRESHOLD):
+    """Compares results against a baseline
+
+    Parameters:
+        current (dict<str, *>): Results, as returned by run
+        baseline (dict<str, *>): Baseline results, as returned by run
+        threshold (float): The percentage slowdown considered a regression
+
+    Returns:
+        dict<str, dict<str, *>>: For each benchmark in both, the baseline & current seconds
+                                 per call, the percentage change, & whether it regressed
+    """
+    comparison = {}
+    for name, result in current['results'].items():
+        previous = baseline['results'].get(name)
+        if previous is None:
+            continue
+
+        change = (result['seconds'] - previous['seconds']) / previous['seconds'] * 100
+        comparison[name] = {
+            'baseline': previous['seconds'],
+            'current': result['seconds'],
+            'change': change,
+            'regression': change > threshold,
+        }
+
+    return comparison
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument('-k', dest='name_filter', help="only run benchmarks whose name contains this")
+    parser.add_argument('--repeat', type=int, default=DEFAULT_REPEAT)
+    parser.add_argument('--min-time', type=float, default=DEFAULT_MIN_TIME)
+    parser.add_argument('--output', help="write results as JSON to this file ('-' for stdout)")
+    parser.add_argument('--baseline', help="compare against results stored in this file")
+    parser.add_argument('--save-baseline', help="store results in this file for later comparison")
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help="percentage slowdown reported as a regression")
+    args = parser.parse_args(argv)
+
+    progress = sys.stderr if args.output == '-' else sys.stdout
+    results = run(name_filter=args.name_filter, repeat=args.repeat, min_time=args.min_time, stream=progress)
+
+    regressed = False
+    if args.baseline:
+        with open(args.baseline) as file:
+            baseline = json.load(file)
+
+        results['comparison'] = comparison = compare(results, baseline, threshold=args.threshold)
+
+        print(file=progress)
+        for name, change in comparison.items():
+            flag = "  REGRESSION" if change['regression'] else ""
+            print(f"{name:<70} {change['change']:>+9.1f}%{flag}", file=progress)
+            regressed = regressed or change['regression']
+
+    if args.output == '-':
+        json.dump(results, sys.stdout, indent=2)
+        print()
+    elif args.output:
+        with open(args.output, 'w') as file:
+            json.dump(results, file, indent=2)
+
+    if args.save_baseline:
+        with open(args.save_baseline, 'w') as file:
+            json.dump({key: value for key, value in results.items() if key != 'comparison'}, file, indent=2)
+
+    return 1 if regressed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
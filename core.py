@@ -8,9 +8,19 @@ __copyright__ = "Copyright 2018, The University of Queensland"
 __license__ = "MIT"
 __version__ = "1.0.0"
 
+# (grid size, cell size) -> pixel size, shared by units of the same size
+_sizes = {}
+
 
 class Unit(ABC):
-    """A basic unit on the game field"""
+    """A basic unit on the game field
+
+    Units are slotted, so that large numbers of them stay compact. Subclasses
+    should declare __slots__ for any attributes they set on instances, while
+    class-level constants (e.g. grid_size) are overridden as usual
+    """
+    __slots__ = ('size', 'cell_size')
+
     position: Point2D_T = (None, None)
 
     # Must be overridden/implemented!
@@ -21,7 +31,13 @@ class Unit(ABC):
             self.set_cell_size(cell_size)
 
     def set_cell_size(self, cell_size):
-        self.size = tuple(i * cell_size for i in self.grid_size)
+        # units of a type are all the same size, so share one tuple between them
+        key = self.grid_size, cell_size
+        size = _sizes.get(key)
+        if size is None:
+            size = _sizes[key] = tuple(i * cell_size for i in self.grid_size)
+
+        self.size = size
         self.cell_size = cell_size
 
     def get_bounding_box(self):
@@ -1,4 +1,8 @@
+import heapq
+from array import array
+
 from core import Unit
+from path import FLOW_DIRECTIONS, NO_DIRECTION
 from type_hints import Point2D_T, Num_T
 from utilities import inherit_docstrings, rectangles_intersect
 
@@ -9,15 +13,20 @@ __version__ = "1.0.0"
 
 
 class AbstractEnemy(Unit):
-    """An enemy for the towers to defend against"""
-    position: Point2D_T
+    """An enemy for the towers to defend against
+
+    Once spawned, an enemy's position & health are held by an EnemyStore, and the
+    enemy object is a view over its row in the store
+    """
+    __slots__ = ('_store', '_slot', '_position', '_health')
+
     size: Point2D_T
-    health: int
 
     # Must be overridden/implemented!
     max_health: int
     colour: str
     points: int
+    speed: Num_T
 
     def __init__(self, cell_size: Num_T=None):
         """Construct an abstract enemy
@@ -28,8 +37,59 @@ class AbstractEnemy(Unit):
             cell_size (tuple<int, int>): The width,height of the enemy in pixels
         """
         super().__init__(cell_size=cell_size)
+
+        # store holding this enemy's state, & its index in the store (None if not in play)
+        self._store = self._slot = None
+
+        self._position = (None, None)
+        self._health = self.max_health
+
+    def reset(self, cell_size: Num_T=None):
+        """Restores the enemy to the state it was constructed in, so that it can be
+        reused from a pool (see pool.py)
+
+        Parameters:
+            cell_size (tuple<int, int>): The width,height of the enemy in pixels
+        """
+        if cell_size:
+            self.set_cell_size(cell_size)
+        self.position = (None, None)
         self.health = self.max_health
 
+    @property
+    def position(self):
+        """(tuple<num, num>) The pixel position of the centre of this enemy"""
+        store = self._store
+        if store is None:
+            return self._position
+        slot = self._slot
+        return store.xs[slot], store.ys[slot]
+
+    @position.setter
+    def position(self, position):
+        store = self._store
+        if store is None:
+            self._position = position
+            return
+        slot = self._slot
+        store.xs[slot], store.ys[slot] = position
+
+    @property
+    def health(self):
+        """(num) The current health of this enemy"""
+        store = self._store
+        if store is None:
+            return self._health
+        return store.healths[self._slot]
+
+    @health.setter
+    def health(self, health):
+        store = self._store
+        if store is None:
+            self._health = health
+            return
+        store.healths[self._slot] = health
+
     def is_dead(self):
         """(bool) True iff the enemy is dead i.e. health below zero"""
         return self.health <= 0
@@ -55,6 +115,8 @@ class AbstractEnemy(Unit):
 @inherit_docstrings
 class SimpleEnemy(AbstractEnemy):
     """Basic type of enemy"""
+    __slots__ = ()
+
     max_health = 100
     grid_size = (.25, .25)
     speed = 5
@@ -104,11 +166,13 @@ class SimpleEnemy(AbstractEnemy):
         self.position = x + dx, y + dy
         intersects = rectangles_intersect(*self.get_bounding_box(), (0, 0), grid.pixels)
 
-        return intersects or grid.pixel_to_cell(self.position) in path.deltas
+        return intersects or path.has_delta(grid.pixel_to_cell(self.position))
 
 
 @inherit_docstrings
 class SteelEnemy(SimpleEnemy):
+    __slots__ = ()
+
     max_health = 250
     colour = 'light sky blue'
     points = 100
@@ -120,7 +184,323 @@ class SteelEnemy(SimpleEnemy):
 
 @inherit_docstrings
 class InvincibleEnemy(SimpleEnemy):
+    __slots__ = ()
+
     colour = 'slate gray'
 
     def damage(self, damage, type_):
         return
+
+
+class EnemyStore:
+    """Structure-of-arrays storage for the state of every enemy in play
+
+    Position, health, speed, size & type are held in contiguous arrays, indexed by
+    slot, so that every enemy can be moved in a single pass, against the path's
+    flow field. Enemies added to the store become views
+    over their slot, and slots are kept in the order that enemies were added.
+
+    Enemies whose class moves like SimpleEnemy are moved by the store directly,
+    while any other enemies fall back to their own step method.
+
+    Note: the pass is a plain Python loop over the columns, one enemy at a time, not
+    vectorised; it saves the attribute lookups & method calls of stepping each enemy
+    """
+    units: list  # The enemy objects in play, indexed by slot
+
+    def __init__(self):
+        self.units = []
+
+        self.xs = array('d')
+        self.ys = array('d')
+        self.healths = array('d')
+        self.speeds = array('d')
+        self.widths = array('d')
+        self.heights = array('d')
+        self.types = array('H')
+
+        self._type_codes = {}
+        self._moved_by_store = []  # whether each type (by code) moves like SimpleEnemy
+
+    def __len__(self):
+        return len(self.units)
+
+    def __iter__(self):
+        return iter(self.units)
+
+    def _get_type_code(self, enemy_type):
+        """(int) Returns the code for 'enemy_type', registering it if necessary"""
+        code = self._type_codes.get(enemy_type)
+        if code is None:
+            code = self._type_codes[enemy_type] = len(self._moved_by_store)
+            self._moved_by_store.append(getattr(enemy_type, 'step', None) is SimpleEnemy.step)
+        return code
+
+    def add(self, enemy: AbstractEnemy):
+        """Adds 'enemy' to the end of the store
+
+        Note: an enemy's speed & size are captured when it is added
+
+        Parameters:
+            enemy (AbstractEnemy): The enemy to add, which must not be in a store
+        """
+        position = enemy.position
+        health = enemy.health
+        width, height = enemy.size
+
+        enemy._store = self
+        enemy._slot = len(self.units)
+        self.units.append(enemy)
+
+        self.xs.append(position[0])
+        self.ys.append(position[1])
+        self.healths.append(health)
+        self.speeds.append(getattr(enemy, 'speed', 0))
+        self.widths.append(width)
+        self.heights.append(height)
+        self.types.append(self._get_type_code(type(enemy)))
+
+    @staticmethod
+    def get_state(enemy):
+        """Returns the position & health of an enemy, whether or not it is in a store,
+        with a single lookup of its store
+
+        Parameters:
+            enemy (AbstractEnemy): The enemy
+
+        Returns:
+            tuple<num, num, num>: The enemy's x & y pixel position, & health
+        """
+        store = enemy._store
+        if store is None:
+            x, y = enemy._position
+            return x, y, enemy._health
+
+        slot = enemy._slot
+        return store.xs[slot], store.ys[slot], store.healths[slot]
+
+    def _detach(self, slot):
+        """Copies the state of the enemy at 'slot' back into the enemy object"""
+        enemy = self.units[slot]
+        enemy._position = self.xs[slot], self.ys[slot]
+        enemy._health = self.healths[slot]
+        enemy._store = enemy._slot = None
+
+    def clear(self):
+        """Removes every enemy from the store"""
+        for slot in range(len(self.units)):
+            self._detach(slot)
+
+        self.units = []
+        for column in (self.xs, self.ys, self.healths, self.speeds, self.widths, self.heights, self.types):
+            del column[:]
+
+    def step(self, grid, path):
+        """Moves every living enemy forward a single time-step
+
+        Dead & escaped enemies are removed from the store
+
+        Parameters:
+            grid (GridCoordinateTranslator): Grid the enemies are currently on
+            path (Path): The path the enemies are following
+
+        Returns:
+            tuple<list<AbstractEnemy>, list<AbstractEnemy>, list<AbstractEnemy>>:
+                The (remaining, dead, escaped) enemies, each in store order
+        """
+        codes = path.flow
+        (first_column, first_row), _ = path.bounds
+        columns, rows = path.columns, path.rows
+        cell_size = grid.cell_size
+        max_x, max_y = grid.pixels
+
+        units = self.units
+        xs, ys, healths, speeds = self.xs, self.ys, self.healths, self.speeds
+        widths, heights, types = self.widths, self.heights, self.types
+        moved_by_store = self._moved_by_store
+
+        dead = []
+        escaped = []
+        write = 0
+
+        for read, enemy in enumerate(units):
+            if healths[read] <= 0:
+                self._detach(read)
+                dead.append(enemy)
+                continue
+
+            if moved_by_store[types[read]]:
+                x = xs[read]
+                y = ys[read]
+
+                column = int(x // cell_size) - first_column
+                row = int(y // cell_size) - first_row
+                code = codes[column + row * columns] \
+                    if 0 <= column < columns and 0 <= row < rows else -1
+                if code == NO_DIRECTION:
+                    raise KeyError((column + first_column, row + first_row))
+                grid_dx, grid_dy = FLOW_DIRECTIONS[code]
+
+                internal_x = (x / cell_size) % 1 - .5
+                internal_y = (y / cell_size) % 1 - .5
+                internal_x = 1 if internal_x > 0 else (-1 if internal_x < 0 else 0)
+                internal_y = 1 if internal_y > 0 else (-1 if internal_y < 0 else 0)
+
+                if (internal_x or internal_y) and (internal_x != grid_dx or internal_y != grid_dy):
+                    grid_dx, grid_dy = -internal_x, -internal_y
+
+                speed = speeds[read]
+                x += grid_dx * speed
+                y += grid_dy * speed
+                xs[read] = x
+                ys[read] = y
+
+                left = x - widths[read] // 2
+                top = y - heights[read] // 2
+
+                in_bounds = not (left > max_x or left + widths[read] < 0
+                                 or top > max_y or top + heights[read] < 0)
+
+                if not in_bounds:
+                    column = int(x // cell_size) - first_column
+                    row = int(y // cell_size) - first_row
+                    in_bounds = 0 <= column < columns and 0 <= row < rows \
+                        and codes[column + row * columns] != NO_DIRECTION
+            else:
+                in_bounds = enemy.step(grid, path)
+
+            if not in_bounds:
+                self._detach(read)
+                escaped.append(enemy)
+                continue
+
+            if write != read:
+                units[write] = enemy
+                enemy._slot = write
+                xs[write] = xs[read]
+                ys[write] = ys[read]
+                healths[write] = healths[read]
+                speeds[write] = speeds[read]
+                widths[write] = widths[read]
+                heights[write] = heights[read]
+                types[write] = types[read]
+            write += 1
+
+        del units[write:]
+        for column in (xs, ys, healths, speeds, widths, heights, types):
+            del column[write:]
+
+        return units, dead, escaped
+
+
+
+class SpawnQueue:
+    """Enemies waiting to be spawned, merged from any number of queued waves
+
+    A wave is an iterable of (step, enemy) pairs in ascending order of step, where
+    each enemy is either an enemy or a function which creates one (e.g. its class)
+
+    Enemies are sized for the game's cells as they're created or spawned
+
+    Only the next enemy of each wave is held, in a heap ordered by step & then by
+    the order in which waves were queued, so waves can be generated lazily & their
+    enemies are only created as they're spawned
+    """
+
+    def __init__(self, cell_size, pools=None):
+        """Constructor
+
+        Parameters:
+            cell_size (int): The cell size to give enemies as they're created
+            pools (PoolRegistry): The pools to acquire enemies created by their class
+                                  from, or None to construct them
+        """
+        self.cell_size = cell_size
+        self.pools = pools
+        self._heap = []
+        self._waves = 0  # the number of waves ever queued, to order equal steps
+
+    def __bool__(self):
+        """(bool) Returns True iff there are enemies left to spawn"""
+        return bool(self._heap)
+
+    def wave_count(self):
+        """(int) Returns the number of queued waves with enemies left to spawn
+
+        The queue has no length, as the number of enemies left in lazily generated
+        waves isn't known until they're generated
+        """
+        return len(self._heap)
+
+    def push(self, wave, offset=0):
+        """Queues a wave of enemies
+
+        Lists are sorted by step, but any other iterable must already be in order
+
+        Parameters:
+            wave (iter<tuple<int, AbstractEnemy|callable>>): The (step, enemy) pairs
+            offset (int): The number of steps to add to each step in the wave
+        """
+        if isinstance(wave, list):
+            wave = sorted(wave, key=lambda pair: pair[0])
+
+        self._push_next(iter(wave), offset, self._waves)
+        self._waves += 1
+
+    def _push_next(self, wave, offset, order):
+        """Moves the next enemy of a wave onto the heap, if there is one"""
+        for step, enemy in wave:
+            heapq.heappush(self._heap, (step + offset, order, enemy, wave, offset))
+            break
+
+    def pop(self, step):
+        """Yields each enemy due to spawn by 'step', in order, creating any as needed"""
+        heap = self._heap
+        while heap and heap[0][0] <= step:
+            _, order, enemy, wave, offset = heapq.heappop(heap)
+            self._push_next(wave, offset, order)
+            yield self._create(enemy)
+
+    def clear(self):
+        """Discards every queued wave"""
+        self._heap = []
+
+    def _create(self, enemy):
+        """(AbstractEnemy) Returns 'enemy', first creating it if it's a function,
+        sized for the queue's cells
+
+        Enemies created by their class are acquired from its pool, if any
+        """
+        if isinstance(enemy, type):
+            if self.pools is None:
+                return enemy(self.cell_size)
+            return self.pools.get(enemy).acquire(self.cell_size)
+
+        if not isinstance(enemy, AbstractEnemy):
+            enemy = enemy()
+
+        enemy.set_cell_size(self.cell_size)
+        return enemy
+
+    def pending(self):
+        """Returns every enemy left to spawn, without spawning or creating any
+
+        Lazily generated waves are generated in full, & the queue keeps the
+        generated (step, enemy) pairs, so the same enemies still spawn, & are only
+        created as they spawn
+
+        Returns:
+            list<tuple<int, AbstractEnemy|callable>>: Each (step, enemy) pair, in spawn order
+        """
+        waves = []
+        for step, order, enemy, wave, offset in sorted(self._heap, key=lambda entry: entry[1]):
+            enemies = [(step, enemy)]
+            enemies.extend((step + offset, enemy) for step, enemy in wave)
+            waves.append((order, enemies))
+
+        self._heap = []
+        for order, enemies in waves:
+            self._push_next(iter(enemies), 0, order)
+
+        # merge is stable, so equal steps stay in the order their waves were queued
+        return list(heapq.merge(*(enemies for _, enemies in waves), key=lambda pair: pair[0]))
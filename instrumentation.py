@@ -0,0 +1,133 @@
+"""Lightweight timing instrumentation for game simulation steps"""
+
+import math
+from array import array
+
+__license__ = "MIT"
+__version__ = "1.0.0"
+
+DEFAULT_CAPACITY = 1024
+DEFAULT_PERCENTILES = (50, 95, 99)
+
+
+class RingBuffer:
+    """Fixed-size buffer of numbers, overwriting the oldest once full"""
+
+    def __init__(self, capacity, typecode='d'):
+        """Constructor
+
+        Parameters:
+            capacity (int): The maximum number of values to keep
+            typecode (str): The array typecode of the values
+        """
+        self.capacity = capacity
+        self._values = array(typecode, [0]) * capacity
+        self._next = 0
+        self._size = 0
+
+    def __len__(self):
+        return self._size
+
+    def append(self, value):
+        """Adds 'value', overwriting the oldest value if full"""
+        self._values[self._next] = value
+        self._next = (self._next + 1) % self.capacity
+        if self._size < self.capacity:
+            self._size += 1
+
+    def clear(self):
+        """Removes every value"""
+        self._next = self._size = 0
+
+    def values(self):
+        """(list<num>) Returns the values, oldest first"""
+        if self._size < self.capacity:
+            return self._values[:self._size].tolist()
+        return (self._values[self._next:] + self._values[:self._next]).tolist()
+
+    def percentiles(self, percents=DEFAULT_PERCENTILES):
+        """Returns the nearest-rank percentiles of the values
+
+        Parameters:
+            percents (iter<num>): The percentiles to calculate, each in (0, 100]
+
+        Returns:
+            dict<num, num>: Each percentile's value, or None if there are no values
+        """
+        values = sorted(self.values())
+        if not values:
+            return {percent: None for percent in percents}
+
+        return {percent: values[max(0, math.ceil(percent / 100 * len(values)) - 1)]
+                for percent in percents}
+
+
+class StepProfiler:
+    """Records the duration of each phase, & entity counts, for recent game steps"""
+    PHASES = ('obstacles', 'enemies', 'towers', 'spawn')
+    # 'waves' counts the queued waves with enemies left to spawn
+    COUNTS = ('enemies', 'towers', 'obstacles', 'waves')
+
+    def __init__(self, capacity=DEFAULT_CAPACITY):
+        """Constructor
+
+        Parameters:
+            capacity (int): The number of recent steps to keep
+        """
+        self.capacity = capacity
+        self.steps = 0  # total steps recorded, including those overwritten
+
+        self._durations = {phase: RingBuffer(capacity) for phase in self.PHASES + ('total',)}
+        self._counts = {name: RingBuffer(capacity, typecode='l') for name in self.COUNTS}
+
+    def __len__(self):
+        return len(self._durations['total'])
+
+    def record(self, durations, counts):
+        """Records a single step
+
+        Parameters:
+            durations (tuple<float, ...>): Seconds taken by each phase, ordered as PHASES
+            counts (tuple<int, ...>): Entity counts after the step, ordered as COUNTS
+        """
+        for phase, duration in zip(self.PHASES, durations):
+            self._durations[phase].append(duration)
+        self._durations['total'].append(sum(durations))
+
+        for name, count in zip(self.COUNTS, counts):
+            self._counts[name].append(count)
+
+        self.steps += 1
+
+    def clear(self):
+        """Removes every recorded step"""
+        for buffer in self._durations.values():
+            buffer.clear()
+        for buffer in self._counts.values():
+            buffer.clear()
+        self.steps = 0
+
+    def durations(self, phase):
+        """(list<float>) Returns the recent durations of 'phase' (or 'total'), oldest first"""
+        return self._durations[phase].values()
+
+    def counts(self, name):
+        """(list<int>) Returns the recent counts of entity 'name', oldest first"""
+        return self._counts[name].values()
+
+    def percentiles(self, phase, percents=DEFAULT_PERCENTILES):
+        """(dict<num, float>) Returns rolling percentiles of the duration of 'phase' (or 'total')"""
+        return self._durations[phase].percentiles(percents)
+
+    def summary(self, percents=DEFAULT_PERCENTILES):
+        """Returns rolling percentiles for every phase & entity count
+
+        Returns:
+            dict<str, dict<str, *>>: For each phase & count, 'p50', 'p95', etc.
+        """
+        summary = {}
+        for name, buffers in (('durations', self._durations), ('counts', self._counts)):
+            summary[name] = {key: {f"p{percent}": value for percent, value in buffer.percentiles(percents).items()}
+                             for key, buffer in buffers.items()}
+
+        return summary
@@ -1,5 +1,8 @@
 """Contains abstract level for generating waves and relevant utilities functions"""
 
+import functools
+import random
+
 __author__ = "Benjamin Martin and Brae Webb"
 __copyright__ = "Copyright 2018, The University of Queensland"
 __license__ = "MIT"
@@ -14,8 +17,16 @@ class AbstractLevel:
 
     waves = None
 
-    def __init__(self, difficulty=NORMAL):
+    def __init__(self, difficulty=NORMAL, seed=None):
+        """Constructor
+
+        Parameters:
+            difficulty (int): The difficulty of the level, one of EASY, NORMAL or HARD
+            seed (*): Seed for the level's random number generator, which any
+                      randomness in its waves should use
+        """
         self.difficulty = difficulty
+        self.rng = random.Random(seed)
 
     def get_wave(self, wave_n):
         """Returns enemies in the 'wave_n'th wave
@@ -24,8 +35,12 @@ class AbstractLevel:
             wave_n (int): The nth wave
 
         Return:
-            list[tuple[int, AbstractEnemy]]: A list of (step, enemy) pairs in the
-                                             wave, sorted by step in ascending order 
+            iter[tuple[int, callable]]: The (step, enemy factory) pairs in the wave,
+                                        sorted by step in ascending order, where
+                                        each factory takes no arguments & returns
+                                        an AbstractEnemy
+
+        Waves may be generated lazily, as enemies are only created when they spawn
         """
         raise NotImplementedError("get_wave must be implemented by a subclass")
 
@@ -60,17 +75,16 @@ class AbstractLevel:
         if kwargs is None:
             kwargs = {}
 
+        factory = functools.partial(enemy_class_, *args, **kwargs) if args or kwargs else enemy_class_
+
         for step in cls.generate_intervals(steps, count):
-            yield step + offset, enemy_class_(*args, **kwargs)
+            yield step + offset, factory
 
     @classmethod
     def generate_sub_waves(cls, sub_waves):
-        enemies = []
         offset = 0
         for steps, count, enemy_type, args, kwargs in sub_waves:
             if count is not None:
-                enemies.extend(cls.generate_sub_wave(steps, count, enemy_type, args=args, kwargs=kwargs, offset=offset))
+                yield from cls.generate_sub_wave(steps, count, enemy_type, args=args, kwargs=kwargs, offset=offset)
 
             offset += steps
-
-        return enemies
@@ -1,11 +1,18 @@
+import hashlib
 import random
+import time
 
 from modules.ee import EventEmitter
 from modules.matrix import get_adjacent_cells
 
-from tower import SimpleTower
-from enemy import SimpleEnemy
-from path import Path
+from tower import SimpleTower, Missile
+from enemy import AbstractEnemy, SimpleEnemy, EnemyStore, SpawnQueue
+from path import Path, PathCache
+from pool import PoolRegistry
+from spatial import SpatialHash
+from targeting import ProgressIndex
+from instrumentation import StepProfiler, DEFAULT_CAPACITY
+import snapshot
 from type_hints import Point2DInt_T, Tuple
 
 __author__ = "Benjamin Martin and Brae Webb"
@@ -18,6 +25,9 @@ PIXEL_SIZE = (24, 12)
 
 GRID_SIZE = (6, 6)
 
+# Seed for the random keys which are combined to hash tower layouts
+ZOBRIST_SEED = 0x70E7
+
 class GridCoordinateTranslator:
     """Translates coordinates between cells in a grid (column, row) & pixels (x, y)
 
@@ -105,46 +115,103 @@ class TowerGame(EventEmitter):
     """Model for a game of tower defence"""
     _current_step = -1
 
-    def __init__(self, size=GRID_SIZE, cell_size=CELL_SIZE):
-        """Construct a new tower defence game"""
+    # StepProfiler recording each step, or None when instrumentation is disabled
+    profiler = None
+
+    # InputRecorder recording each command, or None when not recording
+    recorder = None
+
+    # The phase of the step being performed (1 to 4), or 0 between steps
+    # Only tracked while recording, profiling or with a phase hook
+    phase = 0
+
+    # Function called with the number of each phase of a step once it's performed, if any
+    phase_hook = None
+
+    def __init__(self, size=GRID_SIZE, cell_size=CELL_SIZE, seed=None):
+        """Construct a new tower defence game
+
+        Parameters:
+            size (tuple<int, int>): The number of (column, row) cells in the grid
+            cell_size (int): The side length of each cell, in pixels
+            seed (*): Seed for the game's random number generator
+        """
         super().__init__()
 
+        self.seed = seed
+        self.rng = random.Random(seed)
+
         self.grid = GridCoordinateTranslator(cells=size, cell_size=cell_size)
 
         self.towers = {}
 
+        # towers placed or changed, & towers removed, since last popped, while tracked
+        self._track_changes = False
+        self._changed_towers = set()
+        self._removed_towers = set()
+
         # assign the start and end point of the enemies
         self._start, self._end = (-1, 1), (self.grid.cells[0], 1)
 
+        # assign each cell a random key; a layout's hash is the xor of its towers' keys
+        zobrist = random.Random(ZOBRIST_SEED)
+        columns, rows = self.grid.cells
+        self._zobrist_keys = {(column, row): zobrist.getrandbits(64)
+                              for column in range(columns) for row in range(rows)}
+        self._layout_hash = 0
+
         # recalculate the path for enemies to travel avoiding current towers
+        self._get_neighbours = self._make_get_neighbours()
         self.path = self.generate_path()
 
+        self.path_cache = PathCache()
+        self.path_cache.put(self._layout_hash, self.path)
+
+        self._blocking_path = None
+        self._blocking_cells = frozenset()
+
         self.obstacles = []
 
         for position, tower in self.towers.items():
             tower.position = self.grid.cell_to_pixel_centre(position)
 
-        self.enemies = []
-        self._unspawned_enemies = []
+        # the game's own pools of enemies & projectiles, reused once they leave play
+        self.pools = PoolRegistry()
+
+        self._enemies = EnemyStore()
+        self._enemy_index = SpatialHash(self.grid)
+        self._progress_index = ProgressIndex(self.grid)
+        self._missile_index_step = None  # the step in which the index was last rebuilt for missiles
+        self._unspawned_enemies = SpawnQueue(cell_size, self.pools)
+
+        # enemies which have left play, to be returned to their pools
+        self._leaving_enemies = []
+
+    @property
+    def enemies(self):
+        """(list<AbstractEnemy>) The enemies in play, in the order they were spawned"""
+        return self._enemies.units
+
+    @enemies.setter
+    def enemies(self, enemies):
+        self._enemies.clear()
+        for enemy in enemies:
+            self._enemies.add(enemy)
 
     def is_wave_over(self):
         """(bool) Returns True iff there is no wave in progress"""
-        return len(self._unspawned_enemies) == 0 and len(self.enemies) == 0
+        return not self._unspawned_enemies and len(self.enemies) == 0
 
-    # TODO: add property for active tower to get_neighbours in generate_path & refactor this
-    def generate_path(self, *extra_towers):
-        """
-        Determine if a valid path can be made with extra towers added.
+    def _make_get_neighbours(self, *extra_towers):
+        """Returns a function which yields the neighbours of a cell that enemies can move to
 
-        Parameters:
-            extra_towers (set<tuple<int, int>>): Set of extra tower positions to add
+        Current towers are looked up as the function is called, so that paths can be
+        updated incrementally as towers are placed & removed
 
-        Returns:
-            (bool) True iff a path can be made with towers in the extra positions
+        Parameters:
+            extra_towers (set<tuple<int, int>>): Set of extra tower positions to avoid
         """
-        # gather all the current tower positions and include new towers
-        towers = set(self.towers.keys())
-        towers.update(extra_towers)
+        extra_towers = set(extra_towers)
 
         def get_neighbours(cell, from_=True):  # pylint: disable=unused-argument
             """Yields all the positions neighbouring cell
@@ -155,12 +222,32 @@ class TowerGame(EventEmitter):
                               *not used in this implementation*
             """
             for node in get_adjacent_cells(cell):
-                if (self.grid.is_cell_valid(node) and node not in towers) \
+                if (self.grid.is_cell_valid(node) and node not in self.towers and node not in extra_towers) \
                         or node == self._start or node == self._end:
                     yield node
 
-        # create a path from start to end avoiding towers
-        path = Path(self._start, self._end, get_neighbours)
+        return get_neighbours
+
+    # TODO: add property for active tower to get_neighbours in generate_path & refactor this
+    def generate_path(self, *extra_towers):
+        """
+        Determine if a valid path can be made with extra towers added.
+
+        Parameters:
+            extra_towers (set<tuple<int, int>>): Set of extra tower positions to add
+
+        Returns:
+            (bool) True iff a path can be made with towers in the extra positions
+        """
+        get_neighbours = self._make_get_neighbours(*extra_towers)
+
+        # create a path from start to end avoiding towers, covering the grid
+        columns, rows = self.grid.cells
+        (start_column, start_row), (end_column, end_row) = self._start, self._end
+        bounds = ((min(0, start_column, end_column), min(0, start_row, end_row)),
+                  (max(columns - 1, start_column, end_column), max(rows - 1, start_row, end_row)))
+
+        path = Path(self._start, self._end, get_neighbours, bounds=bounds)
         self._start, self._end = path.start, path.end
 
         return path
@@ -180,8 +267,14 @@ class TowerGame(EventEmitter):
         if not self.grid.is_cell_valid(cell) or cell not in self.towers:
             raise KeyError(f"No tower exists at {cell}")
 
+        if self.recorder is not None:
+            self.recorder.record_remove(self._current_step, cell)
+
         tower = self.towers.pop(cell)
-        self.path = self.generate_path()
+        self._forget_tower(tower)
+
+        self._layout_hash ^= self._zobrist_keys[cell]
+        self.path = self._derive_path(self._layout_hash, self._get_neighbours, Path.unblock, cell)
 
         return tower
 
@@ -212,83 +305,245 @@ class TowerGame(EventEmitter):
         tower = tower_type(self.grid.cell_size)
         tower.position = self.grid.cell_to_pixel_centre(cell)
 
+        self.towers[cell] = tower
+        layout_hash = self._layout_hash ^ self._zobrist_keys[cell]
+
         # check a path can still be made
         try:
-            self.generate_path(cell)
+            path = self._derive_path(layout_hash, self._get_neighbours, Path.block, cell)
         except KeyError:
+            del self.towers[cell]
             return False
 
-        self.towers[cell] = tower
-        self.path = self.generate_path()
+        self._layout_hash = layout_hash
+        self.path = path
+
+        if self.recorder is not None:
+            self.recorder.record_place(self._current_step, cell, tower_type)
+
+        self._track_tower(tower)
+        tower.pools = self.pools
+
         return True
 
+    def _track_tower(self, tower):
+        """Starts tracking changes to a tower that has been placed, if changes are tracked"""
+        if self._track_changes:
+            tower.changes = self._changed_towers
+            self._changed_towers.add(tower)
+
+    def _forget_tower(self, tower):
+        """Stops tracking changes to a tower that has been removed"""
+        tower.changes = None
+        tower.pools = None
+        if self._track_changes:
+            self._changed_towers.discard(tower)
+            self._removed_towers.add(tower)
+
+    @property
+    def track_changes(self):
+        """(bool) Whether the towers that change are tracked for pop_tower_changes
+
+        Off by default, since only a view drains the changes; otherwise every tower
+        removed would be kept. Enabling it marks every current tower as changed
+        """
+        return self._track_changes
+
+    @track_changes.setter
+    def track_changes(self, track_changes):
+        self._track_changes = track_changes
+        self._changed_towers.clear()
+        self._removed_towers = set()
+
+        for tower in self.towers.values():
+            tower.changes = None
+            self._track_tower(tower)
+
+    def pop_tower_changes(self):
+        """Returns the towers that changed since this method was last called, while
+        changes are tracked (see track_changes)
+
+        Returns:
+            tuple<set<AbstractTower>, set<AbstractTower>>:
+                The towers that were placed or whose position, rotation or level
+                changed, & the towers that were removed
+        """
+        # towers hold a reference to the changed set, so it is emptied in place
+        changed, removed = set(self._changed_towers), self._removed_towers
+        self._changed_towers.clear()
+        self._removed_towers = set()
+
+        return changed, removed
+
+    def _derive_path(self, layout_hash, get_neighbours, update, cell):
+        """Returns the path for a layout one tower away from the current layout
+
+        The path is taken from the path cache if possible, otherwise a copy of the
+        current path is updated incrementally & cached
+
+        Parameters:
+            layout_hash (int): The hash of the layout
+            get_neighbours (func<tuple<int, int>>): Yields the neighbours of a position in the layout
+            update (func<Path, tuple<int, int>>): Either Path.block or Path.unblock
+            cell (tuple<int, int>): The cell at which a tower was placed or removed
+
+        Returns:
+            Path: The path for the layout
+        """
+        path = self.path_cache.get(layout_hash)
+
+        if path is None:
+            path = self.path.copy()
+            path.get_neighbours = get_neighbours
+            update(path, cell)
+
+            self.path_cache.put(layout_hash, path)
+
+        return path
+
     def _step_obstacles(self):
         """Performs a single time step for all obstacles"""
+        missiles = []
         remaining_obstacles = []
         for obstacle in self.obstacles:
-            if obstacle.step():
+            if type(obstacle).step is Missile.step:
+                missiles.append(obstacle)
+            elif obstacle.step():
                 remaining_obstacles.append(obstacle)
+            elif hasattr(obstacle, 'reset'):
+                self.pools.release(obstacle)
+
+        # move every missile at once, retargeting those whose target has died
+        if missiles:
+            in_flight = Missile.step_all(missiles, find_target=self._find_missile_target)
+            if len(in_flight) != len(missiles):
+                flying = set(in_flight)
+                for missile in missiles:
+                    if missile not in flying:
+                        self.pools.release(missile)
+
+            remaining_obstacles.extend(in_flight)
 
         self.obstacles = remaining_obstacles
 
+    def _attack_area(self, tower):
+        """Attacks every enemy in range of a tower with an area of effect at once
+
+        Enemies are read from the buckets of the enemy index for the cells the tower's
+        range covers, so only enemies in those cells are tested against the range
+
+        Parameters:
+            tower (AbstractTower): The tower, whose area_of_effect is True
+        """
+        if not tower.is_ready():
+            return
+
+        enemies = self.enemies
+        store = self._enemies
+        xs, ys, healths = store.xs, store.ys, store.healths
+
+        cells = tower.get_range_cells()
+        candidates = range(len(enemies)) if cells is None else self._enemy_index.query_cells(cells)
+
+        # enemies killed earlier in the step stay in play until the enemies are stepped
+        candidates = [i for i in candidates if healths[i] > 0]
+        if not candidates:
+            return
+
+        in_range = tower.are_positions_in_range([(xs[i], ys[i]) for i in candidates])
+        targets = [enemies[i] for i, is_in_range in zip(candidates, in_range) if is_in_range]
+        if targets:
+            obstacles = tower.attack_area(targets)
+
+            if obstacles:
+                self.obstacles.extend(obstacles)
+
+    def _find_missile_target(self, position):
+        """(AbstractEnemy) Returns the nearest live enemy to 'position', or None if there are none"""
+        store = self._enemies
+        index = self._enemy_index
+
+        # the index is rebuilt at most once per step, the first time a missile needs it
+        if self._missile_index_step != self._current_step:
+            index.rebuild(store.xs, store.ys)
+            self._missile_index_step = self._current_step
+
+        healths = store.healths
+        slot = index.nearest(position, store.xs, store.ys, accept=lambda i: healths[i] > 0)
+
+        return None if slot is None else store.units[slot]
+
     def _step_enemies(self):
         """Performs a single time step for all enemies"""
-        remaining_enemies = []
-        dead_enemies = []
-        escaped_enemies = []
-
-        for _, enemy in enumerate(self.enemies):
-            # remove dead enemies
-            if enemy.is_dead():
-                dead_enemies.append(enemy)
-                continue
-
-            # keep enemies who are still in bounds
-            if enemy.step(self.grid, self.path):
-                remaining_enemies.append(enemy)
-            else:
-                escaped_enemies.append(enemy)
+        # enemies which have left play can be reused once no obstacle targets them
+        leaving_enemies = []
+        if self._leaving_enemies:
+            targets = {getattr(obstacle, 'target', None) for obstacle in self.obstacles}
+            for enemy in self._leaving_enemies:
+                if enemy in targets:
+                    leaving_enemies.append(enemy)
+                else:
+                    self.pools.release(enemy)
+
+        # move every living enemy at once, removing the dead & those out of bounds
+        remaining_enemies, dead_enemies, escaped_enemies = self._enemies.step(self.grid, self.path)
+        self._leaving_enemies = leaving_enemies + dead_enemies + escaped_enemies
 
         # emit enemy events
         if len(escaped_enemies) > 0:
             self.emit("enemy_escape", escaped_enemies)
         self.emit("enemy_death", dead_enemies)
 
-        self.enemies = remaining_enemies
-        if len(remaining_enemies) == 0 and len(self._unspawned_enemies) == 0:
+        if len(remaining_enemies) == 0 and not self._unspawned_enemies:
             self.emit("cleared")
 
     def _step_towers(self):
         """Performs a single time step for all towers"""
+        enemies = self.enemies
+        xs, ys, healths = self._enemies.xs, self._enemies.ys, self._enemies.healths
+        index = self._enemy_index
+        index.rebuild(xs, ys)
+        progress = self._progress_index
+        progress.rebuild(xs, ys, self.path)
+
         # process tower abilities (attacks, etc.)
         for tower in self.towers.values():
             tower.step()
-            for enemy in self.enemies:
-                if tower.is_position_in_range(enemy.get_real_position()):
 
-                    # TODO: replace with generic
-                    obstacles = tower.attack(enemy)
+            if tower.area_of_effect:
+                self._attack_area(tower)
+                continue
 
-                    if obstacles:
-                        self.obstacles.extend(obstacles)
+            # only consider enemies in cells the tower's range could cover
+            box = tower.get_range_bounding_box()
+            if box is None:
+                candidates = range(len(enemies))
+            else:
+                candidates = index.query(*index.get_cells_in_box(*box))
 
-    def _spawn_enemies(self):
-        """Spawn all the enemies to be spawned in the current time-step"""
-        while len(self._unspawned_enemies):
-            # gather next enemy to be spawned
-            start_step, enemy = self._unspawned_enemies[-1]
+            # enemies killed earlier in the step stay in play until the enemies are stepped
+            candidates = [i for i in candidates if healths[i] > 0]
 
-            # ensure they are meant to be spawned in this step
-            if start_step <= self._current_step:
-                self._unspawned_enemies.pop()
+            in_range = tower.are_positions_in_range([(xs[i], ys[i]) for i in candidates])
+            candidates = [i for i, is_in_range in zip(candidates, in_range) if is_in_range]
 
-                # spawn enemy
-                position = self.grid.cell_to_pixel_centre(self.path.start)
+            # attack a single enemy, chosen by the tower's targeting policy
+            target = progress.select(tower.targeting, candidates, healths=healths, xs=xs, ys=ys,
+                                     position=tower.position)
+            if target is not None:
+                # TODO: replace with generic
+                obstacles = tower.attack(enemies[target])
 
-                enemy.position = position
-                self.enemies.append(enemy)
-            else:
-                break
+                if obstacles:
+                    self.obstacles.extend(obstacles)
+
+    def _spawn_enemies(self):
+        """Spawn all the enemies to be spawned in the current time-step"""
+        position = self.grid.cell_to_pixel_centre(self.path.start)
+
+        for enemy in self._unspawned_enemies.pop(self._current_step):
+            enemy.position = position
+            self._enemies.add(enemy)
 
     def step(self):
         """Performs a single time step of the game
@@ -299,39 +554,102 @@ class TowerGame(EventEmitter):
         self._current_step += 1
 
         if self._current_step % 2 == 0:
-            # perform all step actions
-            self._step_obstacles()
-            self._step_enemies()
-            self._step_towers()
-            self._spawn_enemies()
+            if self.profiler is not None or self.recorder is not None or self.phase_hook is not None:
+                self._step_observed()
+            else:
+                # perform all step actions
+                self._step_obstacles()
+                self._step_enemies()
+                self._step_towers()
+                self._spawn_enemies()
+
+        return bool(self._unspawned_enemies) or len(self.enemies) > 0
+
+    def _step_observed(self):
+        """Performs all step actions, tracking the current phase, calling the phase
+        hook after each, & recording the duration of each with the profiler"""
+        clock = time.perf_counter
+        durations = []
+
+        for phase, action in enumerate((self._step_obstacles, self._step_enemies,
+                                        self._step_towers, self._spawn_enemies), 1):
+            self.phase = phase
+            start = clock()
+            action()
+            durations.append(clock() - start)
+
+            if self.phase_hook is not None:
+                self.phase_hook(phase)
+
+        self.phase = 0
+
+        if self.profiler is not None:
+            self.profiler.record(durations, (len(self._enemies), len(self.towers), len(self.obstacles),
+                                             self._unspawned_enemies.wave_count()))
+
+    def enable_instrumentation(self, capacity=DEFAULT_CAPACITY):
+        """Starts recording per-phase timings & entity counts for each step
+
+        Parameters:
+            capacity (int): The number of recent steps to keep
+
+        Returns:
+            StepProfiler: The profiler recording each step
+        """
+        self.profiler = StepProfiler(capacity)
+        return self.profiler
 
-        return len(self._unspawned_enemies) or len(self.enemies)
+    def disable_instrumentation(self):
+        """Stops recording step timings"""
+        self.profiler = None
 
     def reset(self):
+        if self.recorder is not None:
+            self.recorder.record_reset(self._current_step)
+
+        for tower in self.towers.values():
+            self._forget_tower(tower)
         self.towers = {}
-        self._unspawned_enemies = []
+
+        self._layout_hash = 0
+        self.path = self.path_cache.get(self._layout_hash)
+        if self.path is None:
+            self.path = self.generate_path()
+            self.path_cache.put(self._layout_hash, self.path)
+
+        self._unspawned_enemies.clear()
 
     def queue_wave(self, wave, clear=False):
         """Queues a wave of enemies to spawn into the game
 
         Parameters:
-            wave (iter<tuple<int, AbstractEnemy>>):
+            wave (iter<tuple<int, AbstractEnemy|callable>>):
                 The wave of enemies to spawn
                 A list of tuples for each enemy to spawn
                 The first tuple element is the step number to spawn the enemy
-                The second tuple element is the enemy object
+                The second tuple element is the enemy object, or a function which
+                creates it when it spawns (see SpawnQueue)
+                Iterables other than lists must be sorted by step, & are consumed
+                lazily as the wave spawns
             clear (bool): Clears existing wave, iff True
         """
-        wave = [(step + self._current_step, enemy) for step, enemy in wave]
-
-        if not clear:
-            wave += self._unspawned_enemies
+        if self.recorder is not None:
+            wave = list(wave)
+            self.recorder.record_queue_wave(self._current_step, wave, clear)
 
-        self._unspawned_enemies = sorted(wave, key=lambda x: x[0], reverse=True)
+        self._queue_wave(wave, clear=clear)
 
+    def _queue_wave(self, wave, clear=False):
+        """Queues a wave of enemies to spawn into the game, without recording it"""
         if clear:
+            self._unspawned_enemies.clear()
+
+            # return the enemies in play to their pools once no obstacle targets them
+            self._leaving_enemies.extend(self.enemies)
             self.enemies = []
 
+        self._unspawned_enemies.push(wave, offset=self._current_step)
+
     def send_wave(self, clear=False, enemies=20, steps=200):
         """Send a wave of randomly generated enemies
         
@@ -340,32 +658,262 @@ class TowerGame(EventEmitter):
             enemies (int): The number of enemies to generate
             steps (int): The number of steps over which to generate the enemies
         """
-        print(enemies, steps)
+        if self.recorder is not None:
+            self.recorder.record_send_wave(self._current_step, clear, enemies, steps)
+
         offset = self._current_step + 1
 
         wave = []
 
         # randomly generate enemies and their start steps
         for _ in range(enemies):
-            step = int(offset + steps - random.triangular(0, steps, 0))
-            wave.append((step, SimpleEnemy(self.grid.cell_size)))
+            step = int(offset + steps - self.rng.triangular(0, steps, 0))
+            wave.append((step, SimpleEnemy))
+
+        self._queue_wave(wave, clear=clear)
+
+    def snapshot(self):
+        """Captures the full state of the game
+
+        Returns:
+            bytes: A compact binary snapshot, which can be restored into any game
+                   with the same grid
+
+        Raises:
+            TypeError if an obstacle, or an enemy waiting to spawn, can't be stored
+            ValueError if a unit's type is not registered in snapshot.py
+        """
+        enemies = self.enemies
+        slots = {enemy: slot for slot, enemy in enumerate(enemies)}
+
+        towers = []
+        for cell, tower in self.towers.items():
+            cool_down = tower.cool_down.current if tower.cool_down_steps != 0 else 0
+            towers.append((cell, type(tower), tower.level, getattr(tower, 'rotation', 0.), cool_down))
+
+        obstacles = []
+        targets = []
+        for obstacle in self.obstacles:
+            if not isinstance(obstacle, Missile):
+                raise TypeError(f"Unable to snapshot obstacle {obstacle}")
+
+            target = slots.get(obstacle.target)
+            if target is None:
+                # not in play, so store it separately
+                targets.append(self._get_enemy_state(obstacle.target))
+                target = -len(targets)
+
+            x, y = obstacle.position
+            obstacles.append((type(obstacle), x, y, obstacle.rotation, target))
+
+        return snapshot.pack(snapshot.GameState(
+            size=self.grid.cells,
+            cell_size=self.grid.cell_size,
+            step=self._current_step,
+            rng_state=self.rng.getstate(),
+            towers=towers,
+            enemies=[self._get_enemy_state(enemy) for enemy in enemies],
+            unspawned=[(step,) + self._get_unspawned_state(enemy)
+                       for step, enemy in self._unspawned_enemies.pending()],
+            obstacles=obstacles,
+            targets=targets,
+        ))
+
+    def state_hash(self):
+        """(str) Returns a hash of the full state of the game, as a hex digest"""
+        return hashlib.sha256(self.snapshot()).hexdigest()
+
+    @staticmethod
+    def _get_enemy_state(enemy):
+        """(tuple) Returns the (type, x, y, health) of an enemy"""
+        x, y = enemy.position
+        return type(enemy), x, y, enemy.health
+
+    @staticmethod
+    def _get_unspawned_state(enemy):
+        """Returns the (type, health) of an enemy waiting to spawn, without creating it
+        from its class
+
+        Parameters:
+            enemy (AbstractEnemy|type): The enemy, or its class
+
+        Raises:
+            TypeError if 'enemy' is any other function, as what it creates can't be stored
+        """
+        if isinstance(enemy, type):
+            return enemy, enemy.max_health
+        if isinstance(enemy, AbstractEnemy):
+            return type(enemy), enemy.health
+
+        raise TypeError(f"Unable to snapshot enemy factory {enemy!r}")
+
+    def restore(self, data):
+        """Replaces the state of the game with a snapshot
+
+        Event listeners & the path cache are kept
+
+        Parameters:
+            data (bytes): A snapshot, as returned by snapshot
 
-        self.queue_wave(wave, clear=clear)
+        Raises:
+            ValueError if 'data' is not a valid snapshot of a game with the same grid
+        """
+        state = snapshot.unpack(data)
+
+        if state.size != self.grid.cells or state.cell_size != self.grid.cell_size:
+            raise ValueError(f"Snapshot of a {state.size} grid of {state.cell_size}px cells cannot be "
+                             f"restored into a {self.grid.cells} grid of {self.grid.cell_size}px cells")
+
+        cell_size = self.grid.cell_size
+        pools = self.pools
+
+        def make_enemy(type_, x, y, health):
+            enemy = pools.get(type_).acquire(cell_size)
+            enemy.position = x, y
+            enemy.health = health
+            return enemy
+
+        # towers, & the path for their layout
+        for tower in self.towers.values():
+            self._forget_tower(tower)
+        self.towers = {}
+        self._layout_hash = 0
+
+        for cell, type_, level, rotation, cool_down in state.towers:
+            tower = type_(cell_size, level=level)
+            tower.position = self.grid.cell_to_pixel_centre(cell)
+            if hasattr(tower, 'rotation'):
+                tower.rotation = rotation
+            if tower.cool_down_steps != 0:
+                tower.cool_down.current = cool_down
+
+            self._track_tower(tower)
+            tower.pools = pools
+
+            self.towers[cell] = tower
+            self._layout_hash ^= self._zobrist_keys[cell]
+
+        self.path = self.path_cache.get(self._layout_hash)
+        if self.path is None:
+            self.path = self.generate_path()
+            self.path_cache.put(self._layout_hash, self.path)
+
+        # return the units being replaced to their pools
+        replaced = self.enemies + self._leaving_enemies
+        self.enemies = []
+        for enemy in replaced:
+            pools.release(enemy)
+        for obstacle in self.obstacles:
+            if hasattr(obstacle, 'reset'):
+                pools.release(obstacle)
+
+        # units
+        self.enemies = enemies = [make_enemy(*enemy) for enemy in state.enemies]
+        self._unspawned_enemies = SpawnQueue(cell_size, pools)
+        # enemies at full health are created from their class as they spawn, & others
+        # are kept out of the pools until then, as the queue never releases them
+        unspawned = []
+        for step, type_, health in state.unspawned:
+            enemy = type_
+            if health != type_.max_health:
+                enemy = type_(cell_size)
+                enemy.health = health
+            unspawned.append((step, enemy))
+        self._unspawned_enemies.push(unspawned)
+
+        # targets not in play are returned to their pools once no obstacle targets them
+        self._leaving_enemies = targets = [make_enemy(*target) for target in state.targets]
+        self.obstacles = obstacles = []
+        for type_, x, y, rotation, target in state.obstacles:
+            obstacle = pools.get(type_).acquire(cell_size, enemies[target] if target >= 0 else targets[-1 - target],
+                                                rotation=rotation)
+            obstacle.position = x, y
+            obstacles.append(obstacle)
+
+        # indices of the replaced enemies
+        self._enemy_index.clear()
+        self._missile_index_step = None
+
+        self._current_step = state.step
+        self.rng.setstate(state.rng_state)
+
+    def blocking_cells(self):
+        """Returns every free cell which would block the enemies' path if a tower were placed in it
+
+        These are the cut vertices separating the start from the end, found once per
+        tower layout, so that any cell's legality is a set lookup
+
+        Returns:
+            frozenset<tuple<int, int>>: The blocking cells
+        """
+        if self._blocking_path is not self.path:
+            self._blocking_cells = self._find_blocking_cells()
+            self._blocking_path = self.path
+
+        return self._blocking_cells
+
+    def _find_blocking_cells(self):
+        """Finds the cut vertices separating the start from the end, by depth-first search
+        from the start, tracking the lowest discovery time reachable from each subtree
+
+        Returns:
+            frozenset<tuple<int, int>>: The blocking cells
+        """
+        get_neighbours = self.path.get_neighbours
+        start, end = self.path.start, self.path.end
+
+        discovered = {start: 0}
+        lowest = {start: 0}
+        blocking = set()
+
+        stack = [(start, None, get_neighbours(start))]
+        while stack:
+            cell, parent, neighbours = stack[-1]
+
+            for neighbour in neighbours:
+                if neighbour not in discovered:
+                    discovered[neighbour] = lowest[neighbour] = len(discovered)
+                    stack.append((neighbour, cell, get_neighbours(neighbour)))
+                    break
+
+                if neighbour != parent:
+                    lowest[cell] = min(lowest[cell], discovered[neighbour])
+            else:
+                stack.pop()
+                if parent is None:
+                    continue
+
+                lowest[parent] = min(lowest[parent], lowest[cell])
+
+                # parent separates start from end iff this subtree can't reach above parent
+                # & contains the end (subtrees are discovered contiguously)
+                if parent != start and lowest[cell] >= discovered[parent] \
+                        and discovered[cell] <= discovered.get(end, -1) < len(discovered):
+                    blocking.add(parent)
+
+        return frozenset(blocking)
 
-    # TODO: comment
     def attempt_placement(self, position):
+        """Determines whether a tower can be placed at a pixel position, & the path enemies would take
+
+        Parameters:
+            position (tuple<int, int>): The pixel position at which to place the tower
+
+        Returns:
+            tuple<bool, Path>: True iff the tower can be placed, and the path enemies would
+                               take if it were (or the current path if it cannot be)
+        """
         # convert mouse position to grid coordinates
         grid_position = self.grid.pixel_to_cell(position)
 
-        # make a path and determine whether it is possible
-        try:
-            path = self.generate_path(grid_position)
-            legal = True
-        except KeyError:
-            path = self.path
-            legal = False
+        legal = grid_position not in self.towers and grid_position not in self.blocking_cells()
+
+        if not legal or not self.grid.is_cell_valid(grid_position):
+            return legal, self.path
 
-        if grid_position in self.towers:
-            legal = False
+        # find the path as if the tower were placed
+        layout_hash = self._layout_hash ^ self._zobrist_keys[grid_position]
+        path = self._derive_path(layout_hash, self._make_get_neighbours(grid_position), Path.block,
+                                 grid_position)
 
         return legal, path
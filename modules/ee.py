@@ -31,7 +31,7 @@ class EventEmitter(object):
 
     def __init__(self, **kwargs):
         """ EventEmitter(wildcard=False, delimiter=".", new_listener=False,
-                         max_listeners=-1)
+                         max_listeners=-1, deferred=False)
         The EventEmitter class.
         Please always use *kwargs* in the constructor.
         - *wildcard*: When *True*, wildcards are used.
@@ -40,6 +40,8 @@ class EventEmitter(object):
           time a new listener is registered with arguments *(func, event=None)*.
         - *max_listeners*: Maximum number of listeners per event. Negativ values
           mean infinity.
+        - *deferred*: When *True*, emitted events are buffered until *flush* is
+          called. See *defer*.
         """
         super(EventEmitter, self).__init__()
 
@@ -47,9 +49,20 @@ class EventEmitter(object):
         self.__delimiter   = kwargs.get("delimiter", ".")
         self.new_listener  = kwargs.get("new_listener", False)
         self.max_listeners = kwargs.get("max_listeners", -1)
+        self.deferred      = kwargs.get("deferred", False)
 
         self.__tree = self.__new_branch()
 
+        # resolved listeners per emitted event, ordered for invocation
+        self.__dispatch = {}
+
+        # deferred (event, args, kwargs) in the order they were first emitted,
+        # the index of the pending emit of each event into which later emits
+        # are merged, and argument mergers
+        self.__pending = []
+        self.__merge_into = {}
+        self.__mergers = {}
+
     @property
     def delimiter(self):
         """
@@ -89,8 +102,13 @@ class EventEmitter(object):
         """
         Removes a listener given by its function from a branch.
         """
-        listeners = branch[cls.__CBKEY]
+        cls.__remove_func(branch[cls.__CBKEY], func)
 
+    @staticmethod
+    def __remove_func(listeners, func):
+        """
+        Removes a listener given by its function from a list of listeners.
+        """
         indexes = [i for i, l in enumerate(listeners) if l.func == func]
         indexes.reverse()
 
@@ -122,7 +140,9 @@ class EventEmitter(object):
                 return func
 
             listener = Listener(func, event, ttl)
+            listener.owner = listeners
             listeners.append(listener)
+            self.__dispatch.clear()
 
             if self.new_listener:
                 self.emit("new_listener", func, event)
@@ -160,7 +180,9 @@ class EventEmitter(object):
                 return func
 
             listener = Listener(func, None, -1)
+            listener.owner = listeners
             listeners.append(listener)
+            self.__dispatch.clear()
 
             if self.new_listener:
                 self.emit("new_listener", func)
@@ -183,6 +205,7 @@ class EventEmitter(object):
                 return func
 
             self.__remove_listener(branch, func)
+            self.__dispatch.clear()
 
             return func
 
@@ -198,6 +221,7 @@ class EventEmitter(object):
         """
         def _off_any(func):
             self.__remove_listener(self.__tree, func)
+            self.__dispatch.clear()
 
             return func
 
@@ -212,6 +236,7 @@ class EventEmitter(object):
         """
         del self.__tree
         self.__tree = self.__new_branch()
+        self.__dispatch.clear()
 
     def listeners(self, event):
         """
@@ -251,12 +276,139 @@ class EventEmitter(object):
         """
         Emits an event. All functions of events that match *event* are invoked
         with *args* and *kwargs* in the exact order of their registration.
-        Wildcards might be applied.
+        Wildcards might be applied. When deferred, the event is buffered until
+        the next *flush* instead.
+        """
+        if self.deferred:
+            self.__defer(event, args, kwargs)
+        else:
+            self.__emit(event, args, kwargs)
+
+    def defer(self, deferred=True):
+        """
+        Enables or disables deferred dispatch. While deferred, emitted events
+        are buffered until *flush* is called, and all emits of an event are
+        merged into its first pending emit (see *merge*). Disabling flushes any
+        pending events.
+        """
+        self.deferred = deferred
+
+        if not deferred:
+            self.flush()
+
+    def merge(self, event, func=None):
+        """
+        Registers a function that merges the arguments of two deferred emits of
+        an event, called as *func(args, new_args)* and returning the merged
+        *args*. When *func* is *None*, decorator usage is assumed. Returns the
+        function.
+        Without a registered function, emits without arguments are coalesced
+        and emits whose arguments are all lists are concatenated item-wise.
+        """
+        def _merge(func):
+            self.__mergers[event] = func
+
+            return func
+
+        if func is not None:
+            return _merge(func)
+        else:
+            return _merge
+
+    def flush(self):
+        """
+        Emits all deferred events, once per merged event, in the order each
+        was first emitted. Events emitted by listeners during the flush are
+        buffered until the next flush. Returns the number of events emitted.
+        """
+        pending = self.__pending
+        if not pending:
+            return 0
+
+        self.__pending = []
+        self.__merge_into = {}
+
+        for event, args, kwargs in pending:
+            self.__emit(event, args, kwargs)
+
+        return len(pending)
+
+    def pending(self):
+        """
+        Returns the names of all deferred events awaiting a flush, in the
+        order they will be emitted.
+        """
+        return [event for event, _, _ in self.__pending]
+
+    def __defer(self, event, args, kwargs):
+        """
+        Buffers an event, merging it into the pending emit of the same event
+        when they can be merged, so that each event is delivered once per
+        flush, in the order it was first emitted. Emits with *kwargs* are
+        never merged.
+        """
+        pending = self.__pending
+
+        if not kwargs:
+            index = self.__merge_into.get(event)
+
+            if index is not None:
+                merged = self.__merge_args(event, pending[index][1], args)
+
+                if merged is not None:
+                    pending[index] = (event, tuple(merged), kwargs)
+                    return
+
+            # later emits merge into this one
+            self.__merge_into[event] = len(pending)
+
+        pending.append((event, args, kwargs))
+
+    def __merge_args(self, event, args, new_args):
+        """
+        Returns the merged arguments of two emits of an event, or *None* if
+        they cannot be merged.
+        """
+        merger = self.__mergers.get(event)
+        if merger is not None:
+            return merger(args, new_args)
+
+        if len(args) != len(new_args):
+            return None
+
+        if not all(isinstance(a, list) for a in args + new_args):
+            return None
+
+        return [a + b for a, b in zip(args, new_args)]
+
+    def __emit(self, event, args, kwargs):
+        """
+        Invokes all listeners of events that match *event*.
+        """
+        listeners = self.__dispatch.get(event)
+        if listeners is None:
+            listeners = self.__dispatch[event] = self.__resolve(event)
+
+        if not listeners:
+            return
+
+        remove = [l for l in listeners if not l(*args, **kwargs)]
+
+        if remove:
+            # remove expired listeners directly from the branches that own them
+            for l in remove:
+                self.__remove_func(l.owner, l.func)
+            self.__dispatch.clear()
+
+    def __resolve(self, event):
+        """
+        Returns a tuple of all listeners of events that match *event*, in the
+        order in which they are invoked. Wildcards might be applied.
         """
         parts = event.split(self.delimiter)
 
         if self.__CBKEY in parts:
-            return
+            return ()
 
         listeners = self.__tree[self.__CBKEY][:]
 
@@ -280,14 +432,13 @@ class EventEmitter(object):
 
         listeners.sort(key=lambda l: l.time)
 
-        remove = [l for l in listeners if not l(*args, **kwargs)]
-
-        for l in remove:
-            self.off(l.event, func=l.func)
+        return tuple(listeners)
 
 
 class Listener(object):
 
+    __slots__ = ('func', 'event', 'ttl', 'owner', 'time')
+
     def __init__(self, func, event, ttl):
         """
         The Listener class.
@@ -299,6 +450,7 @@ class Listener(object):
         self.func  = func
         self.event = event
         self.ttl   = ttl
+        self.owner = None
 
         self.time = time()
 
@@ -80,10 +80,14 @@ class WeightedSelector:
         total = cumsum[-1]
         self._p_values = [i / total for i in cumsum]
 
-    def choose(self):
-        """(*) Returns a random choice"""
+    def choose(self, rng=random):
+        """(*) Returns a random choice
 
-        i = bisect.bisect(self._p_values, random.random())
+        Parameters:
+            rng (random.Random): The random number generator to choose with
+        """
+
+        i = bisect.bisect(self._p_values, rng.random())
         return self._values[i]
 
     def clone(self):
@@ -1,24 +1,51 @@
+import heapq
+from array import array
+from collections import OrderedDict
 from queue import Queue
 
+from modules.matrix import AXIAL_DELTAS, DIAGONAL_DELTAS
+
 __author__ = "Benjamin Martin and Brae Webb"
 __copyright__ = "Copyright 2018, The University of Queensland"
 __license__ = "MIT"
 __version__ = "1.0.0"
 
+# Deltas which can be encoded in a flow field, indexed by direction code
+FLOW_DIRECTIONS = AXIAL_DELTAS + DIAGONAL_DELTAS
+FLOW_CODES = {delta: code for code, delta in enumerate(FLOW_DIRECTIONS)}
+NO_DIRECTION = -1
+
 
 class Path:
     """A path from a start point to an end point.
 
     Used to generate shortest routes between two points.
 
+    Once generated, a path can be updated incrementally when a single cell is
+    blocked or unblocked, which only recomputes the distances that change.
+    Incremental updates assume neighbours are symmetric, i.e. b is a neighbour
+    of a iff a is a neighbour of b.
+
+    The best route is stored as a flow field: a dense grid holding the code (an
+    index into FLOW_DIRECTIONS) of the direction to follow from each cell, or
+    NO_DIRECTION, alongside a grid of each cell's distance from the end point.
+    Both grids are indexed by get_index((column, row)).
+
     Attributes:
         start (tuple<int, int>): The starting point
         end (tuple<int, int>): The ending point
-        deltas (dict<tuple<int, int>: tuple<int, int>>): A map of the
-                                                                  best path to follow
+        bounds (tuple<tuple<int, int>, tuple<int, int>>): The first & last (column, row)
+                                                          cells covered by the grids
+        columns (int): The number of columns covered by the grids
+        rows (int): The number of rows covered by the grids
+        flow (array<int>): The direction code to follow from each cell
+        flow_masks (array<int>): Bit masks of the codes of every best direction from each cell
+        distance_grid (array<int>): The distance from each cell to the end point, or -1
+        distances (dict<tuple<int, int>: int>): A map of positions to their
+                                                distance from the end point
     """
 
-    def __init__(self, start, end, get_neighbours):
+    def __init__(self, start, end, get_neighbours, bounds=None):
         """Initialize a path from a starting point to a finishing point
 
         Parameters:
@@ -27,10 +54,14 @@ class Path:
             get_neighbours (func<tuple<int, int>>): A function which takes a
                                                     position and returns the
                                                     neighbours
+            bounds (tuple<tuple<int, int>, tuple<int, int>>):
+                The first & last (column, row) cells the path may cover, if known;
+                the grids are grown to fit whenever the path leaves these bounds
         """
         self.start = start
         self.end = end
         self.get_neighbours = get_neighbours
+        self.bounds = bounds
 
         self._generate()
 
@@ -56,38 +87,94 @@ class Path:
 
         return distances
 
-    def _generate_best_neighbours(self, distances):
-        """Calculate the best route based on a distance mapping
+    def _find_best_deltas(self, from_, distances):
+        """Calculate the deltas toward the neighbours of a position which are closest to the end point
 
         Parameters:
+            from_ (tuple<int, int>): The position to calculate for
             distances (dict<tuple<int, int>: int>): A map of positions to
                                                     distances from end point
 
         Returns:
-            dict<tuple<int, int>: tuple<int, int>>: A map of the best path to follow
+            set<tuple<int, int>>: The delta to each of the best neighbours
         """
-        best_neighbours = {}
+        neighbours_by_distance = []
+        for to in self.get_neighbours(from_, from_=True):
+            neighbours_by_distance.append((distances[to], to))
 
-        # Calculate best neighbours
-        for from_ in distances:
-            neighbours_by_distance = []
-            for to in self.get_neighbours(from_, from_=True):
-                neighbours_by_distance.append((distances[to], to))
+        neighbours_by_distance.sort(key=lambda x: x[0])
+
+        best_distance = neighbours_by_distance[0][0]
+        best_deltas = set()
+        for distance, neighbour in neighbours_by_distance:
+            if distance == best_distance:
+                delta = tuple(a - b for a, b in zip(neighbour, from_))
+                best_deltas.add(delta)
 
-            neighbours_by_distance.sort(key=lambda x: x[0])
+        return best_deltas
 
-            best_distance = neighbours_by_distance[0][0]
-            best_deltas = set()
-            for distance, neighbour in neighbours_by_distance:
-                if distance == best_distance:
-                    delta = tuple(a - b for a, b in zip(neighbour, from_))
-                    best_deltas.add(delta)
+    def _set_best_deltas(self, index, best_deltas):
+        """Encode the best deltas from the cell at 'index'
 
-            best_neighbours[from_] = best_deltas
+        Parameters:
+            index (int): The index of the cell in the grids
+            best_deltas (set<tuple<int, int>>): The deltas toward each best neighbour, or
+                                                an empty set if the cell has none
+        """
+        mask = 0
+        for delta in best_deltas:
+            mask |= 1 << FLOW_CODES[delta]
 
-        del best_neighbours[self.end]
+        self._best_masks[index] = mask
+        self._best_codes[index] = FLOW_CODES[next(iter(best_deltas))] if best_deltas else NO_DIRECTION
 
-        return best_neighbours
+    def _find_best_path(self):
+        """Find the best sequence of (position, delta) pairs from start to finish,
+        according to the best neighbours
+
+        The final pair is the end point, with the same delta as the pair before it
+
+        Returns:
+            list<tuple<tuple<int, int>, tuple<int, int>>>: The best path
+        """
+        best_path = []
+        best = self.start
+        previous = None
+
+        while best != self.end:
+            index = self.get_index(best)
+
+            code = FLOW_CODES.get(previous, NO_DIRECTION)
+            if code == NO_DIRECTION or not self._best_masks[index] >> code & 1:
+                code = self._best_codes[index]
+
+            delta = FLOW_DIRECTIONS[code]
+
+            best_path.append((best, delta))
+            previous = delta
+            best = tuple(a + b for a, b in zip(best, delta))
+
+        best_path.append((best, previous))
+
+        return best_path
+
+    def _update_best_path(self):
+        """Overwrites the deltas along the best path with the single delta to follow"""
+        # restore the deltas along the previous best path
+        for best, _ in self._best_path:
+            index = self.get_index(best)
+            self.flow[index] = self._best_codes[index]
+            self.flow_masks[index] = self._best_masks[index]
+
+        self._best_path = self._find_best_path()
+
+        for best, delta in self._best_path:
+            index = self.get_index(best)
+            code = FLOW_CODES[delta]
+            self.flow[index] = code
+            self.flow_masks[index] = 1 << code
+
+        self._deltas = None
 
     def _generate(self):
         """Calculate the best path to travel through the path"""
@@ -97,18 +184,237 @@ class Path:
         if self.start not in distances:
             raise KeyError("Cannot reach end from start")
 
-        self.deltas = self._generate_best_neighbours(distances)
+        self.distances = distances
+        self._build_grids()
+
+    def _build_grids(self):
+        """Allocate the grids to fit the distance map, & calculate the best route"""
+        distances = self.distances
+
+        # grow the bounds to fit every reachable position
+        columns = [column for column, _ in distances]
+        rows = [row for _, row in distances]
+        if self.bounds is not None:
+            (first_column, first_row), (last_column, last_row) = self.bounds
+            columns.extend((first_column, last_column))
+            rows.extend((first_row, last_row))
 
-        # overwrite bests on path
-        best_path = list(self.get_best_path())
+        self.bounds = (min(columns), min(rows)), (max(columns), max(rows))
+        self.columns = max(columns) - min(columns) + 1
+        self.rows = max(rows) - min(rows) + 1
+
+        size = self.columns * self.rows
+        self.distance_grid = array('l', [-1]) * size
+        self._best_masks = array('B', bytes(size))
+        self._best_codes = array('b', [NO_DIRECTION]) * size
+
+        # Calculate best neighbours
+        for cell, distance in distances.items():
+            index = self.get_index(cell)
+            self.distance_grid[index] = distance
+
+            if cell != self.end:
+                self._set_best_deltas(index, self._find_best_deltas(cell, distances))
+
+        self.flow = array('b', self._best_codes)
+        self.flow_masks = array('B', self._best_masks)
+
+        self._best_path = []
+        self._update_best_path()
+
+    def _update_best_neighbours(self, changed):
+        """Recalculate the best neighbours around cells whose distances have changed
+
+        Parameters:
+            changed (set<tuple<int, int>>): The cells whose distances have changed
+        """
+        distances = self.distances
+
+        if any(self.get_index(cell) is None for cell in changed):
+            self._build_grids()
+            return
+
+        affected = set(changed)
+        for cell in changed:
+            self.distance_grid[self.get_index(cell)] = distances.get(cell, -1)
+            affected.update(self.get_neighbours(cell, from_=True))
+
+        affected.discard(self.end)
+
+        for cell in affected:
+            index = self.get_index(cell)
+            if index is None:
+                continue
+
+            self._set_best_deltas(index, self._find_best_deltas(cell, distances) if cell in distances else ())
+            self.flow[index] = self._best_codes[index]
+            self.flow_masks[index] = self._best_masks[index]
+
+        self._update_best_path()
+
+    def block(self, cell):
+        """Updates this path after 'cell' has been removed from the graph,
+        i.e. get_neighbours no longer yields 'cell'
+
+        Only the distances of cells whose shortest route passed through 'cell'
+        are recalculated
+
+        Parameters:
+            cell (tuple<int, int>): The cell that was blocked
+
+        Raises:
+            KeyError if the end can no longer be reached from the start, in which
+            case this path is left unchanged
+        """
+        distances = self.distances
+        if cell not in distances:
+            return
+
+        # find cells which can no longer reach the end through an equally short route
+        orphans = {cell}
+        boundary = Queue()
+        boundary.put(cell)
+
+        while not boundary.empty():
+            parent = boundary.get()
+
+            for child in self.get_neighbours(parent, from_=False):
+                if child in orphans or distances.get(child) != distances[parent] + 1:
+                    continue
+
+                # child is only orphaned if all of its closest neighbours are orphaned
+                if all(neighbour in orphans or distances[neighbour] != distances[child] - 1
+                       for neighbour in self.get_neighbours(child, from_=True)):
+                    orphans.add(child)
+                    boundary.put(child)
+
+        previous = {orphan: distances.pop(orphan) for orphan in orphans}
+
+        # re-attach orphans through their remaining neighbours, closest first
+        boundary = []
+        for orphan in orphans:
+            if orphan == cell:
+                continue
+            for neighbour in self.get_neighbours(orphan, from_=True):
+                if neighbour in distances:
+                    heapq.heappush(boundary, (distances[neighbour] + 1, orphan))
+
+        while boundary:
+            distance, orphan = heapq.heappop(boundary)
+            if orphan in distances:
+                continue
+
+            distances[orphan] = distance
+            for neighbour in self.get_neighbours(orphan, from_=False):
+                if neighbour in orphans and neighbour != cell and neighbour not in distances:
+                    heapq.heappush(boundary, (distance + 1, neighbour))
+
+        if self.start not in distances:
+            for orphan in orphans:
+                distances.pop(orphan, None)
+            distances.update(previous)
+            raise KeyError("Cannot reach end from start")
 
-        best_path[-1] = best_path[-1][0], best_path[-2][1]
+        changed = {orphan for orphan, distance in previous.items()
+                   if distances.get(orphan) != distance}
+        self._update_best_neighbours(changed)
 
-        # for cell in self.deltas:
-        #     self.deltas[cell] = {self.deltas[cell].pop()}
+    def unblock(self, cell):
+        """Updates this path after 'cell' has been added to the graph,
+        i.e. get_neighbours now yields 'cell'
 
-        for best, delta in best_path:
-            self.deltas[best] = {delta}
+        Only the distances of cells which gain a shorter route through 'cell'
+        are recalculated
+
+        Parameters:
+            cell (tuple<int, int>): The cell that was unblocked
+        """
+        distances = self.distances
+
+        reachable = [distances[neighbour] for neighbour in self.get_neighbours(cell, from_=True)
+                     if neighbour in distances]
+        if not reachable or cell in distances:
+            return
+
+        distances[cell] = min(reachable) + 1
+        changed = {cell}
+
+        boundary = Queue()
+        boundary.put(cell)
+
+        while not boundary.empty():
+            to = boundary.get()
+
+            for from_ in self.get_neighbours(to, from_=False):
+                if from_ not in distances or distances[from_] > distances[to] + 1:
+                    distances[from_] = distances[to] + 1
+                    changed.add(from_)
+                    boundary.put(from_)
+
+        self._update_best_neighbours(changed)
+
+    def copy(self):
+        """(Path) Returns a copy of this path, which can be updated independently"""
+        path = Path.__new__(Path)
+
+        path.start = self.start
+        path.end = self.end
+        path.get_neighbours = self.get_neighbours
+        path.bounds = self.bounds
+        path.columns = self.columns
+        path.rows = self.rows
+
+        path.distances = dict(self.distances)
+        path.distance_grid = self.distance_grid[:]
+        path.flow = self.flow[:]
+        path.flow_masks = self.flow_masks[:]
+        path._best_masks = self._best_masks[:]
+        path._best_codes = self._best_codes[:]
+        path._best_path = list(self._best_path)
+
+        # the view is never mutated, only replaced
+        path._deltas = self._deltas
+
+        return path
+
+    def get_index(self, cell):
+        """(int) Returns the index of 'cell' in the flow field & distance grid,
+        or None if it is out of bounds"""
+        column, row = cell
+        (first_column, first_row), (last_column, last_row) = self.bounds
+
+        if first_column <= column <= last_column and first_row <= row <= last_row:
+            return column - first_column + (row - first_row) * self.columns
+
+        return None
+
+    @property
+    def deltas(self):
+        """(dict<tuple<int, int>: set<tuple<int, int>>>) A map of the best path to follow
+
+        Built lazily from the flow field, as a read-only compatibility view
+        """
+        if self._deltas is None:
+            (first_column, first_row), _ = self.bounds
+            columns = self.columns
+
+            deltas = {}
+            for index, code in enumerate(self.flow):
+                if code == NO_DIRECTION:
+                    continue
+
+                mask = self.flow_masks[index]
+                cell = first_column + index % columns, first_row + index // columns
+                deltas[cell] = {delta for code, delta in enumerate(FLOW_DIRECTIONS) if mask >> code & 1}
+
+            self._deltas = deltas
+
+        return self._deltas
+
+    def has_delta(self, cell):
+        """(bool) Returns True iff there is a delta to follow from 'cell'"""
+        index = self.get_index(cell)
+        return index is not None and self.flow[index] != NO_DIRECTION
 
     def get_best_path(self):
         best = self.start
@@ -146,6 +452,80 @@ class Path:
                 break
 
     def get_best_delta(self, cell, previous=None):
-        if previous and previous in self.deltas[cell]:
-            return previous
-        return next(iter(self.deltas[cell]))
+        """Returns the delta to follow from 'cell'
+
+        Parameters:
+            cell (tuple<int, int>): The cell to follow from
+            previous (tuple<int, int>): The previous delta followed, which is preferred
+                                        if it is one of the best deltas
+
+        Returns:
+            tuple<int, int>: The delta to follow
+
+        Raises:
+            KeyError if there is no delta to follow from 'cell'
+        """
+        index = self.get_index(cell)
+        code = NO_DIRECTION if index is None else self.flow[index]
+
+        if code == NO_DIRECTION:
+            raise KeyError(cell)
+
+        if previous:
+            previous_code = FLOW_CODES.get(previous, NO_DIRECTION)
+            if previous_code != NO_DIRECTION and self.flow_masks[index] >> previous_code & 1:
+                return previous
+
+        return FLOW_DIRECTIONS[code]
+
+
+class PathCache:
+    """A bounded cache of paths, keyed by a hash of the layout they were generated
+    for, which evicts the least recently used path once full
+
+    Cached paths must not be modified; copy them first
+    """
+
+    def __init__(self, capacity=64):
+        """Constructor
+
+        Parameters:
+            capacity (int): The maximum number of paths to keep
+        """
+        self.capacity = capacity
+        self.hits = 0
+        self.misses = 0
+
+        self._paths = OrderedDict()
+
+    def __len__(self):
+        return len(self._paths)
+
+    def get(self, key):
+        """(Path) Returns the path cached for 'key', or None if there is none"""
+        path = self._paths.get(key)
+
+        if path is None:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        self._paths.move_to_end(key)
+        return path
+
+    def put(self, key, path):
+        """Caches 'path' for 'key', evicting the least recently used path if full"""
+        self._paths[key] = path
+        self._paths.move_to_end(key)
+
+        while len(self._paths) > self.capacity:
+            self._paths.popitem(last=False)
+
+    def clear(self):
+        """Removes every cached path"""
+        self._paths.clear()
+
+    def hit_rate(self):
+        """(float) Returns the proportion of lookups which found a cached path"""
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.
@@ -0,0 +1,130 @@
+"""Pooled allocation of short-lived units, such as enemies & projectiles
+
+Units are released back to their class's pool once they leave play, & are
+reinitialised through their reset method when next acquired, rather than being
+constructed anew, which avoids allocation & garbage collection pauses in long
+games. Pooled classes must implement reset, taking the same arguments as their
+constructor
+
+Each game has its own pools, held by a PoolRegistry, so that games in the same
+process never share objects
+"""
+
+__license__ = "MIT"
+__version__ = "1.0.0"
+
+# The default number of released objects each pool keeps for reuse
+DEFAULT_MAX_FREE = 1024
+
+
+class ObjectPool:
+    """A free list of released objects of a class, reused before constructing more"""
+
+    def __init__(self, class_, max_free=DEFAULT_MAX_FREE):
+        """Constructor
+
+        Parameters:
+            class_ (type): The class of objects to pool, which must implement reset
+            max_free (int): The maximum number of released objects to keep for reuse,
+                            beyond which they are left to the garbage collector
+        """
+        self.class_ = class_
+        self.max_free = max_free
+        self._free = []
+
+        self.created = 0  # objects constructed
+        self.reused = 0  # objects reset from the free list
+        self.released = 0  # objects returned to the pool
+        self.discarded = 0  # returned objects dropped, as the free list was full
+        self.peak_in_use = 0  # most objects acquired & not yet released at once
+
+    def __len__(self):
+        """(int) Returns the number of objects available for reuse"""
+        return len(self._free)
+
+    @property
+    def in_use(self):
+        """(int) The number of objects acquired & not yet released"""
+        return self.created + self.reused - self.released
+
+    def acquire(self, *args, **kwargs):
+        """Returns an object, reusing a released one if possible
+
+        Parameters:
+            *args, **kwargs: Arguments to the class's constructor, or its reset method
+        """
+        if self._free:
+            obj = self._free.pop()
+            obj.reset(*args, **kwargs)
+            self.reused += 1
+        else:
+            obj = self.class_(*args, **kwargs)
+            self.created += 1
+
+        in_use = self.in_use
+        if in_use > self.peak_in_use:
+            self.peak_in_use = in_use
+
+        return obj
+
+    def release(self, obj):
+        """Returns an object which is no longer referenced to the pool for reuse"""
+        self.released += 1
+        if len(self._free) < self.max_free:
+            self._free.append(obj)
+        else:
+            self.discarded += 1
+
+    def release_all(self, objs):
+        """Returns each of 'objs' to the pool for reuse"""
+        for obj in objs:
+            self.release(obj)
+
+    def clear(self):
+        """Discards every object available for reuse"""
+        self._free = []
+
+    def get_stats(self):
+        """(dict<str, int>) Returns the pool's allocation statistics"""
+        return {
+            'created': self.created,
+            'reused': self.reused,
+            'released': self.released,
+            'discarded': self.discarded,
+            'free': len(self._free),
+            'in_use': self.in_use,
+            'peak_in_use': self.peak_in_use,
+        }
+
+
+class PoolRegistry:
+    """The pools of a single game, one for each class of object pooled"""
+
+    def __init__(self, max_free=DEFAULT_MAX_FREE):
+        """Constructor
+
+        Parameters:
+            max_free (int): The maximum number of released objects each pool keeps for reuse
+        """
+        self.max_free = max_free
+        self._pools = {}
+
+    def get(self, class_):
+        """(ObjectPool) Returns the pool for objects of exactly 'class_', creating it if necessary"""
+        pool = self._pools.get(class_)
+        if pool is None:
+            pool = self._pools[class_] = ObjectPool(class_, max_free=self.max_free)
+        return pool
+
+    def release(self, obj):
+        """Returns an object to the pool for its class"""
+        self.get(type(obj)).release(obj)
+
+    def clear(self):
+        """Discards every object available for reuse, from every pool"""
+        for pool in self._pools.values():
+            pool.clear()
+
+    def get_stats(self):
+        """(dict<str, dict<str, int>>) Returns the statistics of each pool, by class name"""
+        return {class_.__qualname__: pool.get_stats() for class_, pool in self._pools.items()}
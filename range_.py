@@ -1,6 +1,8 @@
 """Area ranges for towers in a Tower Defence game"""
 
-from utilities import vector_length
+import math
+
+from utilities import vector_length, inherit_docstrings
 
 __author__ = "Benjamin Martin"
 __copyright__ = "Copyright 2018, The University of Queensland"
@@ -8,13 +10,73 @@ __license__ = "MIT"
 __version__ = "1.0.0"
 
 
+def get_cells_in_rectangle(left, top, right, bottom, closed=True):
+    """Returns every cell overlapping a rectangle, in cell units
+
+    Parameters:
+        left, top, right, bottom (float): The edges of the rectangle
+        closed (bool): Whether points on the right & bottom edges are in the rectangle
+
+    Returns:
+        list<tuple<int, int>>: The (column, row) of each cell
+    """
+    if closed:
+        last_column, last_row = math.floor(right), math.floor(bottom)
+    else:
+        last_column, last_row = math.ceil(right) - 1, math.ceil(bottom) - 1
+    first_column, first_row = math.floor(left), math.floor(top)
+
+    return [(column, row) for column in range(first_column, last_column + 1)
+            for row in range(first_row, last_row + 1)]
+
+
 class AbstractRange:
     """Abstractly-shaped area range area"""
     def contains(self, point):
         """(bool) Returns True iff 'point' exists within this range (from origin)"""
         raise NotImplementedError("contains must be implemented by a subclass")
 
+    def contains_many(self, points):
+        """(list<bool>) Returns whether each of 'points' exists within this range (from origin)
+
+        Subclasses should override this with a faster equivalent to testing each point
+
+        Parameters:
+            points (sequence<tuple<num, num>>): The (x, y) points to test
+        """
+        return [self.contains(point) for point in points]
+
+    def get_bounding_box(self):
+        """Returns the axis-aligned bounding box of this range (from origin),
+        or None if it is unbounded or unknown
+
+        Returns:
+            tuple<tuple<num, num>, tuple<num, num>>: The top-left & bottom-right corners
+        """
+        return None
+
+    def get_cells(self, x, y):
+        """Rasterises this range to the cells it covers, when centred on a point
+
+        Every point within the range is in one of the cells, though the cells may
+        also hold points outside of it
+
+        Parameters:
+            x, y (float): The centre of the range, in cell units (pixels / cell size)
+
+        Returns:
+            list<tuple<int, int>>: The (column, row) of each cell, or None if the
+                                   range is unbounded or unknown
+        """
+        box = self.get_bounding_box()
+        if box is None:
+            return None
 
+        (left, top), (right, bottom) = box
+        return get_cells_in_rectangle(x + left, y + top, x + right, y + bottom)
+
+
+@inherit_docstrings
 class CircularRange(AbstractRange):
     """Circular-shaped area range"""
     def __init__(self, radius):
@@ -29,7 +91,16 @@ class CircularRange(AbstractRange):
         """(bool) Returns True iff 'point' exists within this range (from origin)"""
         return vector_length(point) <= self.radius
 
+    def contains_many(self, points):
+        radius = self.radius
+        return [(x ** 2 + y ** 2) ** .5 <= radius for x, y in points]
+
+    def get_bounding_box(self):
+        radius = self.radius
+        return (-radius, -radius), (radius, radius)
 
+
+@inherit_docstrings
 class PlusRange(AbstractRange):
     """Plus-shaped area range"""
     def __init__(self, inner_radius, outer_radius):
@@ -57,11 +128,33 @@ class PlusRange(AbstractRange):
 
         x, y = point
 
-        print(inn, out, x, y)
-
         return (-inn < x < inn and -out < y < out) or (-out < x < out and -inn < y < inn)
 
+    def contains_many(self, points):
+        inn = self.inner_radius
+        out = self.outer_radius
+
+        return [(-inn < x < inn and -out < y < out) or (-out < x < out and -inn < y < inn)
+                for x, y in points]
+
+    def get_bounding_box(self):
+        out = self.outer_radius
+        return (-out, -out), (out, out)
+
+    def get_cells(self, x, y):
+        inn = self.inner_radius
+        out = self.outer_radius
+
+        # the union of the vertical & horizontal bars
+        cells = get_cells_in_rectangle(x - inn, y - out, x + inn, y + out, closed=False)
+        vertical = set(cells)
+        cells.extend(cell for cell in get_cells_in_rectangle(x - out, y - inn, x + out, y + inn, closed=False)
+                     if cell not in vertical)
 
+        return cells
+
+
+@inherit_docstrings
 class DonutRange(AbstractRange):
     """Donut shape area"""
     def __init__(self, inner_radius, outer_radius):
@@ -77,3 +170,12 @@ class DonutRange(AbstractRange):
     def contains(self, point):
         """(bool) Returns True iff 'point' exists within this range (from origin)"""
         return self.inner_radius <= vector_length(point) <= self.outer_radius
+
+    def contains_many(self, points):
+        inner = self.inner_radius
+        outer = self.outer_radius
+        return [inner <= (x ** 2 + y ** 2) ** .5 <= outer for x, y in points]
+
+    def get_bounding_box(self):
+        outer = self.outer_radius
+        return (-outer, -outer), (outer, outer)
@@ -0,0 +1,609 @@
+"""Runs a tower defence game in a worker process
+
+The worker publishes a snapshot of every enemy, tower & obstacle after each step
+into shared memory, & receives player commands over a queue, so a slow step or
+path search never stalls the process handling input & drawing
+
+The main process drives a RemoteGame, which mirrors the parts of TowerGame read
+by GameView & emits the same events
+"""
+
+import multiprocessing
+import queue
+import time
+from array import array
+from multiprocessing import shared_memory
+
+from core import Unit
+from model import TowerGame, GridCoordinateTranslator, GRID_SIZE, CELL_SIZE
+from modules.ee import EventEmitter
+from snapshot import ENEMY_TYPES, TOWER_TYPES
+from tower import SimpleTower
+
+__license__ = "MIT"
+__version__ = "1.0.0"
+
+# Unit types that can be sent between processes are those which can be stored in
+# a snapshot, identified by their index in ENEMY_TYPES & TOWER_TYPES
+
+# Fields of each record in the snapshot, all stored as doubles
+# Units are identified by a serial given when they first appear in a snapshot,
+# rather than by id, since ids are reused once a unit is freed, & pooled units are
+# reused after leaving play (see pool.py)
+ENEMY_FIELDS = ('id', 'type', 'x', 'y', 'health')
+TOWER_FIELDS = ('id', 'type', 'x', 'y', 'rotation', 'level')
+OBSTACLE_FIELDS = ('id', 'x', 'y', 'rotation', 'length', 'width')
+
+# Header: sequence (odd while being written), step, & number of enemies, towers & obstacles
+HEADER_FIELDS = ('sequence', 'step', 'enemies', 'towers', 'obstacles')
+HEADER_SIZE = 8 * len(HEADER_FIELDS)
+
+DEFAULT_RATE = 50  # steps per second
+DEFAULT_ENEMY_CAPACITY = 4096
+DEFAULT_OBSTACLE_CAPACITY = 4096
+
+
+class SnapshotLayout:
+    """Layout of a game snapshot within a block of shared memory
+
+    Records of each kind are packed contiguously after the header, with room
+    for a fixed number of each; any beyond that are not published
+    """
+
+    def __init__(self, enemy_capacity, tower_capacity, obstacle_capacity):
+        """Constructor
+
+        Parameters:
+            enemy_capacity (int): The maximum number of enemies in a snapshot
+            tower_capacity (int): The maximum number of towers in a snapshot
+            obstacle_capacity (int): The maximum number of obstacles in a snapshot
+        """
+        self.capacities = enemy_capacity, tower_capacity, obstacle_capacity
+
+        # offset of each kind's records, in doubles after the header
+        self.enemy_offset = 0
+        self.tower_offset = self.enemy_offset + enemy_capacity * len(ENEMY_FIELDS)
+        self.obstacle_offset = self.tower_offset + tower_capacity * len(TOWER_FIELDS)
+        self.length = self.obstacle_offset + obstacle_capacity * len(OBSTACLE_FIELDS)
+
+    @property
+    def size(self):
+        """(int) The number of bytes required for a snapshot"""
+        return HEADER_SIZE + 8 * self.length
+
+    def views(self, buffer):
+        """Returns memoryviews of the header & records within 'buffer'
+
+        Returns:
+            tuple<memoryview, memoryview>: The header, as int64s, & records, as doubles
+        """
+        buffer = memoryview(buffer)
+        return buffer[:HEADER_SIZE].cast('q'), buffer[HEADER_SIZE:self.size].cast('d')
+
+
+class SnapshotWriter:
+    """Publishes the state of a game into shared memory, one step at a time"""
+
+    def __init__(self, buffer, layout):
+        """Constructor
+
+        Parameters:
+            buffer (memoryview): The shared memory to write into
+            layout (SnapshotLayout): The layout of the snapshot within the buffer
+        """
+        self._layout = layout
+        self._header, self._records = layout.views(buffer)
+
+        self._enemy_types = {cls: i for i, cls in enumerate(ENEMY_TYPES)}
+        self._tower_types = {cls: i for i, cls in enumerate(TOWER_TYPES)}
+
+        # the serial of each enemy, tower & obstacle in play, by unit
+        self._enemy_serials = {}
+        self._tower_serials = {}
+        self._obstacle_serials = {}
+        self._next_serial = 0
+
+    def release(self):
+        """Releases the views into the shared memory"""
+        self._header.release()
+        self._records.release()
+
+    def write(self, game, step):
+        """Publishes the current state of 'game'
+
+        Parameters:
+            game (TowerGame): The game to publish
+            step (int): The number of the step just performed
+        """
+        enemy_capacity, tower_capacity, obstacle_capacity = self._layout.capacities
+
+        # enemies leave play for at least a step before being reused, & so are given a new serial
+        self._enemy_serials = serials = self._get_serials(game.enemies, self._enemy_serials)
+        enemies = []
+        for enemy in game.enemies[:enemy_capacity]:
+            x, y = enemy.position
+            enemies.extend((serials[enemy], self._enemy_types[type(enemy)], x, y, enemy.health))
+
+        self._tower_serials = serials = self._get_serials(game.towers.values(), self._tower_serials)
+        towers = []
+        for tower in list(game.towers.values())[:tower_capacity]:
+            x, y = tower.position
+            towers.extend((serials[tower], self._tower_types[type(tower)], x, y,
+                           getattr(tower, 'rotation', 0.), tower.level))
+
+        self._obstacle_serials = serials = self._get_serials(game.obstacles, self._obstacle_serials)
+        obstacles = []
+        for obstacle in game.obstacles[:obstacle_capacity]:
+            x, y = obstacle.position
+            length, width = obstacle.size
+            obstacles.extend((serials[obstacle], x, y, obstacle.rotation, length, width))
+
+        header, records, layout = self._header, self._records, self._layout
+
+        # readers retry while the sequence is odd, or if it changes while they read
+        header[0] += 1
+        records[layout.enemy_offset:layout.enemy_offset + len(enemies)] = array('d', enemies)
+        records[layout.tower_offset:layout.tower_offset + len(towers)] = array('d', towers)
+        records[layout.obstacle_offset:layout.obstacle_offset + len(obstacles)] = array('d', obstacles)
+        header[1] = step
+        header[2] = len(enemies) // len(ENEMY_FIELDS)
+        header[3] = len(towers) // len(TOWER_FIELDS)
+        header[4] = len(obstacles) // len(OBSTACLE_FIELDS)
+        header[0] += 1
+
+
+    def _get_serials(self, units, previous):
+        """Returns the serial of each unit in play, giving units new to play the next serials
+
+        Units that have left play are dropped, so they're given a new serial if reused
+
+        Parameters:
+            units (iter<Unit>): The units in play
+            previous (dict<Unit, int>): The serial of each unit in play at the last write
+
+        Returns:
+            dict<Unit, int>: The serial of each unit in 'units'
+        """
+        serials = {}
+        for unit in units:
+            serial = previous.get(unit)
+            if serial is None:
+                serial = self._next_serial
+                self._next_serial += 1
+            serials[unit] = serial
+
+        return serials
+
+
+class SnapshotReader:
+    """Reads consistent game snapshots from shared memory"""
+
+    def __init__(self, buffer, layout):
+        """Constructor
+
+        Parameters:
+            buffer (memoryview): The shared memory to read from
+            layout (SnapshotLayout): The layout of the snapshot within the buffer
+        """
+        self._layout = layout
+        self._header, self._records = layout.views(buffer)
+
+    def release(self):
+        """Releases the views into the shared memory"""
+        self._header.release()
+        self._records.release()
+
+    def sequence(self):
+        """(int) Returns the sequence number of the latest snapshot"""
+        return self._header[0]
+
+    def read(self):
+        """Copies the latest complete snapshot
+
+        Returns:
+            tuple<int, int, list<float>, list<float>, list<float>>:
+                The sequence number, step number, & flattened enemy, tower & obstacle records
+        """
+        header, records, layout = self._header, self._records, self._layout
+
+        while True:
+            sequence = header[0]
+            if sequence % 2:
+                # being written
+                time.sleep(0)
+                continue
+
+            step, enemy_count, tower_count, obstacle_count = header[1:5].tolist()
+
+            enemies = records[layout.enemy_offset:
+                              layout.enemy_offset + enemy_count * len(ENEMY_FIELDS)].tolist()
+            towers = records[layout.tower_offset:
+                             layout.tower_offset + tower_count * len(TOWER_FIELDS)].tolist()
+            obstacles = records[layout.obstacle_offset:
+                                layout.obstacle_offset + obstacle_count * len(OBSTACLE_FIELDS)].tolist()
+
+            if header[0] == sequence:
+                return sequence, step, enemies, towers, obstacles
+
+
+class RemoteObstacle(Unit):
+    """Drawable copy of an obstacle in a worker process's game"""
+    grid_size = (0, 0)
+
+    def __init__(self):
+        super().__init__()
+        self.rotation = 0
+        self.size = (0, 0)
+
+
+class _Worker:
+    """Runs a game, stepping at a fixed rate, & applying commands between steps"""
+
+    def __init__(self, shared_memory_name, layout, commands, events, level, size, cell_size, rate):
+        self._memory = shared_memory.SharedMemory(name=shared_memory_name)
+        self._writer = SnapshotWriter(self._memory.buf, layout)
+        self._commands = commands
+        self._events = events
+
+        self._level = level
+        self._wave = 0
+
+        self._game = game = TowerGame(size=size, cell_size=cell_size)
+        self._interval = 1 / rate if rate else 0
+        self._running = False
+        self._step = 0
+
+        game.on("enemy_death", self._forward_enemies("enemy_death"))
+        game.on("enemy_escape", self._forward_enemies("enemy_escape"))
+        game.on("cleared", lambda: self._events.put(("cleared",)))
+
+    def _forward_enemies(self, event):
+        """Returns an event handler forwarding the type & position of each enemy to the main process"""
+        types = {cls: i for i, cls in enumerate(ENEMY_TYPES)}
+
+        def forward(enemies):
+            if enemies:
+                self._events.put((event, [(types[type(enemy)],) + tuple(enemy.position)
+                                          for enemy in enemies]))
+
+        return forward
+
+    def run(self):
+        """Steps the game until told to stop"""
+        try:
+            self._writer.write(self._game, self._step)
+
+            deadline = time.perf_counter()
+            while True:
+                if not self._apply_commands(block=not self._running):
+                    break
+
+                if not self._running:
+                    deadline = time.perf_counter()
+                    continue
+
+                self._game.step()
+                self._step += 1
+                self._writer.write(self._game, self._step)
+
+                deadline += self._interval
+                delay = deadline - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+                elif delay < -self._interval:
+                    # too far behind to catch up; resume stepping from now
+                    deadline = time.perf_counter()
+        finally:
+            self._writer.release()
+            self._memory.close()
+
+    def _apply_commands(self, block=False):
+        """Applies all waiting commands, waiting for one if 'block' is True
+
+        Returns:
+            bool: False iff told to stop
+        """
+        while True:
+            try:
+                command, *args = self._commands.get(block=block)
+            except queue.Empty:
+                return True
+
+            block = False
+
+            if command == "stop":
+                return False
+
+            getattr(self, "_" + command)(*args)
+
+    def _start(self):
+        self._running = True
+
+    def _pause(self):
+        self._running = False
+
+    def _place(self, cell, tower_type):
+        placed = self._game.place(cell, tower_type=TOWER_TYPES[tower_type])
+        self._writer.write(self._game, self._step)
+        self._events.put(("placed", cell, placed))
+
+    def _remove(self, cell):
+        try:
+            self._game.remove(cell)
+        except KeyError:
+            removed = False
+        else:
+            removed = True
+        self._writer.write(self._game, self._step)
+        self._events.put(("removed", cell, removed))
+
+    def _attempt_placement(self, position):
+        legal, path = self._game.attempt_placement(position)
+        self._events.put(("placement", position, legal, list(path.get_shortest())))
+
+    def _reset(self):
+        self._game.reset()
+        self._wave = 0
+        self._writer.write(self._game, self._step)
+
+    def _queue_wave(self, wave, clear):
+        self._game.queue_wave(self._level.get_wave(wave) if wave is not None else [], clear=clear)
+
+    def _next_wave(self):
+        if self._wave == self._level.get_max_wave():
+            return
+
+        self._wave += 1
+
+        wave = self._level.get_wave(self._wave)
+        self._game.queue_wave(wave)
+        self._events.put(("wave", self._wave))
+
+
+def _run_worker(*args):
+    """Entry point of the worker process"""
+    _Worker(*args).run()
+
+
+class RemoteGame(EventEmitter):
+    """A tower defence game simulated in a worker process
+
+    Commands are sent asynchronously; their results arrive as events when the
+    game is updated:
+        placed (cell, placed), removed (cell, removed), wave (wave),
+        placement (position, legal, path cells),
+        enemy_death (enemies), enemy_escape (enemies), cleared ()
+
+    The enemies, towers & obstacles are drawable copies, refreshed by update
+    """
+
+    def __init__(self, level, size=GRID_SIZE, cell_size=CELL_SIZE, rate=DEFAULT_RATE,
+                 enemy_capacity=DEFAULT_ENEMY_CAPACITY, obstacle_capacity=DEFAULT_OBSTACLE_CAPACITY,
+                 context=None):
+        """Constructor
+
+        Parameters:
+            level (AbstractLevel): The level from which to generate waves
+            size (tuple<int, int>): The number of (column, row) cells in the grid
+            cell_size (int): The side length of each cell, in pixels
+            rate (float): The number of steps per second, or None for as fast as possible
+            enemy_capacity (int): The maximum number of enemies published per step
+            obstacle_capacity (int): The maximum number of obstacles published per step
+            context (multiprocessing.context.BaseContext): The multiprocessing context
+                                                           to start the worker with
+        """
+        super().__init__()
+
+        self.grid = GridCoordinateTranslator(cells=size, cell_size=cell_size)
+
+        columns, rows = size
+        self._layout = layout = SnapshotLayout(enemy_capacity, columns * rows, obstacle_capacity)
+        self._memory = shared_memory.SharedMemory(create=True, size=layout.size)
+        self._memory.buf[:HEADER_SIZE] = bytes(HEADER_SIZE)
+        self._reader = SnapshotReader(self._memory.buf, layout)
+
+        context = context or multiprocessing.get_context()
+        self._commands = context.Queue()
+        self._events = context.Queue()
+        self._process = context.Process(target=_run_worker, daemon=True,
+                                        args=(self._memory.name, layout, self._commands, self._events,
+                                              level, size, cell_size, rate))
+
+        self.step = 0
+        self.enemies = []
+        self.towers = {}
+        self.obstacles = []
+
+        self._sequence = None
+        self._enemies = {}
+        self._towers = {}
+        self._obstacles = {}
+
+        self._changed_towers = set()
+        self._removed_towers = set()
+
+        self._tower_types = {cls: i for i, cls in enumerate(TOWER_TYPES)}
+
+        self._process.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def is_alive(self):
+        """(bool) Returns True iff the worker process is running"""
+        return self._process.is_alive()
+
+    def start(self):
+        """Starts (or resumes) stepping the game"""
+        self._commands.put(("start",))
+
+    def pause(self):
+        """Pauses stepping the game"""
+        self._commands.put(("pause",))
+
+    def place(self, cell, tower_type=SimpleTower):
+        """Requests a tower be placed at 'cell', emitting 'placed' with the outcome"""
+        self._commands.put(("place", cell, self._tower_types[tower_type]))
+
+    def remove(self, cell):
+        """Requests the tower at 'cell' be removed, emitting 'removed' with the outcome"""
+        self._commands.put(("remove", cell))
+
+    def attempt_placement(self, position):
+        """Requests whether a tower can be placed at a pixel position, emitting 'placement'"""
+        self._commands.put(("attempt_placement", position))
+
+    def next_wave(self):
+        """Requests the next wave of enemies be sent, emitting 'wave'"""
+        self._commands.put(("next_wave",))
+
+    def queue_wave(self, wave=None, clear=False):
+        """Requests a wave of the level be queued to spawn
+
+        Waves are generated by the worker, since they may be generated lazily
+
+        Parameters:
+            wave (int): The number of the wave to queue, or None for no enemies
+            clear (bool): Clears existing waves, iff True
+        """
+        self._commands.put(("queue_wave", wave, clear))
+
+    def reset(self):
+        """Requests the game be reset, removing every tower, enemy & queued wave"""
+        self._commands.put(("reset",))
+
+    def pop_tower_changes(self):
+        """Returns the towers that changed since this method was last called
+
+        Returns:
+            tuple<set<AbstractTower>, set<AbstractTower>>:
+                The towers that were placed or changed, & the towers that were removed
+        """
+        changed, removed = set(self._changed_towers), self._removed_towers
+        self._changed_towers.clear()
+        self._removed_towers = set()
+
+        return changed, removed
+
+    def update(self):
+        """Emits events from the worker, & refreshes units from its latest snapshot
+
+        Returns:
+            bool: True iff a new snapshot was read
+        """
+        self._emit_events()
+
+        if self._reader.sequence() == self._sequence:
+            return False
+
+        self._sequence, self.step, enemies, towers, obstacles = self._reader.read()
+
+        self._update_enemies(enemies)
+        self._update_towers(towers)
+        self._update_obstacles(obstacles)
+
+        return True
+
+    def close(self):
+        """Stops the worker process & frees the shared memory"""
+        if self._process.is_alive():
+            self._commands.put(("stop",))
+            self._process.join()
+
+        self._reader.release()
+        self._memory.close()
+        self._memory.unlink()
+
+    def _emit_events(self):
+        """Emits every event received from the worker"""
+        while True:
+            try:
+                event, *args = self._events.get_nowait()
+            except queue.Empty:
+                return
+
+            if event in ("enemy_death", "enemy_escape"):
+                args = [self._make_enemies(*args)]
+
+            self.emit(event, *args)
+
+    def _make_enemies(self, records):
+        """(list<AbstractEnemy>) Returns detached enemies at the positions in 'records'"""
+        enemies = []
+        for type_, x, y in records:
+            enemy = ENEMY_TYPES[type_](self.grid.cell_size)
+            enemy.position = x, y
+            enemy.health = 0
+            enemies.append(enemy)
+
+        return enemies
+
+    def _update_enemies(self, records):
+        previous, current = self._enemies, {}
+        cell_size = self.grid.cell_size
+
+        for i in range(0, len(records), len(ENEMY_FIELDS)):
+            key, type_, x, y, health = records[i:i + len(ENEMY_FIELDS)]
+
+            enemy = previous.get(key)
+            if enemy is None or type(enemy) is not ENEMY_TYPES[int(type_)]:
+                enemy = ENEMY_TYPES[int(type_)](cell_size)
+
+            enemy.position = x, y
+            enemy.health = health
+            current[key] = enemy
+
+        self._enemies = current
+        self.enemies = list(current.values())
+
+    def _update_towers(self, records):
+        previous, current = self._towers, {}
+        cell_size = self.grid.cell_size
+
+        for i in range(0, len(records), len(TOWER_FIELDS)):
+            key, type_, x, y, rotation, level = records[i:i + len(TOWER_FIELDS)]
+
+            tower_type = TOWER_TYPES[int(type_)]
+            tower = previous.pop(key, None)
+            if tower is not None and type(tower) is not tower_type:
+                # another type of tower has the same key, so the one drawn before was removed
+                previous[key] = tower
+                tower = None
+            if tower is None:
+                tower = tower_type(cell_size, level=int(level))
+                tower.changes = self._changed_towers
+                self._changed_towers.add(tower)
+
+            tower.position = x, y
+            tower.rotation = rotation
+            tower.level = int(level)
+            current[key] = tower
+
+        for tower in previous.values():
+            tower.changes = None
+            self._changed_towers.discard(tower)
+            self._removed_towers.add(tower)
+
+        self._towers = current
+        self.towers = {self.grid.pixel_to_cell(tower.position): tower for tower in current.values()}
+
+    def _update_obstacles(self, records):
+        previous, current = self._obstacles, {}
+
+        for i in range(0, len(records), len(OBSTACLE_FIELDS)):
+            key, x, y, rotation, length, width = records[i:i + len(OBSTACLE_FIELDS)]
+
+            obstacle = previous.get(key)
+            if obstacle is None:
+                obstacle = RemoteObstacle()
+
+            obstacle.position = x, y
+            obstacle.rotation = rotation
+            obstacle.size = length, width
+            current[key] = obstacle
+
+        self._obstacles = current
+        self.obstacles = list(current.values())
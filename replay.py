@@ -0,0 +1,484 @@
+"""Compact recording & deterministic replay of the inputs to a game
+
+A log holds the game's grid & seed, followed by each command given to the game
+(placing & removing towers, queuing & sending waves) with the step at which it
+was given, & optionally the step & state hash at which recording finished.
+Replaying the commands against a new game with the same seed reproduces it
+
+Usage:
+    python replay.py LOG [LOG ...]
+"""
+
+import argparse
+import collections
+import math
+import os
+import struct
+import sys
+import time
+
+from enemy import AbstractEnemy
+from model import TowerGame
+from snapshot import get_type_name, resolve_type, ENEMY_TYPES, TOWER_TYPES
+
+__license__ = "MIT"
+__version__ = "1.0.0"
+
+MAGIC = b'TDIL'
+VERSION = 3
+
+# the range of seeds which can be recorded
+MIN_SEED, MAX_SEED = -2 ** 63, 2 ** 63 - 1
+
+# magic, version, columns, rows, cell size, seed
+HEADER = struct.Struct('<4sHHHHq')
+
+# the health of an enemy created before it was queued
+HEALTH = struct.Struct('<d')
+
+# Commands, each followed by varint operands
+# All but DEFINE_TYPE & DEFINE_ENEMY begin with the step & the phase of the step (see
+# TowerGame.phase) in which they were given, since commands can be given by event
+# handlers partway through a step
+DEFINE_TYPE = 0  # length, name of a type registered in snapshot.py; assigns the next type code
+PLACE = 1  # step, phase, column, row, type
+REMOVE = 2  # step, phase, column, row
+QUEUE_WAVE = 3  # step, phase, clear, count, then step offset & enemy code for each enemy
+SEND_WAVE = 4  # step, phase, clear, enemies, steps
+RESET = 5  # step, phase
+END = 6  # step, phase, then a 32 byte state hash
+DEFINE_ENEMY = 7  # type, created, then the health if created; assigns the next enemy code
+
+
+def write_varint(buffer, value):
+    """Appends a signed integer to 'buffer', zigzag & LEB128 encoded"""
+    value = -2 * value - 1 if value < 0 else 2 * value
+    while value >= 0x80:
+        buffer.append(value & 0x7F | 0x80)
+        value >>= 7
+    buffer.append(value)
+
+
+def read_varint(data, offset):
+    """Reads a signed integer written by write_varint
+
+    Returns:
+        tuple<int, int>: The integer, & the offset after it
+    """
+    value = shift = 0
+    while True:
+        byte = data[offset]
+        offset += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            break
+        shift += 7
+
+    return (value >> 1) ^ -(value & 1), offset
+
+
+def get_enemy_spec(enemy):
+    """Returns how to recreate an enemy in a wave, without creating it
+
+    Parameters:
+        enemy (AbstractEnemy|type): An enemy, or an enemy class
+
+    Returns:
+        tuple<type, num>: The enemy's type, & its health if it has already been
+                          created, otherwise None
+
+    Raises:
+        ValueError if 'enemy' is any other function, as what it creates can't be recorded
+    """
+    if isinstance(enemy, AbstractEnemy):
+        return type(enemy), enemy.health
+    if isinstance(enemy, type):
+        return enemy, None
+
+    raise ValueError(f"Unable to record enemy factory {enemy!r}")
+
+
+def make_enemy_factory(type_, health):
+    """Returns an enemy, or its class, from a spec returned by get_enemy_spec"""
+    if health is None:
+        return type_
+
+    enemy = type_()
+    enemy.health = health
+    return enemy
+
+
+class InputRecorder:
+    """Records the commands given to a game into a compact binary log
+
+    Steps are stored relative to the previous command, so a log typically takes
+    a few bytes per command
+
+    While recording, the game tracks the phase of each step, so that commands
+    given partway through a step are replayed at the same point
+    """
+
+    def __init__(self, game):
+        """Starts recording a new game
+
+        If the game was not seeded, it is given a random seed, which is recorded
+
+        Parameters:
+            game (TowerGame): The game to record, which must not have been stepped
+                              or given any commands
+
+        Raises:
+            ValueError if the game has already been played, or has a non-integer seed
+                       or one outside of MIN_SEED to MAX_SEED
+        """
+        if game._current_step != -1 or game.towers or game.enemies:
+            raise ValueError("Recording must start before a game is played")
+
+        if game.seed is None:
+            game.seed = int.from_bytes(os.urandom(7), 'little')
+            game.rng.seed(game.seed)
+        elif not isinstance(game.seed, int):
+            raise ValueError("Only games with integer seeds can be recorded")
+        elif not MIN_SEED <= game.seed <= MAX_SEED:
+            raise ValueError(f"Only games with seeds from {MIN_SEED} to {MAX_SEED} can be recorded, "
+                             f"not {game.seed}")
+
+        columns, rows = game.grid.cells
+        self._buffer = bytearray(HEADER.pack(MAGIC, VERSION, columns, rows, game.grid.cell_size, game.seed))
+        self._types = {}
+        self._enemies = {}
+        self._step = -1
+        self._finished = False
+
+        self.game = game
+        game.recorder = self
+
+    def __len__(self):
+        return len(self._buffer)
+
+    def getvalue(self):
+        """(bytes) Returns the log recorded so far"""
+        return bytes(self._buffer)
+
+    def save(self, filename):
+        """Writes the log recorded so far to a file"""
+        with open(filename, 'wb') as file:
+            file.write(self._buffer)
+
+    def finish(self):
+        """Stops recording, ending the log with the game's current step & state hash
+
+        Returns:
+            bytes: The log
+        """
+        if not self._finished:
+            self._command(END, self.game._current_step)
+            self._buffer += bytes.fromhex(self.game.state_hash())
+            self._finished = True
+            self.game.recorder = None
+
+        return self.getvalue()
+
+    def _command(self, command, step, *operands):
+        """Appends a command given at 'step', in the game's current phase"""
+        buffer = self._buffer
+        buffer.append(command)
+        write_varint(buffer, step - self._step)
+        write_varint(buffer, self.game.phase)
+        self._step = step
+        for operand in operands:
+            write_varint(buffer, operand)
+
+    def _type_code(self, type_):
+        """(int) Returns the code of 'type_', defining it if this is its first use"""
+        code = self._types.get(type_)
+        if code is None:
+            name = get_type_name(type_).encode()
+            code = self._types[type_] = len(self._types)
+            self._buffer.append(DEFINE_TYPE)
+            write_varint(self._buffer, len(name))
+            self._buffer += name
+
+        return code
+
+    def _enemy_code(self, enemy):
+        """(int) Returns the code of an enemy in a wave, defining it if this is its first use
+
+        Raises:
+            ValueError if the enemy can't be recreated from a log
+        """
+        key = get_enemy_spec(enemy)
+        code = self._enemies.get(key)
+        if code is None:
+            type_, health = key
+            type_code = self._type_code(type_)
+            code = self._enemies[key] = len(self._enemies)
+            self._buffer.append(DEFINE_ENEMY)
+            write_varint(self._buffer, type_code)
+            write_varint(self._buffer, health is not None)
+            if health is not None:
+                self._buffer += HEALTH.pack(health)
+
+        return code
+
+    def record_place(self, step, cell, tower_type):
+        """Records a tower of 'tower_type' being placed at 'cell'"""
+        code = self._type_code(tower_type)
+        self._command(PLACE, step, *cell, code)
+
+    def record_remove(self, step, cell):
+        """Records the tower at 'cell' being removed"""
+        self._command(REMOVE, step, *cell)
+
+    def record_queue_wave(self, step, wave, clear):
+        """Records a wave of (step offset, enemy or enemy factory) pairs being queued
+
+        Enemies are recorded by type, with their health if they have already been created
+
+        Raises:
+            ValueError if an enemy can't be recreated from a log
+        """
+        operands = [clear, len(wave)]
+        for offset, enemy in wave:
+            operands.extend((offset, self._enemy_code(enemy)))
+        self._command(QUEUE_WAVE, step, *operands)
+
+    def record_send_wave(self, step, clear, enemies, steps):
+        """Records a random wave being sent"""
+        self._command(SEND_WAVE, step, clear, enemies, steps)
+
+    def record_reset(self, step):
+        """Records the game being reset"""
+        self._command(RESET, step)
+
+
+class ReplayResult:
+    """The outcome of replaying a log"""
+
+    def __init__(self, game, steps, elapsed, expected_hash):
+        """Constructor
+
+        Parameters:
+            game (TowerGame): The replayed game
+            steps (int): The number of steps simulated
+            elapsed (float): The wall-clock time taken, in seconds
+            expected_hash (str): The state hash recorded at the end of the log, if any
+        """
+        self.game = game
+        self.steps = steps
+        self.elapsed = elapsed
+        self.expected_hash = expected_hash
+        self.state_hash = game.state_hash()
+
+    def is_verified(self):
+        """(bool) Returns True iff the replay ended in the recorded state"""
+        return self.expected_hash is not None and self.expected_hash == self.state_hash
+
+
+def parse(data):
+    """Decodes a log
+
+    Parameters:
+        data (bytes): The log, as recorded by an InputRecorder
+
+    Returns:
+        tuple<tuple<int, int, int, int>, list<tuple<int, int, int, tuple>>, str>:
+            The (columns, rows, cell size, seed) header, the (step, phase,
+            command, arguments) of each command, & the recorded state hash, if any
+
+    Raises:
+        ValueError if 'data' is not a valid log
+    """
+    data = memoryview(data)
+
+    try:
+        magic, version, columns, rows, cell_size, seed = HEADER.unpack_from(data)
+    except struct.error as error:
+        raise ValueError("Input log is truncated") from error
+
+    if magic != MAGIC:
+        raise ValueError("Data is not an input log")
+    if version != VERSION:
+        raise ValueError(f"Unsupported input log version {version}, expected {VERSION}")
+
+    types = []
+    enemy_specs = []
+    commands = []
+    offset = HEADER.size
+    step = -1
+    expected_hash = None
+
+    def read(count):
+        nonlocal offset
+        values = []
+        for _ in range(count):
+            value, offset = read_varint(data, offset)
+            values.append(value)
+        return values
+
+    def get_type(code, category):
+        """(type) Returns the defined type with 'code', which must be one of 'category'"""
+        if not 0 <= code < len(types):
+            raise ValueError(f"Undefined type code {code} at byte {offset}")
+        return resolve_type(types[code], category)
+
+    try:
+        while offset < len(data):
+            command = data[offset]
+            offset += 1
+
+            if command == DEFINE_TYPE:
+                length, = read(1)
+                if offset + length > len(data):
+                    raise IndexError("type name")
+                # resolved as it is used, from the registered types only
+                types.append(bytes(data[offset:offset + length]).decode(errors='replace'))
+                offset += length
+                continue
+
+            if command == DEFINE_ENEMY:
+                type_code, created = read(2)
+                health = None
+                if created:
+                    if offset + HEALTH.size > len(data):
+                        raise IndexError("health")
+                    health, = HEALTH.unpack_from(data, offset)
+                    offset += HEALTH.size
+                    if not math.isfinite(health):
+                        raise ValueError(f"Invalid enemy health at byte {offset - HEALTH.size}")
+                enemy_specs.append((get_type(type_code, ENEMY_TYPES), health))
+                continue
+
+            delta, phase = read(2)
+            step += delta
+
+            if command == PLACE:
+                column, row, code = read(3)
+                arguments = (column, row), get_type(code, TOWER_TYPES)
+            elif command == REMOVE:
+                arguments = tuple(read(2)),
+            elif command == QUEUE_WAVE:
+                clear, count = read(2)
+                wave = []
+                for _ in range(count):
+                    enemy_step, code = read(2)
+                    if not 0 <= code < len(enemy_specs):
+                        raise ValueError(f"Undefined enemy code {code} at byte {offset}")
+                    wave.append((enemy_step, make_enemy_factory(*enemy_specs[code])))
+                arguments = wave, bool(clear)
+            elif command == SEND_WAVE:
+                clear, enemies, steps = read(3)
+                arguments = bool(clear), enemies, steps
+            elif command == RESET:
+                arguments = ()
+            elif command == END:
+                if offset + 32 > len(data):
+                    raise IndexError("state hash")
+                expected_hash = bytes(data[offset:offset + 32]).hex()
+                offset += 32
+                arguments = ()
+            else:
+                raise ValueError(f"Unknown command {command} at byte {offset - 1}")
+
+            commands.append((step, phase, command, arguments))
+    except IndexError as error:
+        raise ValueError("Input log is truncated") from error
+
+    return (columns, rows, cell_size, seed), commands, expected_hash
+
+
+def _apply(game, command, arguments):
+    """Gives a parsed command to a game"""
+    if command == PLACE:
+        cell, tower_type = arguments
+        game.place(cell, tower_type=tower_type)
+    elif command == REMOVE:
+        cell, = arguments
+        game.remove(cell)
+    elif command == QUEUE_WAVE:
+        wave, clear = arguments
+        game.queue_wave(wave, clear=clear)
+    elif command == SEND_WAVE:
+        clear, enemies, steps = arguments
+        game.send_wave(clear=clear, enemies=enemies, steps=steps)
+    elif command == RESET:
+        game.reset()
+
+
+def replay(data, game=None):
+    """Replays a log at full speed
+
+    Parameters:
+        data (bytes): The log, as recorded by an InputRecorder
+        game (TowerGame): A new game to replay into, with the log's grid & seed,
+                          or None to create one
+
+    Returns:
+        ReplayResult: The outcome of the replay
+
+    Raises:
+        ValueError if 'data' is not a valid log
+    """
+    (columns, rows, cell_size, seed), commands, expected_hash = parse(data)
+
+    if game is None:
+        game = TowerGame(size=(columns, rows), cell_size=cell_size, seed=seed)
+
+    commands = collections.deque(commands)
+
+    def apply_commands(phase):
+        """Gives the game each command due in the current phase of the current step"""
+        while commands and commands[0][0] == game._current_step and commands[0][1] == phase:
+            _, _, command, arguments = commands.popleft()
+            _apply(game, command, arguments)
+
+    step = -1
+    start = time.perf_counter()
+    game.phase_hook = apply_commands
+    try:
+        while commands:
+            step = commands[0][0]
+            while game._current_step < step:
+                game.step()
+
+            # commands in later phases are given by the hook as the step is performed,
+            # so any remaining at this step were given between steps
+            apply_commands(0)
+            if commands and commands[0][0] <= game._current_step:
+                step, phase, command, _ = commands[0]
+                raise ValueError(f"Command {command} at step {step}, phase {phase} is out of order")
+    finally:
+        game.phase_hook = None
+    elapsed = time.perf_counter() - start
+
+    return ReplayResult(game, step + 1, elapsed, expected_hash)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Replays input logs, checking their final state hashes")
+    parser.add_argument('logs', nargs='+')
+    args = parser.parse_args(argv)
+
+    failed = 0
+    for filename in args.logs:
+        with open(filename, 'rb') as file:
+            data = file.read()
+
+        result = replay(data)
+
+        if result.expected_hash is None:
+            status = "UNVERIFIED (no final hash)"
+        elif result.is_verified():
+            status = "OK"
+        else:
+            status = "MISMATCH"
+            failed += 1
+
+        print(f"{filename}: {status}, {result.steps} steps in {result.elapsed:.2f}s "
+              f"({result.steps / max(result.elapsed, 1e-9):.0f} steps/s)")
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
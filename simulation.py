@@ -0,0 +1,233 @@
+"""Headless (windowless) simulation of tower defence games
+
+Drives a TowerGame as fast as possible, without tkinter, performing the same
+wave, score, coin & life bookkeeping as TowerGameApp
+"""
+
+import time
+
+from model import TowerGame, GRID_SIZE, CELL_SIZE
+from replay import InputRecorder
+
+__license__ = "MIT"
+__version__ = "1.0.0"
+
+INITIAL_COINS = 50
+INITIAL_LIVES = 20
+
+
+class SimulationResult:
+    """The outcome of a single headless simulation"""
+    won: bool
+    steps: int
+    kills: int
+    escapes: int
+    score: int
+    coins: int
+    lives: int
+    waves: int
+    elapsed: float
+    wave_escapes: list
+
+    def __init__(self, won, steps, kills, escapes, score, coins, lives, waves, elapsed, wave_escapes=None):
+        """Constructor
+
+        Parameters:
+            won (bool): True iff every wave was cleared before all lives were lost
+            steps (int): The number of game steps simulated
+            kills (int): The number of enemies killed
+            escapes (int): The number of enemies that escaped
+            score (int): The final score
+            coins (int): The final number of coins
+            lives (int): The number of lives remaining
+            waves (int): The last wave that was sent
+            elapsed (float): The wall-clock time taken, in seconds
+            wave_escapes (list<int>): The number of enemies that escaped during each wave sent
+        """
+        self.won = won
+        self.steps = steps
+        self.kills = kills
+        self.escapes = escapes
+        self.score = score
+        self.coins = coins
+        self.lives = lives
+        self.waves = waves
+        self.elapsed = elapsed
+        self.wave_escapes = list(wave_escapes or [])
+
+    def steps_per_second(self):
+        """(float) Returns the simulation rate, in steps per wall-clock second"""
+        if self.elapsed <= 0:
+            return float('inf')
+        return self.steps / self.elapsed
+
+    def to_dict(self):
+        """(dict<str, *>) Returns a plain, serialisable representation of this result"""
+        return {
+            'won': self.won,
+            'steps': self.steps,
+            'kills': self.kills,
+            'escapes': self.escapes,
+            'score': self.score,
+            'coins': self.coins,
+            'lives': self.lives,
+            'waves': self.waves,
+            'elapsed': self.elapsed,
+            'wave_escapes': self.wave_escapes,
+            'steps_per_second': self.steps_per_second(),
+        }
+
+    def __repr__(self):
+        return "SimulationResult(won={!r}, steps={!r}, kills={!r}, escapes={!r}, score={!r})".format(
+            self.won, self.steps, self.kills, self.escapes, self.score)
+
+
+class HeadlessGame:
+    """Plays a level against a fixed tower layout without a window
+
+    Waves are sent as soon as the previous wave is cleared, as in TowerGameApp
+    """
+
+    def __init__(self, level, towers=(), seed=None, coins=INITIAL_COINS, lives=INITIAL_LIVES,
+                 size=GRID_SIZE, cell_size=CELL_SIZE, record=False):
+        """Constructor
+
+        Parameters:
+            level (AbstractLevel): The level from which to generate waves
+            towers (iter<tuple<tuple<int, int>, type>>|dict<tuple<int, int>, type>):
+                (cell, tower type) pairs for each tower to place
+            seed (*): Seed for the game's & level's random number generators, or None
+                      to leave them unseeded
+            coins (int): The initial number of coins
+            lives (int): The initial number of lives
+            size (tuple<int, int>): The number of (column, row) cells in the grid
+            cell_size (int): The side length of each cell, in pixels
+            record (bool): If True, the game's inputs are recorded (see recorder)
+
+        Raises:
+            ValueError if a tower cannot be placed
+        """
+        if seed is not None:
+            level.rng.seed(seed)
+
+        self._level = level
+        self._wave = 0
+        self._score = 0
+        self._coins = coins
+        self._lives = lives
+        self._kills = 0
+        self._escapes = 0
+        self._wave_escapes = []
+        self._won = None
+
+        self._game = game = TowerGame(size=size, cell_size=cell_size, seed=seed)
+        self._recorder = InputRecorder(game) if record else None
+
+        if isinstance(towers, dict):
+            towers = towers.items()
+
+        for cell, tower_type in towers:
+            if not game.place(cell, tower_type=tower_type):
+                raise ValueError(f"Unable to place {tower_type.__name__} at {cell}")
+
+        game.on("enemy_death", self._handle_death)
+        game.on("enemy_escape", self._handle_escape)
+        game.on("cleared", self._handle_wave_clear)
+
+    @property
+    def game(self):
+        """(TowerGame) The game being simulated"""
+        return self._game
+
+    @property
+    def recorder(self):
+        """(InputRecorder) The recorder of the game's inputs, or None if not recording"""
+        return self._recorder
+
+    def is_over(self):
+        """(bool) Returns True iff the game has been won or lost"""
+        return self._won is not None
+
+    def next_wave(self):
+        """Sends the next wave of enemies"""
+        if self._wave == self._level.get_max_wave():
+            return
+
+        self._wave += 1
+        self._wave_escapes.append(0)
+
+        wave = self._level.get_wave(self._wave)
+        self._game.queue_wave(wave)
+
+    def run(self, max_steps=None):
+        """Simulates the game until it is won or lost
+
+        Parameters:
+            max_steps (int): The maximum number of steps to simulate, or None for no limit
+
+        Returns:
+            SimulationResult: The outcome of the simulation
+        """
+        if self._wave == 0:
+            self.next_wave()
+
+        game = self._game
+        steps = 0
+
+        start = time.perf_counter()
+        while self._won is None and (max_steps is None or steps < max_steps):
+            game.step()
+            steps += 1
+        elapsed = time.perf_counter() - start
+
+        return SimulationResult(won=bool(self._won), steps=steps, kills=self._kills,
+                                escapes=self._escapes, score=self._score, coins=self._coins,
+                                lives=self._lives, waves=self._wave, elapsed=elapsed,
+                                wave_escapes=self._wave_escapes)
+
+    def _handle_death(self, enemies):
+        """Rewards coins & score for enemies killed in a step"""
+        bonus = len(enemies) ** .5
+        for enemy in enemies:
+            self._coins += enemy.points
+            self._score += int(enemy.points * bonus)
+
+        self._kills += len(enemies)
+
+    def _handle_escape(self, enemies):
+        """Deducts lives for enemies that escaped in a step"""
+        self._escapes += len(enemies)
+        self._wave_escapes[-1] += len(enemies)
+
+        self._lives -= len(enemies)
+        if self._lives <= 0:
+            self._lives = 0
+            self._won = False
+
+    def _handle_wave_clear(self):
+        """Sends the next wave, or ends the game if the last wave was cleared"""
+        if self._won is not None:
+            return
+
+        if self._wave == self._level.get_max_wave():
+            self._won = True
+            return
+
+        self.next_wave()
+
+
+def simulate(level, towers=(), seed=None, max_steps=None, **kwargs):
+    """Runs a single headless simulation
+
+    Parameters:
+        level (AbstractLevel): The level from which to generate waves
+        towers (iter<tuple<tuple<int, int>, type>>|dict<tuple<int, int>, type>):
+            (cell, tower type) pairs for each tower to place
+        seed (*): Seed for the random number generator
+        max_steps (int): The maximum number of steps to simulate, or None for no limit
+        **kwargs: Any other keyword arguments for the HeadlessGame constructor
+
+    Returns:
+        SimulationResult: The outcome of the simulation
+    """
+    return HeadlessGame(level, towers=towers, seed=seed, **kwargs).run(max_steps=max_steps)
@@ -0,0 +1,227 @@
+"""Compact, versioned binary encoding of the full state of a game
+
+The layout is a fixed header, followed by a table of the unit types used, the
+random number generator's state, & a packed record for each tower, enemy,
+unspawned enemy & obstacle
+
+Types are stored by name, & only the types registered below can be stored, so
+decoding a snapshot never imports or creates anything else
+"""
+
+import struct
+
+from enemy import SimpleEnemy, SteelEnemy, InvincibleEnemy
+from tower import SimpleTower, MissileTower, PulseTower, Missile
+
+__license__ = "MIT"
+__version__ = "1.0.0"
+
+MAGIC = b'TDGS'
+VERSION = 2
+
+# magic, version, columns, rows, cell size, current step, & the number of types,
+# towers, enemies, unspawned enemies, obstacles & obstacle targets
+HEADER = struct.Struct('<4sHHHdqHIIIII')
+
+# random.Random state: version, 625 words & the gaussian value in waiting, if any
+RNG_STATE = struct.Struct('<B625I?d')
+
+# column, row, type, level, rotation, cool down steps remaining
+TOWER = struct.Struct('<hhHHdi')
+
+# type, x, y, health
+ENEMY = struct.Struct('<Hddd')
+
+# step, type, health
+UNSPAWNED = struct.Struct('<qHd')
+
+# type, x, y, rotation, target (index of the target in the enemies if >= 0,
+# otherwise the target is not in play & is at index -1 - target of the targets)
+OBSTACLE = struct.Struct('<Hdddi')
+
+# the unit types which can be stored, in each category
+TOWER_TYPES = (SimpleTower, MissileTower, PulseTower)
+ENEMY_TYPES = (SimpleEnemy, SteelEnemy, InvincibleEnemy)
+OBSTACLE_TYPES = (Missile,)
+
+_types = {type_.__name__: type_ for type_ in TOWER_TYPES + ENEMY_TYPES + OBSTACLE_TYPES}
+
+
+class GameState:
+    """The full state of a game, as plain values"""
+
+    def __init__(self, size, cell_size, step, rng_state, towers, enemies, unspawned, obstacles, targets):
+        """Constructor
+
+        Parameters:
+            size (tuple<int, int>): The number of (column, row) cells in the grid
+            cell_size (int): The side length of each cell, in pixels
+            step (int): The current step number
+            rng_state (tuple): The state of the game's random.Random
+            towers (list<tuple>): (cell, type, level, rotation, cool down) for each tower
+            enemies (list<tuple>): (type, x, y, health) for each enemy in play
+            unspawned (list<tuple>): (step, type, health) for each enemy to spawn
+            obstacles (list<tuple>): (type, x, y, rotation, target) for each obstacle
+            targets (list<tuple>): (type, x, y, health) for each obstacle target not in play
+        """
+        self.size = size
+        self.cell_size = cell_size
+        self.step = step
+        self.rng_state = rng_state
+        self.towers = towers
+        self.enemies = enemies
+        self.unspawned = unspawned
+        self.obstacles = obstacles
+        self.targets = targets
+
+
+def get_type_name(type_):
+    """Returns the name by which 'type_' is stored
+
+    Parameters:
+        type_ (type): A registered unit type
+
+    Returns:
+        str: The type's name
+
+    Raises:
+        ValueError if 'type_' is not registered
+    """
+    name = type_.__name__
+    if _types.get(name) is not type_:
+        raise ValueError(f"Unable to store unregistered type {type_.__qualname__}")
+
+    return name
+
+
+def resolve_type(name, types=None):
+    """Returns the registered type stored as 'name'
+
+    Parameters:
+        name (str): The name of the type
+        types (tuple<type>): The category the type must be in, e.g. TOWER_TYPES, or
+                             None for any registered type
+
+    Returns:
+        type: The type
+
+    Raises:
+        ValueError if no type in the category is registered as 'name'
+    """
+    type_ = _types.get(name)
+    if type_ is None or (types is not None and type_ not in types):
+        raise ValueError(f"Unknown unit type {name!r}")
+
+    return type_
+
+
+def pack(state):
+    """Encodes a game state
+
+    Parameters:
+        state (GameState): The state to encode
+
+    Returns:
+        bytes: The encoded state
+    """
+    type_codes = {}
+
+    def code(type_):
+        if type_ not in type_codes:
+            type_codes[type_] = len(type_codes)
+        return type_codes[type_]
+
+    towers = [TOWER.pack(column, row, code(type_), level, rotation, cool_down)
+              for (column, row), type_, level, rotation, cool_down in state.towers]
+    enemies = [ENEMY.pack(code(type_), x, y, health) for type_, x, y, health in state.enemies]
+    unspawned = [UNSPAWNED.pack(step, code(type_), health) for step, type_, health in state.unspawned]
+    obstacles = [OBSTACLE.pack(code(type_), x, y, rotation, target)
+                 for type_, x, y, rotation, target in state.obstacles]
+    targets = [ENEMY.pack(code(type_), x, y, health) for type_, x, y, health in state.targets]
+
+    names = []
+    for type_ in type_codes:
+        name = get_type_name(type_).encode()
+        names.append(struct.pack('<H', len(name)) + name)
+
+    rng_version, words, gauss = state.rng_state
+    rng = RNG_STATE.pack(rng_version, *words, gauss is not None, gauss or 0.)
+
+    columns, rows = state.size
+    header = HEADER.pack(MAGIC, VERSION, columns, rows, state.cell_size, state.step, len(type_codes),
+                         len(towers), len(enemies), len(unspawned), len(obstacles), len(targets))
+
+    return b''.join([header, *names, rng, *towers, *enemies, *unspawned, *obstacles, *targets])
+
+
+def unpack(data):
+    """Decodes a game state
+
+    Parameters:
+        data (bytes): The encoded state
+
+    Returns:
+        GameState: The decoded state
+
+    Raises:
+        ValueError if 'data' is not a snapshot of a supported version
+    """
+    try:
+        return _unpack(memoryview(data))
+    except struct.error as error:
+        raise ValueError(f"Snapshot is truncated or corrupt: {error}") from error
+
+
+def _unpack(data):
+    """(GameState) Decodes a game state from a memoryview of a snapshot"""
+    (magic, version, columns, rows, cell_size, step, type_count,
+     tower_count, enemy_count, unspawned_count, obstacle_count, target_count) = HEADER.unpack_from(data)
+
+    if magic != MAGIC:
+        raise ValueError("Data is not a game snapshot")
+    if version != VERSION:
+        raise ValueError(f"Unsupported snapshot version {version}, expected {VERSION}")
+
+    offset = HEADER.size
+
+    names = []
+    for _ in range(type_count):
+        length, = struct.unpack_from('<H', data, offset)
+        offset += 2
+        names.append(bytes(data[offset:offset + length]).decode(errors='replace'))
+        offset += length
+
+    def get_type(code, types):
+        """(type) Returns the type with 'code', which must be one of 'types'"""
+        if code >= len(names):
+            raise ValueError(f"Undefined type code {code}")
+        return resolve_type(names[code], types)
+
+    rng_version, *words, has_gauss, gauss = RNG_STATE.unpack_from(data, offset)
+    offset += RNG_STATE.size
+    rng_state = rng_version, tuple(words), gauss if has_gauss else None
+
+    def records(record, count):
+        nonlocal offset
+        end = offset + record.size * count
+        values = list(record.iter_unpack(data[offset:end]))
+        offset = end
+        return values
+
+    towers = [((column, row), get_type(type_, TOWER_TYPES), level, rotation, cool_down)
+              for column, row, type_, level, rotation, cool_down in records(TOWER, tower_count)]
+    enemies = [(get_type(type_, ENEMY_TYPES), x, y, health) for type_, x, y, health in records(ENEMY, enemy_count)]
+    unspawned = [(step_, get_type(type_, ENEMY_TYPES), health)
+                 for step_, type_, health in records(UNSPAWNED, unspawned_count)]
+    obstacles = [(get_type(type_, OBSTACLE_TYPES), x, y, rotation, target)
+                 for type_, x, y, rotation, target in records(OBSTACLE, obstacle_count)]
+    targets = [(get_type(type_, ENEMY_TYPES), x, y, health) for type_, x, y, health in records(ENEMY, target_count)]
+
+    if offset != len(data):
+        raise ValueError("Snapshot is truncated or has trailing data")
+
+    for *_, target in obstacles:
+        if not -len(targets) <= target < len(enemies):
+            raise ValueError(f"Obstacle target {target} is out of range")
+
+    return GameState((columns, rows), cell_size, step, rng_state, towers, enemies, unspawned, obstacles, targets)
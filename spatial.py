@@ -0,0 +1,202 @@
+"""Spatial indexing of units for fast area queries"""
+
+__license__ = "MIT"
+__version__ = "1.0.0"
+
+
+class SpatialHash:
+    """Uniform grid index over pixel positions, bucketed by the cells of a grid
+
+    Each position is identified by its index in the sequences it was built from,
+    & queries yield indices in ascending order, so results can be processed in
+    the same order as a brute-force scan
+    """
+
+    def __init__(self, grid):
+        """Constructor
+
+        Parameters:
+            grid (GridCoordinateTranslator): The grid whose cells to bucket positions by
+        """
+        self.grid = grid
+        self._buckets = {}
+        self._size = 0
+        self._bounds = None
+
+    def __len__(self):
+        return self._size
+
+    def clear(self):
+        """Removes every position from the index"""
+        self._buckets = {}
+        self._size = 0
+        self._bounds = None
+
+    def rebuild(self, xs, ys):
+        """Replaces the contents of the index
+
+        Parameters:
+            xs (sequence<num>): The x pixel coordinate of each position
+            ys (sequence<num>): The y pixel coordinate of each position
+        """
+        cell_size = self.grid.cell_size
+        buckets = {}
+
+        for i, (x, y) in enumerate(zip(xs, ys)):
+            cell = int(x // cell_size), int(y // cell_size)
+            bucket = buckets.get(cell)
+            if bucket is None:
+                buckets[cell] = [i]
+            else:
+                bucket.append(i)
+
+        self._buckets = buckets
+        self._size = len(xs)
+        self._bounds = None
+
+    def get_cells_in_box(self, top_left, bottom_right):
+        """Returns the block of cells covering a pixel bounding box
+
+        Parameters:
+            top_left (tuple<num, num>): The top-left pixel corner of the box
+            bottom_right (tuple<num, num>): The bottom-right pixel corner of the box
+
+        Returns:
+            tuple<tuple<int, int>, tuple<int, int>>: The first & last (column, row) cells
+                                                     of the block, inclusive
+        """
+        cell_size = self.grid.cell_size
+        # pad slightly to absorb rounding in callers' exact tests
+        padding = 1e-6
+
+        (left, top), (right, bottom) = top_left, bottom_right
+        return (int((left - padding) // cell_size), int((top - padding) // cell_size)), \
+               (int((right + padding) // cell_size), int((bottom + padding) // cell_size))
+
+    def query(self, first_cell, last_cell):
+        """Returns the indices of every position within a block of cells
+
+        Parameters:
+            first_cell (tuple<int, int>): The top-left (column, row) cell of the block
+            last_cell (tuple<int, int>): The bottom-right (column, row) cell of the block
+
+        Returns:
+            list<int>: The index of each position in the block, in ascending order
+        """
+        first_column, first_row = first_cell
+        last_column, last_row = last_cell
+        buckets = self._buckets
+
+        indices = []
+        area = (last_column - first_column + 1) * (last_row - first_row + 1)
+
+        if area <= len(buckets):
+            for column in range(first_column, last_column + 1):
+                for row in range(first_row, last_row + 1):
+                    bucket = buckets.get((column, row))
+                    if bucket is not None:
+                        indices.extend(bucket)
+        else:
+            # fewer occupied cells than cells in the block
+            for (column, row), bucket in buckets.items():
+                if first_column <= column <= last_column and first_row <= row <= last_row:
+                    indices.extend(bucket)
+
+        indices.sort()
+        return indices
+
+    def query_cells(self, cells):
+        """Returns the indices of every position within any of 'cells'
+
+        Parameters:
+            cells (iter<tuple<int, int>>): The distinct (column, row) cells to look in
+
+        Returns:
+            list<int>: The index of each position in the cells, in ascending order
+        """
+        buckets = self._buckets
+
+        indices = []
+        for cell in cells:
+            bucket = buckets.get(cell)
+            if bucket is not None:
+                indices.extend(bucket)
+
+        indices.sort()
+        return indices
+
+    def _get_bounds(self):
+        """Returns the first & last (column, row) of the occupied cells, or None if empty"""
+        if self._bounds is None and self._buckets:
+            columns = [column for column, _ in self._buckets]
+            rows = [row for _, row in self._buckets]
+            self._bounds = (min(columns), min(rows)), (max(columns), max(rows))
+
+        return self._bounds
+
+    def nearest(self, position, xs, ys, accept=None):
+        """Finds the nearest position to a point
+
+        Searches rings of cells outward from the point's cell, stopping once no
+        unsearched cell could hold a nearer position. Ties are broken by index
+
+        Parameters:
+            position (tuple<num, num>): The pixel point to search from
+            xs (sequence<num>): The x pixel coordinate of each position, as indexed
+            ys (sequence<num>): The y pixel coordinate of each position, as indexed
+            accept (callable): Takes an index & returns True iff its position may be
+                               found, or None to accept every position
+
+        Returns:
+            int: The index of the nearest position, or None if none are accepted
+        """
+        bounds = self._get_bounds()
+        if bounds is None:
+            return None
+
+        (first_column, first_row), (last_column, last_row) = bounds
+        cell_size = self.grid.cell_size
+        buckets = self._buckets
+
+        x, y = position
+        column, row = int(x // cell_size), int(y // cell_size)
+
+        # the most rings needed to reach every occupied cell
+        max_radius = max(column - first_column, last_column - column, row - first_row, last_row - row, 0)
+
+        best = None
+        best_distance = None
+        for radius in range(max_radius + 1):
+            # unsearched positions are outside the previous ring, so at least
+            # radius - 1 cells away
+            if best is not None and best_distance < ((radius - 1) * cell_size) ** 2:
+                break
+
+            for cell in _iter_ring(column, row, radius):
+                bucket = buckets.get(cell)
+                if bucket is None:
+                    continue
+
+                for i in bucket:
+                    if accept is not None and not accept(i):
+                        continue
+
+                    distance = (xs[i] - x) ** 2 + (ys[i] - y) ** 2
+                    if best is None or (distance, i) < (best_distance, best):
+                        best, best_distance = i, distance
+
+        return best
+
+
+def _iter_ring(column, row, radius):
+    """Yields the cells on the perimeter of the block 'radius' cells around a cell"""
+    if radius == 0:
+        yield column, row
+        return
+
+    for dx in range(-radius, radius + 1):
+        yield column + dx, row - radius
+        yield column + dx, row + radius
+    for dy in range(-radius + 1, radius):
+        yield column - radius, row + dy
+        yield column + radius, row + dy
@@ -0,0 +1,127 @@
+"""Ordering of enemies by their progress along the path, & policies by which
+towers choose which enemy in range to target"""
+
+import math
+from array import array
+
+from path import FLOW_DIRECTIONS, NO_DIRECTION
+
+__license__ = "MIT"
+__version__ = "1.0.0"
+
+# Targeting policies
+FIRST = 'first'  # the enemy closest to the end of the path
+LAST = 'last'  # the enemy furthest from the end of the path
+STRONGEST = 'strongest'  # the enemy with the most health, then the first
+CLOSEST = 'closest'  # the enemy closest to the tower, then the first
+
+POLICIES = (FIRST, LAST, STRONGEST, CLOSEST)
+
+
+class ProgressIndex:
+    """Ranks every enemy in play by its remaining distance to the end of the path
+
+    Each enemy is identified by its slot in an EnemyStore. Remaining distances are
+    derived from the path's distance grid, refined by how far each enemy has moved
+    through its cell along the flow field. Equally distant enemies are ranked in
+    slot order, i.e. the order they were spawned, & enemies with no route to the
+    end are ranked last
+    """
+
+    def __init__(self, grid):
+        """Constructor
+
+        Parameters:
+            grid (GridCoordinateTranslator): The grid the enemies are on
+        """
+        self.grid = grid
+        self.remaining = array('d')  # the remaining distance of each enemy, in pixels
+        self.order = []  # slots, from the enemy closest to the end to the furthest
+        self.ranks = array('l')  # the position of each slot in the order
+
+    def __len__(self):
+        return len(self.order)
+
+    def rebuild(self, xs, ys, path):
+        """Ranks enemies at new positions
+
+        Every enemy is ranked afresh, rather than updating the previous ranks, since
+        slots shift whenever enemies leave the store. Slots are sorted from slot order,
+        which is the order enemies spawned in, & so already close to their order of
+        progress, so the (stable) sort is near O(n), rather than O(n log n), unless
+        enemies overtake one another
+
+        Parameters:
+            xs (sequence<num>): The x pixel coordinate of each enemy
+            ys (sequence<num>): The y pixel coordinate of each enemy
+            path (Path): The path the enemies are following
+        """
+        cell_size = self.grid.cell_size
+        half = cell_size / 2
+        (first_column, first_row), (last_column, last_row) = path.bounds
+        columns = path.columns
+        distance_grid, flow = path.distance_grid, path.flow
+
+        remaining = array('d', [0.]) * len(xs)
+        for slot, (x, y) in enumerate(zip(xs, ys)):
+            column, row = int(x // cell_size), int(y // cell_size)
+
+            distance = -1
+            if first_column <= column <= last_column and first_row <= row <= last_row:
+                index = column - first_column + (row - first_row) * columns
+                distance = distance_grid[index]
+
+            if distance < 0:
+                remaining[slot] = math.inf
+                continue
+
+            # subtract progress from the centre of the cell toward the next
+            progress = 0
+            code = flow[index]
+            if code != NO_DIRECTION:
+                dx, dy = FLOW_DIRECTIONS[code]
+                progress = (x - column * cell_size - half) * dx + (y - row * cell_size - half) * dy
+
+            remaining[slot] = distance * cell_size - progress
+
+        # stable, so equally distant enemies stay in slot order
+        order = sorted(range(len(xs)), key=remaining.__getitem__)
+
+        ranks = array('l', [0]) * len(order)
+        for rank, slot in enumerate(order):
+            ranks[slot] = rank
+
+        self.remaining = remaining
+        self.order = order
+        self.ranks = ranks
+
+    def select(self, policy, candidates, healths=None, xs=None, ys=None, position=None):
+        """Chooses the enemy to target from among 'candidates', in a single O(k) pass
+        over the k candidates, which the tower has already filtered by range
+
+        Parameters:
+            policy (str): The targeting policy, one of POLICIES
+            candidates (list<int>): The slots of the enemies which may be targeted
+            healths (sequence<num>): The health of each enemy, for STRONGEST
+            xs, ys (sequence<num>): The pixel coordinates of each enemy, for CLOSEST
+            position (tuple<num, num>): The pixel position of the tower, for CLOSEST
+
+        Returns:
+            int: The slot of the targeted enemy, or None if there are no candidates
+        """
+        if not candidates:
+            return None
+
+        ranks = self.ranks
+
+        if policy == FIRST:
+            return min(candidates, key=ranks.__getitem__)
+        if policy == LAST:
+            return max(candidates, key=ranks.__getitem__)
+        if policy == STRONGEST:
+            return min(candidates, key=lambda slot: (-healths[slot], ranks[slot]))
+        if policy == CLOSEST:
+            x, y = position
+            return min(candidates, key=lambda slot: ((xs[slot] - x) ** 2 + (ys[slot] - y) ** 2, ranks[slot]))
+
+        raise ValueError(f"Unknown targeting policy {policy!r}, expected one of {POLICIES}")
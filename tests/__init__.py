@@ -0,0 +1,12 @@
+"""Tests for the tower defence game
+
+The game's modules live at the top level of the repository, so it is added to
+the import path; run with `python -m unittest discover tests` or `pytest tests`
+"""
+
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
@@ -0,0 +1,98 @@
+"""Tests for deferring, merging & flushing events"""
+
+import unittest
+
+from . import ROOT  # noqa: F401, adds the game's modules to the import path
+
+from modules.ee import EventEmitter
+
+
+class DeferredEventsTest(unittest.TestCase):
+    """Deferred events are merged per event & delivered once per flush"""
+
+    def setUp(self):
+        self.ee = EventEmitter()
+        self.received = []
+
+        for event in ("death", "escape", "cleared", "placed"):
+            self.ee.on(event, lambda *args, _event=event, **kwargs: self.received.append((_event, args, kwargs)))
+
+    def test_events_are_buffered_until_flushed(self):
+        self.ee.defer()
+        self.ee.emit("death", [1])
+        self.assertEqual(self.received, [])
+        self.assertEqual(self.ee.pending(), ["death"])
+
+        self.assertEqual(self.ee.flush(), 1)
+        self.assertEqual(self.received, [("death", ([1],), {})])
+        self.assertEqual(self.ee.pending(), [])
+        self.assertEqual(self.ee.flush(), 0)
+
+    def test_events_are_merged_across_the_batch(self):
+        self.ee.defer()
+        self.ee.emit("death", [1])
+        self.ee.emit("cleared")
+        self.ee.emit("escape", [2])
+        self.ee.emit("death", [3, 4])
+        self.ee.emit("cleared")
+        self.ee.emit("escape", [5])
+
+        # each event is delivered once, in the order it was first emitted
+        self.assertEqual(self.ee.pending(), ["death", "cleared", "escape"])
+        self.assertEqual(self.ee.flush(), 3)
+        self.assertEqual(self.received, [("death", ([1, 3, 4],), {}),
+                                         ("cleared", (), {}),
+                                         ("escape", ([2, 5],), {})])
+
+    def test_unmergeable_emits_are_kept(self):
+        self.ee.defer()
+        self.ee.emit("placed", (0, 0), True)
+        self.ee.emit("death", [1])
+        self.ee.emit("placed", (1, 0), False)
+        self.ee.emit("death", [2], step=3)
+        self.ee.emit("death", [4])
+
+        self.assertEqual(self.ee.pending(), ["placed", "death", "placed", "death"])
+        self.ee.flush()
+        self.assertEqual(self.received, [("placed", ((0, 0), True), {}),
+                                         ("death", ([1, 4],), {}),
+                                         ("placed", ((1, 0), False), {}),
+                                         ("death", ([2],), {"step": 3})])
+
+    def test_registered_merger(self):
+        self.ee.defer()
+        self.ee.merge("death", lambda batches, new_batches: batches + new_batches)
+        self.ee.emit("death", [1])
+        self.ee.emit("escape", [2])
+        self.ee.emit("death", [3])
+
+        self.ee.flush()
+        self.assertEqual(self.received, [("death", ([1], [3]), {}),
+                                         ("escape", ([2],), {})])
+
+    def test_events_emitted_during_flush_wait_for_next_flush(self):
+        self.ee.on("cleared", lambda: self.ee.emit("death", [9]))
+        self.ee.defer()
+        self.ee.emit("death", [1])
+        self.ee.emit("cleared")
+
+        self.ee.flush()
+        self.assertEqual(self.received, [("death", ([1],), {}), ("cleared", (), {})])
+        self.assertEqual(self.ee.pending(), ["death"])
+
+        self.ee.flush()
+        self.assertEqual(self.received[-1], ("death", ([9],), {}))
+
+    def test_undeferring_flushes(self):
+        self.ee.defer()
+        self.ee.emit("escape", [1])
+        self.ee.defer(False)
+        self.assertEqual(self.received, [("escape", ([1],), {})])
+
+        self.ee.emit("escape", [2])
+        self.assertEqual(self.received[-1], ("escape", ([2],), {}))
+        self.assertEqual(self.ee.pending(), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
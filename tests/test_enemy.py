@@ -0,0 +1,96 @@
+"""Tests for the storage & spawning of enemies"""
+
+import unittest
+
+from . import ROOT  # noqa: F401, adds the game's modules to the import path
+
+from enemy import SimpleEnemy, SteelEnemy, SpawnQueue
+from pool import PoolRegistry
+
+CELL_SIZE = 60
+
+
+class SpawnQueueTest(unittest.TestCase):
+    """Queued waves are merged in order of step, & created only as they spawn"""
+
+    def pop_all(self, queue, last_step=1000):
+        """(list<tuple<int, AbstractEnemy>>) Returns each (step, enemy) spawned up to 'last_step'"""
+        return [(step, enemy) for step in range(last_step + 1) for enemy in queue.pop(step)]
+
+    def test_waves_are_merged_by_step(self):
+        queue = SpawnQueue(CELL_SIZE)
+        queue.push([(5, SimpleEnemy), (1, SimpleEnemy), (9, SimpleEnemy)])
+        queue.push(iter([(2, SteelEnemy), (5, SteelEnemy), (7, SteelEnemy)]))
+        queue.push([(3, SimpleEnemy)], offset=2)
+
+        spawned = [(step, type(enemy)) for step, enemy in self.pop_all(queue)]
+
+        # lists are sorted, & equal steps spawn in the order their waves were queued
+        self.assertEqual(spawned, [(1, SimpleEnemy), (2, SteelEnemy), (5, SimpleEnemy), (5, SteelEnemy),
+                                   (5, SimpleEnemy), (7, SteelEnemy), (9, SimpleEnemy)])
+        self.assertTrue(all(enemy.cell_size == CELL_SIZE for _, enemy in self.pop_all(queue)))
+
+    def test_waves_are_generated_lazily(self):
+        generated = []
+
+        def wave():
+            for step in range(0, 100, 10):
+                generated.append(step)
+                yield step, SimpleEnemy
+
+        queue = SpawnQueue(CELL_SIZE)
+        queue.push(wave())
+        self.assertEqual(generated, [0])
+
+        spawned = list(queue.pop(25))
+        self.assertEqual(len(spawned), 3)
+        self.assertEqual(generated, [0, 10, 20, 30])
+
+    def test_bool_and_wave_count(self):
+        queue = SpawnQueue(CELL_SIZE)
+        self.assertFalse(queue)
+        self.assertEqual(queue.wave_count(), 0)
+
+        queue.push([(1, SimpleEnemy), (2, SimpleEnemy)])
+        queue.push(iter([(1, SimpleEnemy)]))
+        queue.push([])
+        self.assertTrue(queue)
+        self.assertEqual(queue.wave_count(), 2)
+
+        list(queue.pop(1))
+        self.assertEqual(queue.wave_count(), 1)
+        list(queue.pop(2))
+        self.assertFalse(queue)
+
+        with self.assertRaises(TypeError):
+            len(queue)
+
+    def test_pending_creates_nothing(self):
+        created = SimpleEnemy()
+        queue = SpawnQueue(CELL_SIZE)
+        queue.push(iter([(4, SimpleEnemy), (6, created)]))
+        queue.push([(5, SteelEnemy)])
+
+        self.assertEqual(queue.pending(), [(4, SimpleEnemy), (5, SteelEnemy), (6, created)])
+
+        # the same enemies still spawn
+        spawned = self.pop_all(queue)
+        self.assertEqual([(step, type(enemy)) for step, enemy in spawned],
+                         [(4, SimpleEnemy), (5, SteelEnemy), (6, SimpleEnemy)])
+        self.assertIs(spawned[2][1], created)
+
+    def test_classes_are_acquired_from_pools(self):
+        pools = PoolRegistry()
+        released = SimpleEnemy(CELL_SIZE)
+        pools.release(released)
+
+        queue = SpawnQueue(CELL_SIZE, pools)
+        queue.push([(1, SimpleEnemy), (2, SimpleEnemy)])
+        first, second = (enemy for _, enemy in self.pop_all(queue))
+
+        self.assertIs(first, released)
+        self.assertIsNot(second, released)
+
+
+if __name__ == '__main__':
+    unittest.main()
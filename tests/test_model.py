@@ -0,0 +1,69 @@
+"""Tests for the behaviour of TowerGame"""
+
+import unittest
+
+from . import ROOT  # noqa: F401, adds the game's modules to the import path
+
+from model import TowerGame
+from tower import SimpleTower, MissileTower
+
+
+class TowerChangesTest(unittest.TestCase):
+    """Towers that change are tracked only while a consumer asks for them"""
+
+    def test_untracked_by_default(self):
+        game = TowerGame()
+        snapshot = game.snapshot()
+
+        for _ in range(20):
+            game.place((2, 2))
+            game.remove((2, 2))
+            game.restore(snapshot)
+
+        self.assertEqual(game.pop_tower_changes(), (set(), set()))
+        self.assertFalse(game._removed_towers)
+
+    def test_tracked(self):
+        game = TowerGame()
+        game.place((1, 1))
+        game.track_changes = True
+
+        # enabling marks every current tower as changed
+        first = game.towers[(1, 1)]
+        self.assertEqual(game.pop_tower_changes(), ({first}, set()))
+
+        game.place((3, 3), tower_type=MissileTower)
+        second = game.towers[(3, 3)]
+        first.level += 1
+        self.assertEqual(game.pop_tower_changes(), ({first, second}, set()))
+        self.assertEqual(game.pop_tower_changes(), (set(), set()))
+
+        game.remove((1, 1))
+        self.assertEqual(game.pop_tower_changes(), (set(), {first}))
+
+        # towers that haven't changed aren't returned again
+        second.rotation = second.rotation
+        self.assertEqual(game.pop_tower_changes(), (set(), set()))
+
+        game.track_changes = False
+        game.remove((3, 3))
+        self.assertEqual(game.pop_tower_changes(), (set(), set()))
+        self.assertIsNone(second.changes)
+
+    def test_restore_tracks_restored_towers(self):
+        game = TowerGame()
+        game.place((1, 1), tower_type=SimpleTower)
+        data = game.snapshot()
+
+        game.track_changes = True
+        old = game.towers[(1, 1)]
+        game.pop_tower_changes()
+
+        game.restore(data)
+        changed, removed = game.pop_tower_changes()
+        self.assertEqual(changed, {game.towers[(1, 1)]})
+        self.assertEqual(removed, {old})
+
+
+if __name__ == '__main__':
+    unittest.main()
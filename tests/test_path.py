@@ -0,0 +1,78 @@
+"""Tests for incremental path updates"""
+
+import random
+import unittest
+
+from . import ROOT  # noqa: F401, adds the game's modules to the import path
+
+from modules.matrix import get_adjacent_cells
+from path import Path
+
+COLUMNS, ROWS = 8, 6
+START, END = (-1, 1), (COLUMNS, 1)
+BOUNDS = (-1, 0), (COLUMNS, ROWS - 1)
+
+
+def make_get_neighbours(blocked):
+    """Returns a get_neighbours function for a grid with the 'blocked' cells removed"""
+    def get_neighbours(cell, from_=True):  # pylint: disable=unused-argument
+        for node in get_adjacent_cells(cell):
+            column, row = node
+            if (0 <= column < COLUMNS and 0 <= row < ROWS and node not in blocked) \
+                    or node == START or node == END:
+                yield node
+
+    return get_neighbours
+
+
+def get_grids(path):
+    """(tuple) Returns the distances & flow field of 'path', for comparison"""
+    return (dict(path.distances), list(path.distance_grid), list(path.flow), list(path.flow_masks),
+            list(path.get_shortest()))
+
+
+class IncrementalPathTest(unittest.TestCase):
+    """Path.block & Path.unblock give the same path as generating it afresh"""
+
+    def assert_rebuilt(self, path, blocked):
+        rebuilt = Path(START, END, make_get_neighbours(set(blocked)), bounds=BOUNDS)
+        self.assertEqual(get_grids(path), get_grids(rebuilt))
+
+    def test_random_block_unblock(self):
+        cells = [(column, row) for column in range(COLUMNS) for row in range(ROWS)]
+
+        for seed in range(20):
+            rng = random.Random(seed)
+            blocked = set()
+            path = Path(START, END, make_get_neighbours(blocked), bounds=BOUNDS)
+
+            for _ in range(60):
+                cell = rng.choice(cells)
+
+                if cell in blocked:
+                    blocked.remove(cell)
+                    path.unblock(cell)
+                else:
+                    blocked.add(cell)
+                    before = get_grids(path)
+                    try:
+                        path.block(cell)
+                    except KeyError:
+                        # the path is left unchanged if the end can't be reached
+                        blocked.remove(cell)
+                        self.assertEqual(get_grids(path), before)
+                        continue
+
+                self.assert_rebuilt(path, blocked)
+
+    def test_block_unreachable_cell(self):
+        blocked = {(2, 2)}
+        path = Path(START, END, make_get_neighbours(blocked), bounds=BOUNDS)
+
+        # blocking a cell already off the path changes nothing
+        path.block((2, 2))
+        self.assert_rebuilt(path, blocked)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,56 @@
+"""Tests for the legality of tower placements"""
+
+import random
+import unittest
+
+from . import ROOT  # noqa: F401, adds the game's modules to the import path
+
+from model import TowerGame
+
+COLUMNS, ROWS = 8, 6
+
+
+class BlockingCellsTest(unittest.TestCase):
+    """TowerGame.blocking_cells finds exactly the cells in which a tower would block the path"""
+
+    def get_blocking_cells(self, game):
+        """(set<tuple<int, int>>) Returns the blocking cells, by trying a tower in each free cell"""
+        columns, rows = game.grid.cells
+        blocking = set()
+        for cell in ((column, row) for column in range(columns) for row in range(rows)):
+            if cell in game.towers:
+                continue
+            try:
+                game.generate_path(cell)
+            except KeyError:
+                blocking.add(cell)
+
+        return blocking
+
+    def test_random_layouts(self):
+        for seed in range(4):
+            rng = random.Random(seed)
+            game = TowerGame(size=(COLUMNS, ROWS))
+            cells = [(column, row) for column in range(COLUMNS) for row in range(ROWS)]
+            rng.shuffle(cells)
+
+            for cell in cells[:24]:
+                game.place(cell)
+                self.assertEqual(set(game.blocking_cells()), self.get_blocking_cells(game))
+
+            for cell in list(game.towers)[::2]:
+                game.remove(cell)
+                self.assertEqual(set(game.blocking_cells()), self.get_blocking_cells(game))
+
+    def test_blocking_cells_cannot_be_placed(self):
+        game = TowerGame(size=(COLUMNS, ROWS))
+        for row in range(ROWS - 1):
+            game.place((3, row))
+
+        # the only gap left in the wall
+        self.assertEqual(game.blocking_cells() & {(3, ROWS - 1)}, {(3, ROWS - 1)})
+        self.assertFalse(game.place((3, ROWS - 1)))
+
+
+if __name__ == '__main__':
+    unittest.main()
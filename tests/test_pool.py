@@ -0,0 +1,108 @@
+"""Tests for reusing units from pools"""
+
+import unittest
+
+from . import ROOT  # noqa: F401, adds the game's modules to the import path
+
+from enemy import SimpleEnemy, SteelEnemy
+from model import TowerGame
+from pool import ObjectPool, PoolRegistry
+from tower import Missile
+
+
+class ObjectPoolTest(unittest.TestCase):
+    """Released objects are reset & reused before more are constructed"""
+
+    def test_reuse(self):
+        pool = ObjectPool(SimpleEnemy)
+        first = pool.acquire(30)
+        second = pool.acquire(30)
+        self.assertIsNot(first, second)
+
+        first.damage(first.max_health / 2, 'projectile')
+        first.position = (10, 10)
+        pool.release(first)
+        self.assertEqual(len(pool), 1)
+
+        reused = pool.acquire(60)
+        self.assertIs(reused, first)
+        self.assertEqual(reused.health, reused.max_health)
+        self.assertEqual(reused.position, (None, None))
+        self.assertEqual(reused.cell_size, 60)
+
+        self.assertEqual(pool.get_stats(), {'created': 2, 'reused': 1, 'released': 1, 'discarded': 0,
+                                            'free': 0, 'in_use': 2, 'peak_in_use': 2})
+
+    def test_max_free(self):
+        pool = ObjectPool(SimpleEnemy, max_free=2)
+        pool.release_all([SimpleEnemy(30) for _ in range(3)])
+
+        self.assertEqual(len(pool), 2)
+        self.assertEqual(pool.discarded, 1)
+
+        pool.clear()
+        self.assertEqual(len(pool), 0)
+
+    def test_registry_pools_by_exact_class(self):
+        pools = PoolRegistry()
+        simple, steel = SimpleEnemy(30), SteelEnemy(30)
+        pools.release(simple)
+        pools.release(steel)
+
+        self.assertIs(pools.get(SteelEnemy).acquire(30), steel)
+        self.assertIs(pools.get(SimpleEnemy).acquire(30), simple)
+        self.assertEqual(set(pools.get_stats()), {'SimpleEnemy', 'SteelEnemy'})
+
+        # other games have their own pools
+        self.assertIsNot(TowerGame().pools.get(SimpleEnemy), TowerGame().pools.get(SimpleEnemy))
+
+
+class GamePoolTest(unittest.TestCase):
+    """Enemies that leave play are reused once nothing refers to them"""
+
+    def setUp(self):
+        self.game = TowerGame()
+
+    def spawn(self):
+        """(AbstractEnemy) Spawns a single SimpleEnemy"""
+        self.game.queue_wave([(1, SimpleEnemy)])
+        for _ in range(4):
+            self.game.step()
+
+        enemy, = self.game.enemies
+        return enemy
+
+    def kill(self, enemy):
+        """Kills 'enemy', & steps until it has left play"""
+        enemy.damage(enemy.max_health, 'projectile')
+        for _ in range(2):
+            self.game.step()
+        self.assertNotIn(enemy, self.game.enemies)
+
+    def test_dead_enemies_are_reused(self):
+        enemy = self.spawn()
+        self.kill(enemy)
+
+        reused = self.spawn()
+        self.assertIs(reused, enemy)
+        self.assertEqual(reused.health, reused.max_health)
+
+    def test_targeted_enemies_are_kept(self):
+        enemy = self.spawn()
+
+        # a missile far behind its target, which escapes alive
+        missile = Missile(self.game.grid.cell_size, enemy)
+        missile.position = (0, 300)
+        self.game.obstacles.append(missile)
+        enemy.position = self.game.grid.cell_to_pixel_centre(self.game.path.end)
+
+        while enemy in self.game.enemies:
+            self.game.step()
+
+        # still chased by the missile, so not reused
+        self.assertIs(missile.target, enemy)
+        self.assertIsNot(self.spawn(), enemy)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,67 @@
+"""Tests for publishing the state of a game between processes"""
+
+import unittest
+
+from . import ROOT  # noqa: F401, adds the game's modules to the import path
+
+from model import TowerGame
+from remote import SnapshotLayout, SnapshotReader, SnapshotWriter, TOWER_FIELDS
+from tower import SimpleTower, MissileTower
+
+
+class SnapshotSerialTest(unittest.TestCase):
+    """Units are published with serials that are never reused"""
+
+    def setUp(self):
+        layout = SnapshotLayout(64, 16, 64)
+        self.buffer = bytearray(layout.size)
+        self.writer = SnapshotWriter(self.buffer, layout)
+        self.reader = SnapshotReader(self.buffer, layout)
+
+    def tearDown(self):
+        self.writer.release()
+        self.reader.release()
+
+    def read_towers(self):
+        """(dict<int, int>) Returns the type of each published tower, by serial"""
+        _, _, _, towers, _ = self.reader.read()
+        return {int(towers[i]): int(towers[i + 1]) for i in range(0, len(towers), len(TOWER_FIELDS))}
+
+    def test_replaced_towers_get_new_serials(self):
+        game = TowerGame()
+        game.place((2, 2), tower_type=SimpleTower)
+        self.writer.write(game, 0)
+        first = self.read_towers()
+
+        serials = set(first)
+        for step in range(1, 50):
+            # freed towers' ids are likely to be reused by the next tower
+            game.remove((2, 2))
+            game.place((2, 2), tower_type=MissileTower if step % 2 else SimpleTower)
+            self.writer.write(game, step)
+
+            towers = self.read_towers()
+            self.assertEqual(len(towers), 1)
+            self.assertTrue(serials.isdisjoint(towers))
+            serials.update(towers)
+
+    def test_units_keep_their_serials(self):
+        game = TowerGame()
+        game.place((2, 2), tower_type=SimpleTower)
+        game.send_wave(enemies=5, steps=5)
+        for _ in range(40):
+            game.step()
+        self.writer.write(game, 40)
+        _, _, enemies, _, _ = self.reader.read()
+        towers = self.read_towers()
+        self.assertTrue(enemies)
+
+        game.place((4, 4), tower_type=SimpleTower)
+        self.writer.write(game, 40)
+
+        self.assertEqual(self.reader.read()[2], enemies)
+        self.assertLess(set(towers), set(self.read_towers()))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,99 @@
+"""Tests for recording & replaying the inputs to a game"""
+
+import unittest
+
+from . import ROOT  # noqa: F401, adds the game's modules to the import path
+
+from a3 import MyLevel
+from enemy import SimpleEnemy, SteelEnemy
+from model import TowerGame
+from replay import InputRecorder, parse, replay, write_varint, DEFINE_ENEMY, DEFINE_TYPE, HEADER, MAGIC, PLACE, VERSION
+from simulation import HeadlessGame
+from tower import SimpleTower, MissileTower, PulseTower
+
+TOWERS = [((1, 1), MissileTower), ((3, 2), SimpleTower), ((1, 4), PulseTower), ((4, 4), SimpleTower)]
+
+
+class ReplayTest(unittest.TestCase):
+    """Replaying a recorded log reproduces the recorded game"""
+
+    def test_headless_game(self):
+        simulation = HeadlessGame(MyLevel(), towers=TOWERS, seed=7, record=True)
+        simulation.run(max_steps=1500)
+        data = simulation.recorder.finish()
+
+        result = replay(data)
+        self.assertTrue(result.is_verified())
+        self.assertEqual(result.state_hash, simulation.game.state_hash())
+
+    def test_commands_between_steps(self):
+        game = TowerGame(seed=11)
+        recorder = InputRecorder(game)
+        level = MyLevel(seed=11)
+
+        game.place((2, 2), tower_type=MissileTower)
+        game.queue_wave(level.get_wave(8))
+        for step in range(900):
+            if step == 100:
+                game.place((4, 1), tower_type=PulseTower)
+            elif step == 250:
+                game.remove((2, 2))
+                game.send_wave(enemies=10, steps=20)
+            elif step == 400:
+                damaged = SteelEnemy()
+                damaged.health = 120
+                game.queue_wave([(5, SimpleEnemy), (9, damaged)], clear=True)
+            game.step()
+
+        data = recorder.finish()
+        self.assertTrue(replay(data).is_verified())
+
+    def test_different_game_is_not_verified(self):
+        game = TowerGame(seed=5)
+        recorder = InputRecorder(game)
+        game.send_wave()
+        for _ in range(300):
+            game.step()
+        data = recorder.finish()
+
+        # the same inputs from a different state end in a different state
+        other = TowerGame(seed=5)
+        other.place((3, 3), tower_type=SimpleTower)
+        self.assertFalse(replay(data, game=other).is_verified())
+
+
+    def test_enemy_factories_are_rejected(self):
+        game = TowerGame(seed=5)
+        InputRecorder(game)
+
+        with self.assertRaises(ValueError):
+            game.queue_wave([(10, lambda: SimpleEnemy())])
+
+    def test_unregistered_types_are_rejected(self):
+        def make_log(name, *commands):
+            buffer = bytearray(HEADER.pack(MAGIC, VERSION, 6, 6, 60, 1))
+            buffer.append(DEFINE_TYPE)
+            write_varint(buffer, len(name))
+            buffer += name
+            for command in commands:
+                buffer.append(command[0])
+                for operand in command[1:]:
+                    write_varint(buffer, operand)
+            return bytes(buffer)
+
+        # names are never imported, & nothing is created from them
+        with self.assertRaises(ValueError):
+            parse(make_log(b'builtins:print', (DEFINE_ENEMY, 0, 0)))
+        with self.assertRaises(ValueError):
+            parse(make_log(b'os:system', (PLACE, 0, 0, 1, 1, 0)))
+
+        # registered types must be in the category of the command using them
+        with self.assertRaises(ValueError):
+            parse(make_log(b'SimpleTower', (DEFINE_ENEMY, 0, 0)))
+        with self.assertRaises(ValueError):
+            parse(make_log(b'SimpleEnemy', (PLACE, 0, 0, 1, 1, 0)))
+        parse(make_log(b'SimpleTower', (PLACE, 0, 0, 1, 1, 0)))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,117 @@
+"""Tests for snapshotting & restoring the state of a game"""
+
+import unittest
+
+from . import ROOT  # noqa: F401, adds the game's modules to the import path
+
+from a3 import MyLevel
+from enemy import SimpleEnemy
+from model import TowerGame
+from tower import SimpleTower, MissileTower, PulseTower
+
+TOWERS = [((1, 1), MissileTower), ((3, 2), SimpleTower), ((1, 4), PulseTower),
+          ((4, 4), MissileTower), ((5, 1), SimpleTower)]
+
+
+def make_game(seed=3):
+    """(TowerGame) Returns a game with towers placed & a wave of enemies queued"""
+    game = TowerGame(seed=seed)
+    for cell, tower_type in TOWERS:
+        game.place(cell, tower_type=tower_type)
+
+    game.queue_wave(MyLevel(seed=seed).get_wave(12))
+    return game
+
+
+def run(game, steps):
+    """Steps 'game' the given number of times"""
+    for _ in range(steps):
+        game.step()
+
+
+class SnapshotTest(unittest.TestCase):
+    """A restored snapshot has the same state as the game it was taken from"""
+
+    def setUp(self):
+        self.game = make_game()
+        run(self.game, 150)
+
+        # ensure enemies, missiles & unspawned enemies are all captured
+        self.assertTrue(self.game.enemies)
+        self.assertTrue(self.game.obstacles)
+        self.assertTrue(self.game._unspawned_enemies)
+
+        self.data = self.game.snapshot()
+        self.hash = self.game.state_hash()
+
+    def test_restore_into_new_game(self):
+        game = TowerGame()
+        game.restore(self.data)
+
+        self.assertEqual(game.state_hash(), self.hash)
+        self.assertEqual(game.snapshot(), self.data)
+
+    def test_restored_game_steps_identically(self):
+        game = TowerGame()
+        game.restore(self.data)
+
+        run(self.game, 300)
+        run(game, 300)
+        self.assertEqual(game.state_hash(), self.game.state_hash())
+
+    def test_rewind(self):
+        run(self.game, 300)
+        expected = self.game.state_hash()
+
+        # diverge from the snapshot before rewinding to it
+        self.game.restore(self.data)
+        self.game.send_wave(enemies=30, steps=2)
+        run(self.game, 10)
+
+        self.game.restore(self.data)
+        self.assertEqual(self.game.state_hash(), self.hash)
+
+        run(self.game, 300)
+        self.assertEqual(self.game.state_hash(), expected)
+
+    def test_corrupt_snapshot(self):
+        with self.assertRaises(ValueError):
+            TowerGame().restore(self.data[:-1])
+        with self.assertRaises(ValueError):
+            TowerGame().restore(b'XXXX' + self.data[4:])
+
+
+    def test_unknown_types_are_rejected(self):
+        # names are only resolved through the registry, never imported
+        self.assertIn(b'SimpleTower', self.data)
+        with self.assertRaises(ValueError):
+            TowerGame().restore(self.data.replace(b'SimpleTower', b'os:system()'))
+
+        # & must be in the category of the record using them
+        with self.assertRaises(ValueError):
+            TowerGame().restore(self.data.replace(b'SimpleTower', b'SimpleEnemy'))
+
+    def test_enemy_factories_are_rejected(self):
+        game = TowerGame()
+        game.queue_wave([(10, SimpleEnemy), (20, lambda: SimpleEnemy())])
+
+        with self.assertRaises(TypeError):
+            game.snapshot()
+
+    def test_created_enemies_keep_their_health(self):
+        damaged = SimpleEnemy()
+        damaged.health = 40
+
+        game = TowerGame()
+        game.queue_wave([(10, SimpleEnemy), (20, damaged)])
+        restored = TowerGame()
+        restored.restore(game.snapshot())
+
+        run(game, 30)
+        run(restored, 30)
+        self.assertEqual([enemy.health for enemy in restored.enemies], [100, 40])
+        self.assertEqual(restored.state_hash(), game.state_hash())
+
+
+if __name__ == '__main__':
+    unittest.main()
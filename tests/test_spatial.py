@@ -0,0 +1,93 @@
+"""Tests for querying positions with SpatialHash"""
+
+import random
+import unittest
+
+from . import ROOT  # noqa: F401, adds the game's modules to the import path
+
+from model import GridCoordinateTranslator
+from spatial import SpatialHash
+
+CELL_SIZE = 60
+
+
+class SpatialHashTest(unittest.TestCase):
+    """Queries give the same results as a brute-force scan of every position"""
+
+    def setUp(self):
+        self.index = SpatialHash(GridCoordinateTranslator(cell_size=CELL_SIZE))
+
+    def random_positions(self, rng, count):
+        xs = [rng.uniform(-CELL_SIZE, 8 * CELL_SIZE) for _ in range(count)]
+        ys = [rng.uniform(-CELL_SIZE, 6 * CELL_SIZE) for _ in range(count)]
+        return xs, ys
+
+    def test_query_box(self):
+        rng = random.Random(4)
+
+        for count in (0, 1, 5, 50):
+            xs, ys = self.random_positions(rng, count)
+            self.index.rebuild(xs, ys)
+            self.assertEqual(len(self.index), count)
+
+            for _ in range(20):
+                left, right = sorted(rng.uniform(-2 * CELL_SIZE, 9 * CELL_SIZE) for _ in range(2))
+                top, bottom = sorted(rng.uniform(-2 * CELL_SIZE, 7 * CELL_SIZE) for _ in range(2))
+                cells = self.index.get_cells_in_box((left, top), (right, bottom))
+
+                found = self.index.query(*cells)
+
+                # every position in the box is found, in ascending order
+                self.assertEqual(found, sorted(found))
+                expected = [i for i in range(count) if left <= xs[i] <= right and top <= ys[i] <= bottom]
+                self.assertTrue(set(expected) <= set(found))
+
+                (first_column, first_row), (last_column, last_row) = cells
+                self.assertEqual(found, [i for i in range(count)
+                                         if first_column <= xs[i] // CELL_SIZE <= last_column
+                                         and first_row <= ys[i] // CELL_SIZE <= last_row])
+
+    def test_query_cells(self):
+        xs, ys = [30, 90, 35, 150, 100], [30, 30, 50, 90, 40]
+        self.index.rebuild(xs, ys)
+
+        self.assertEqual(self.index.query_cells([(1, 0), (0, 0)]), [0, 1, 2, 4])
+        self.assertEqual(self.index.query_cells([(2, 1)]), [3])
+        self.assertEqual(self.index.query_cells([(5, 5)]), [])
+
+    def test_nearest(self):
+        rng = random.Random(5)
+
+        for count in (1, 5, 50):
+            xs, ys = self.random_positions(rng, count)
+            self.index.rebuild(xs, ys)
+
+            for _ in range(20):
+                position = rng.uniform(-3 * CELL_SIZE, 10 * CELL_SIZE), rng.uniform(-3 * CELL_SIZE, 8 * CELL_SIZE)
+                accept = (lambda i: i % 3 != 0) if rng.random() < .5 else None
+                x, y = position
+
+                accepted = [i for i in range(count) if accept is None or accept(i)]
+                expected = min(accepted, key=lambda i: ((xs[i] - x) ** 2 + (ys[i] - y) ** 2, i),
+                               default=None)
+
+                self.assertEqual(self.index.nearest(position, xs, ys, accept=accept), expected)
+
+    def test_nearest_ties_broken_by_index(self):
+        xs, ys = [130, 50, 90], [90, 90, 130]
+        self.index.rebuild(xs, ys)
+
+        self.assertEqual(self.index.nearest((90, 90), xs, ys), 0)
+        self.assertEqual(self.index.nearest((90, 90), xs, ys, accept=lambda i: i != 0), 1)
+
+    def test_empty(self):
+        self.index.rebuild([1, 2], [1, 2])
+        self.index.clear()
+
+        self.assertEqual(len(self.index), 0)
+        self.assertEqual(self.index.query((0, 0), (5, 5)), [])
+        self.assertIsNone(self.index.nearest((0, 0), [], []))
+
+
+if __name__ == '__main__':
+    unittest.main()
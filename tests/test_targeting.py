@@ -0,0 +1,65 @@
+"""Tests for ranking enemies by progress & the policies towers target them by"""
+
+import unittest
+
+from . import ROOT  # noqa: F401, adds the game's modules to the import path
+
+from model import TowerGame
+from targeting import ProgressIndex, FIRST, LAST, STRONGEST, CLOSEST
+
+
+class TargetingTest(unittest.TestCase):
+    """Enemies are ranked by remaining distance, & chosen by each policy"""
+
+    def setUp(self):
+        # the path runs straight along row 1, from column -1 to 6
+        self.game = TowerGame()
+        self.index = ProgressIndex(self.game.grid)
+
+    def rebuild(self, positions):
+        xs = [x for x, _ in positions]
+        ys = [y for _, y in positions]
+        self.index.rebuild(xs, ys, self.game.path)
+        return xs, ys
+
+    def test_ranked_by_remaining_distance(self):
+        # slot 3 is furthest along, slots 0 & 2 are tied, & slot 4 is off the path
+        self.rebuild([(100, 90), (40, 90), (100, 90), (250, 90), (150, 330)])
+
+        self.assertEqual(self.index.order, [3, 0, 2, 1, 4])
+        self.assertEqual(list(self.index.ranks), [1, 3, 2, 0, 4])
+        self.assertEqual(len(self.index), 5)
+
+    def test_progress_within_a_cell(self):
+        self.rebuild([(61, 90), (119, 90), (90, 90)])
+        self.assertEqual(self.index.order, [1, 2, 0])
+
+    def test_overtaking(self):
+        self.rebuild([(100, 90), (200, 90)])
+        self.assertEqual(self.index.order, [1, 0])
+
+        self.rebuild([(300, 90), (200, 90)])
+        self.assertEqual(self.index.order, [0, 1])
+
+    def test_policies(self):
+        positions = [(40, 90), (100, 90), (250, 90), (160, 90)]
+        xs, ys = self.rebuild(positions)
+        healths = [5, 20, 10, 20]
+        candidates = [0, 1, 2, 3]
+
+        def select(policy, candidates=candidates):
+            return self.index.select(policy, candidates, healths=healths, xs=xs, ys=ys, position=(90, 30))
+
+        self.assertEqual(select(FIRST), 2)
+        self.assertEqual(select(LAST), 0)
+        self.assertEqual(select(STRONGEST), 3)  # tied on health, so the first
+        self.assertEqual(select(CLOSEST), 1)
+        self.assertEqual(select(FIRST, [0, 1]), 1)
+        self.assertIsNone(select(FIRST, []))
+
+        with self.assertRaises(ValueError):
+            select('random')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,151 @@
+"""Tests for towers & their projectiles attacking enemies"""
+
+import math
+import random
+import unittest
+
+from . import ROOT  # noqa: F401, adds the game's modules to the import path
+
+from enemy import SimpleEnemy
+from model import TowerGame
+from tower import Missile, PulseTower
+
+CELL_SIZE = 60
+
+
+def make_enemy(position, health=None):
+    """(SimpleEnemy) Returns an enemy, not in play, at 'position'"""
+    enemy = SimpleEnemy(CELL_SIZE)
+    enemy.position = position
+    if health is not None:
+        enemy.health = health
+    return enemy
+
+
+class MissileRetargetingTest(unittest.TestCase):
+    """Missiles whose target dies are retargeted to the nearest live enemy"""
+
+    def make_missile(self, target, position=(0, 0), rotation=0.):
+        missile = Missile(CELL_SIZE, target, rotation=rotation)
+        missile.position = position
+        return missile
+
+    def test_moves_toward_live_target(self):
+        target = make_enemy((100, 0))
+        missile = self.make_missile(target)
+
+        self.assertEqual(Missile.step_all([missile]), [missile])
+        self.assertEqual(missile.position, (Missile.speed * CELL_SIZE, 0))
+        self.assertEqual(missile.rotation, 0)
+
+    def test_hits_target_in_reach(self):
+        target = make_enemy((10, 0))
+        missile = self.make_missile(target)
+
+        self.assertEqual(Missile.step_all([missile]), [])
+        self.assertEqual(target.health, max(0, target.max_health - Missile.damage))
+
+    def test_retargets_when_target_dies(self):
+        dead = make_enemy((100, 0), health=0)
+        live = make_enemy((0, 100))
+        missile = self.make_missile(dead)
+        searched = []
+
+        def find_target(position):
+            searched.append(position)
+            return live
+
+        self.assertEqual(Missile.step_all([missile], find_target=find_target), [missile])
+        self.assertEqual(searched, [(0, 0)])
+        self.assertIs(missile.target, live)
+
+        # turns toward the new target by at most a sixth of a turn
+        self.assertAlmostEqual(missile.rotation, math.pi / 3)
+
+    def test_finishes_without_target(self):
+        missile = self.make_missile(make_enemy((100, 0), health=0))
+
+        self.assertEqual(Missile.step_all([missile], find_target=lambda position: None), [])
+        self.assertEqual(Missile.step_all([missile]), [])
+
+    def test_game_retargets_nearest_live_enemy(self):
+        game = TowerGame()
+        game.queue_wave([(1, SimpleEnemy), (1, SimpleEnemy), (1, SimpleEnemy)])
+        for _ in range(4):
+            game.step()
+
+        near, dead, far = game.enemies
+        near.position, dead.position, far.position = (150, 90), (100, 90), (300, 90)
+        missile = self.make_missile(dead, position=(100, 200), rotation=-math.pi / 2)
+        game.obstacles.append(missile)
+        dead.health = 0
+
+        game.step()
+        game.step()
+
+        self.assertIs(missile.target, near)
+        self.assertIn(missile, game.obstacles)
+
+
+class AreaAttackTest(unittest.TestCase):
+    """Towers with an area of effect damage every live enemy in range at once"""
+
+    def setUp(self):
+        self.game = TowerGame()
+        self.game.place((2, 2), tower_type=PulseTower)
+        self.tower = self.game.towers[(2, 2)]
+
+    def spawn(self, count):
+        """(list<AbstractEnemy>) Spawns 'count' SimpleEnemies"""
+        self.game.queue_wave([(1, SimpleEnemy)] * count)
+        for _ in range(4):
+            self.game.step()
+
+        return list(self.game.enemies)
+
+    def test_pulse_kills_every_enemy_in_range(self):
+        deaths = []
+        self.game.on("enemy_death", deaths.extend)
+
+        weak, strong, far = self.spawn(3)
+        weak.position, strong.position, far.position = (150, 90), (140, 90), (250, 90)
+        weak.health = PulseTower.damage
+
+        self.game._step_towers()
+
+        self.assertEqual(weak.health, 0)
+        self.assertEqual(strong.health, strong.max_health - PulseTower.damage)
+        self.assertEqual(far.health, far.max_health)
+
+        # the dead are removed once enemies next step, & the tower has to cool down
+        self.game._step_enemies()
+        self.assertEqual(deaths, [weak])
+        self.assertEqual(self.game.enemies, [strong, far])
+
+        self.game._step_towers()
+        self.assertEqual(strong.health, strong.max_health - PulseTower.damage)
+
+    def test_matches_brute_force(self):
+        rng = random.Random(25)
+        enemies = self.spawn(40)
+        x, y = self.tower.position
+
+        for _ in range(10):
+            for enemy in enemies:
+                enemy.position = x + rng.uniform(-200, 200), y + rng.uniform(-200, 200)
+                enemy.health = rng.choice((0, enemy.max_health))
+
+            expected = [enemy for enemy in enemies
+                        if enemy.health > 0 and self.tower.is_position_in_range(enemy.position)]
+            self.assertTrue(expected)
+            healths = [enemy.health for enemy in enemies]
+
+            self.tower.cool_down.current = 0
+            self.game._step_towers()
+
+            damaged = [enemy for enemy, health in zip(enemies, healths) if enemy.health != health]
+            self.assertEqual(damaged, expected)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,125 @@
+"""Tests for pacing steps with Stepper"""
+
+import unittest
+from unittest import mock
+
+from . import ROOT  # noqa: F401, adds the game's modules to the import path
+
+import utilities
+from utilities import Stepper
+
+DELAY = 125  # milliseconds, so intervals are exact in binary
+INTERVAL = DELAY / 1000
+
+
+class FakeMaster:
+    """Records the callbacks scheduled with after, instead of running a tkinter loop"""
+
+    def __init__(self):
+        self.scheduled = []
+
+    def after(self, delay, func):
+        self.scheduled.append((delay, func))
+        return len(self.scheduled)
+
+    def after_cancel(self, after_id):
+        pass
+
+
+class CountingStepper(Stepper):
+    """Counts steps & renders"""
+
+    def __init__(self, master, steps=None, **kwargs):
+        super().__init__(master, delay=DELAY, fixed_timestep=True, **kwargs)
+        self.steps = 0
+        self.renders = []
+        self.max_steps = steps
+
+    def _step(self):
+        self.steps += 1
+        return self.max_steps is None or self.steps < self.max_steps
+
+    def _render(self):
+        self.renders.append(self.steps)
+
+
+class FixedTimestepTest(unittest.TestCase):
+    """Steps are paced by real elapsed time, catching up to a cap & rendering once"""
+
+    def setUp(self):
+        self.now = 100.
+        patcher = mock.patch.object(utilities.time, 'perf_counter', lambda: self.now)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.master = FakeMaster()
+
+    def tick(self, intervals):
+        """(int) Advances the clock by a number of intervals, runs the scheduled step
+        & returns the delay until the next, or None if none was scheduled"""
+        self.now += intervals * INTERVAL
+        _, func = self.master.scheduled[-1]
+        count = len(self.master.scheduled)
+        func()
+
+        if len(self.master.scheduled) == count:
+            return None
+        delay, _ = self.master.scheduled[-1]
+        return delay
+
+    def test_catches_up_then_renders_once(self):
+        stepper = CountingStepper(self.master)
+        stepper.start()
+
+        # the first call runs a single step
+        self.assertEqual(self.tick(0), DELAY)
+        self.assertEqual((stepper.steps, stepper.renders), (1, [1]))
+
+        # running late, every step due is run before a single render
+        self.assertEqual(self.tick(3.5), 62)  # half an interval, in whole milliseconds
+        self.assertEqual((stepper.steps, stepper.renders), (4, [1, 4]))
+
+        # running early, nothing is due
+        self.assertEqual(self.tick(.25), 31)
+        self.assertEqual((stepper.steps, stepper.renders), (4, [1, 4]))
+
+        self.assertEqual(stepper.get_frame_stats(),
+                         {'frames': 2, 'dropped_frames': 2, 'lag': 0., 'backlog': .75 * INTERVAL})
+
+    def test_excess_steps_are_dropped_as_lag(self):
+        stepper = CountingStepper(self.master, max_catch_up=3)
+        stepper.start()
+        self.tick(0)
+
+        self.assertEqual(self.tick(10.5), 62)
+        self.assertEqual((stepper.steps, stepper.renders), (4, [1, 4]))
+
+        stats = stepper.get_frame_stats()
+        self.assertEqual(stats['lag'], 7 * INTERVAL)
+        self.assertEqual(stats['backlog'], .5 * INTERVAL)
+        self.assertEqual(stats['dropped_frames'], 2)
+
+    def test_time_paused_is_not_caught_up(self):
+        stepper = CountingStepper(self.master)
+        stepper.start()
+        self.tick(0)
+
+        stepper.pause()
+        self.now += 50 * INTERVAL
+        stepper.start()
+
+        self.tick(1)
+        self.assertEqual(stepper.steps, 2)
+        self.assertEqual(stepper.get_frame_stats()['lag'], 0.)
+
+    def test_stops_when_step_finishes(self):
+        stepper = CountingStepper(self.master, steps=2)
+        stepper.start()
+        self.tick(0)
+
+        self.assertIsNone(self.tick(5))
+        self.assertEqual((stepper.steps, stepper.renders), (2, [1, 2]))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,11 +1,11 @@
 import math
 
 from core import Unit, Point2D
-from enemy import AbstractEnemy
+from enemy import AbstractEnemy, EnemyStore
+from targeting import FIRST
 from range_ import AbstractRange, CircularRange, PlusRange, DonutRange
 from type_hints import Num_T
-from utilities import Countdown, euclidean_distance, angular_difference, normalise_vector, rotate_point, rotate_toward, \
-    angle_between
+from utilities import Countdown, rotate_point, rotate_toward, angle_between
 
 __author__ = "Benjamin Martin"
 __copyright__ = "Copyright 2018, The University of Queensland"
@@ -14,6 +14,9 @@ __version__ = "1.0.0"
 
 
 class AbstractTower(Unit):
+    __slots__ = ('_position', '_rotation', '_level', 'cool_down', 'version', 'changes', 'pools',
+                 '_range_cells')
+
     cool_down_steps: int
     cool_down: Countdown
     colour: str
@@ -22,12 +25,96 @@ class AbstractTower(Unit):
 
     range: AbstractRange
 
+    # which enemy in range the tower attacks each step (see targeting.POLICIES)
+    targeting: str = FIRST
+
+    # whether the tower attacks every enemy in range at once, with attack_area
+    area_of_effect: bool = False
+
+    # the rotation of towers which rotate, when constructed, or None if they don't
+    initial_rotation: float = None
+
+    # position, rotation & level affect how the tower is drawn, so changing them
+    # increments version & adds the tower to changes
+    version: int
+    changes: set  # set to which this tower adds itself whenever it changes, if any
+
+    pools: 'PoolRegistry'  # the pools of the game the tower is in, from which to acquire projectiles, if any
+
     def __init__(self, cell_size: int, level: int = 1):
         super().__init__(cell_size)
+        self.version = 0
+        self.changes = None
+        self.pools = None
+
+        self._position = (None, None)
+        self._range_cells = None  # (position, cells) the range was last rasterised at
+
+        if self.initial_rotation is not None:
+            self._rotation = self.initial_rotation
+
         if self.cool_down_steps != 0:
             self.cool_down = Countdown(self.cool_down_steps)
 
-        self.level = level
+        self._level = level
+
+    def _changed(self):
+        """Records that an attribute affecting how the tower is drawn has changed"""
+        self.version += 1
+
+        if self.changes is not None:
+            self.changes.add(self)
+
+    @property
+    def position(self):
+        """(tuple<num, num>) The pixel position of the centre of this tower"""
+        return self._position
+
+    @position.setter
+    def position(self, position):
+        if position != self._position:
+            self._position = position
+            self._changed()
+
+    @property
+    def rotation(self):
+        """(float) The angle the tower faces, for towers which rotate"""
+        return self._rotation
+
+    @rotation.setter
+    def rotation(self, rotation):
+        if rotation != getattr(self, '_rotation', None):
+            self._rotation = rotation
+            self._changed()
+
+    @property
+    def level(self):
+        """(int) The upgrade level of this tower"""
+        return self._level
+
+    @level.setter
+    def level(self, level):
+        if level != self._level:
+            self._level = level
+            self._changed()
+
+    def is_ready(self):
+        """(bool) Returns True iff the tower has cooled down, so can attack"""
+        return self.cool_down_steps == 0 or self.cool_down.is_done()
+
+    def get_range_cells(self):
+        """Returns the cells this tower's range covers, rasterised once per position
+
+        Returns:
+            list<tuple<int, int>>: The (column, row) of each cell, or None if unknown
+        """
+        cached = self._range_cells
+        if cached is None or cached[0] != self.position:
+            x, y = self.position
+            cell_size = self.cell_size
+            cached = self._range_cells = self.position, self.range.get_cells(x / cell_size, y / cell_size)
+
+        return cached[1]
 
     def get_value(self):
         return self.base_cost + (self.level - 1) * self.level_cost
@@ -42,12 +129,49 @@ class AbstractTower(Unit):
 
         return self.range.contains(tuple(point))
 
+    def are_positions_in_range(self, pixel_positions):
+        """(list<bool>) Returns whether each of 'pixel_positions' exists within this range"""
+        x, y = self.position
+        cell_size = self.cell_size
+
+        return self.range.contains_many([((px - x) / cell_size, (py - y) / cell_size)
+                                         for px, py in pixel_positions])
+
+    def get_range_bounding_box(self):
+        """Returns the pixel bounding box of this tower's range, or None if unknown
+
+        Returns:
+            tuple<tuple<num, num>, tuple<num, num>>: The top-left & bottom-right corners
+        """
+        box = self.range.get_bounding_box()
+        if box is None:
+            return None
+
+        x, y = self.position
+        (left, top), (right, bottom) = box
+        cell_size = self.cell_size
+
+        return (x + left * cell_size, y + top * cell_size), (x + right * cell_size, y + bottom * cell_size)
+
     def attack(self, target):
         raise NotImplementedError("Subclasses must implement attack")
 
+    def attack_area(self, targets):
+        """Attacks every enemy in range at once, if the tower has an area of effect
+
+        Parameters:
+            targets (list<AbstractEnemy>): The enemies in range
+
+        Returns:
+            list<Unit>: Any obstacles created by the attack
+        """
+        raise NotImplementedError("Subclasses with an area of effect must implement attack_area")
+
 
 class SimpleTower(AbstractTower):
-    rotation = math.pi * .25
+    __slots__ = ()
+
+    initial_rotation = math.pi * .25
     grid_size = (.9, .9)
     range = CircularRange(1.5)
     cool_down_steps = 0
@@ -68,48 +192,100 @@ class SimpleTower(AbstractTower):
 
 
 class Missile(Unit):
+    __slots__ = ('position', 'target', 'rotation', 'pixel_speed')
+
     grid_size = .2, 0
     speed = 0.3
     damage = 150
 
     def __init__(self, cell_size: Num_T, target: AbstractEnemy, rotation: int = 0):
         super().__init__(cell_size)
+        self.reset(cell_size, target, rotation=rotation)
+
+    def reset(self, cell_size: Num_T, target: AbstractEnemy, rotation: int = 0):
+        """Reinitialises the missile, so that it can be reused from a pool (see pool.py)"""
+        if cell_size != getattr(self, 'cell_size', None):
+            self.set_cell_size(cell_size)
+        self.position = (None, None)
         self.target = target
         self.rotation = rotation
 
         self.pixel_speed = self.speed * cell_size
 
-    def step(self):
-        if self.target.is_dead():
-            # TODO: acquire another target
-            return False
-
-        # move toward the target
-        angle = angle_between(self.position, self.target.get_real_position())
-
-        delta_angle = angular_difference(self.rotation, angle)
-        radius = euclidean_distance(self.position, self.target.get_real_position())
-        vector = Point2D(*self.target.get_real_position()) - Point2D(*self.position)
-
-        if radius <= self.pixel_speed:
-            print('collided')
-            self.rotation = angle
-            self.position = self.target.get_real_position()
-            self.target.damage(self.damage, 'explosive')
-            return False
-
-        direction = 1 if delta_angle > 0 else -1
-        self.rotation = rotate_toward(self.rotation, angle, (1 / 3) * math.pi)
+    def step(self, find_target=None):
+        """Moves the missile a single time-step (see step_all)
+
+        Returns:
+            bool: True iff the missile is still in flight
+        """
+        return bool(self.step_all([self], find_target=find_target))
+
+    @staticmethod
+    def step_all(missiles, find_target=None):
+        """Moves every missile in flight a single time-step, toward its target
+
+        Missiles which reach their target damage it & finish. Missiles whose target
+        has died are retargeted, if possible
+
+        Parameters:
+            missiles (list<Missile>): The missiles to move
+            find_target (callable): Takes a pixel position & returns the nearest live
+                                    enemy, or None if there are none, or None
+                                    if missiles shouldn't be retargeted
+
+        Returns:
+            list<Missile>: The missiles still in flight
+        """
+        atan2 = math.atan2
+        pi = math.pi
+        max_rotation = (1 / 3) * math.pi
+        get_state = EnemyStore.get_state
+
+        in_flight = []
+        for missile in missiles:
+            x, y = missile.position
+            target = missile.target
+
+            tx, ty, health = get_state(target)
+
+            if health <= 0:
+                target = find_target((x, y)) if find_target is not None else None
+                if target is None:
+                    continue
+
+                missile.target = target
+                tx, ty = target.position
+
+            # move toward the target
+            vx, vy = tx - x, ty - y
+            angle = atan2(vy, vx)
+            radius = (vx ** 2 + vy ** 2) ** .5
+            speed = missile.pixel_speed
+
+            if radius <= speed:
+                missile.rotation = angle
+                missile.position = tx, ty
+                target.damage(missile.damage, 'explosive')
+                continue
+
+            # rotate toward the target, by at most max_rotation
+            rotation = missile.rotation
+            delta_angle = ((angle - rotation + pi) % (2 * pi)) - pi
+            if abs(delta_angle) > max_rotation:
+                missile.rotation = rotation + max_rotation * (1 if delta_angle > 0 else -1)
+            else:
+                missile.rotation = angle
 
-        dx2, dy2 = tuple(self.pixel_speed * i for i in normalise_vector(vector))
+            missile.position = x + speed * (vx / radius), y + speed * (vy / radius)
+            in_flight.append(missile)
 
-        x, y = self.position
-        self.position = x + dx2, y + dy2
-        return True
+        return in_flight
 
 
 class MissileTower(SimpleTower):
-    rotation = math.pi * .25
+    __slots__ = ()
+
+    initial_rotation = math.pi * .25
     grid_size = (.9, .9)
     cool_down_steps = 10
     base_cost = 80
@@ -131,7 +307,10 @@ class MissileTower(SimpleTower):
             if self.cool_down.is_done():
                 self.cool_down.start()
 
-                missile = Missile(self.cell_size, target)
+                if self.pools is None:
+                    missile = Missile(self.cell_size, target)
+                else:
+                    missile = self.pools.get(Missile).acquire(self.cell_size, target)
                 missile.rotation = angle
                 x, y = self.position
                 diameter, _ = self.grid_size
@@ -149,6 +328,8 @@ class MissileTower(SimpleTower):
 
 
 class PulseTower(AbstractTower):
+    __slots__ = ()
+
     grid_size = (.9, .9)
     cool_down_steps = 20
     base_cost = 60
@@ -156,11 +337,20 @@ class PulseTower(AbstractTower):
 
     range = PlusRange(0.5, 2.5)
 
+    area_of_effect = True
+    damage = 25
+
     colour = '#621156'  # Spanish republican purple
 
     def attack(self, target: AbstractEnemy):
-        if self.cool_down.is_done():
+        return self.attack_area([target])
+
+    def attack_area(self, targets):
+        if targets and self.cool_down.is_done():
             self.cool_down.start()
-            print('firing pulse')
 
-            # TODO: send pulse
+            # pulse every enemy in range
+            for target in targets:
+                target.damage(self.damage, 'energy')
+
+        return []
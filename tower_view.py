@@ -67,31 +67,62 @@ class TowerView:
         (tower.AbstractTower, '_draw_simple'),
     ], key=lambda i: len(i[0].mro()), reverse=True)
 
-    @classmethod
-    def draw(cls, canvas: tk.Canvas, tower: tower.AbstractTower, cell_size, *args, **kwargs):
-        method = None
+    # Methods moving & restyling the items previously returned by the corresponding draw method
+    redraw_methods = sorted([
+        (tower.SimpleTower, '_redraw_simple'),
+        (tower.MissileTower, '_redraw_simple'),
+        (tower.PulseTower, '_redraw_simple'),
+        (tower.AbstractTower, '_redraw_simple'),
+    ], key=lambda i: len(i[0].mro()), reverse=True)
 
-        for key, method_name in cls.draw_methods:
+    @classmethod
+    def _find_method(cls, methods, tower):
+        for key, method_name in methods:
             if isinstance(tower, key) or tower == key:
-                method = getattr(cls, method_name)
-                break
+                return getattr(cls, method_name)
+
+        raise KeyError(f"Unable to find draw method for {tower}")
 
-        if method is None:
-            raise KeyError(f"Unable to find draw method for {tower}")
+    @classmethod
+    def draw(cls, canvas: tk.Canvas, tower: tower.AbstractTower, cell_size, *args, **kwargs):
+        method = cls._find_method(cls.draw_methods, tower)
 
         return method(canvas, tower, cell_size, *args, **kwargs)
 
     @classmethod
-    def _draw_simple(cls, canvas: tk.Canvas, tower_: tower.SimpleTower, cell_size, *args, **kwargs):
+    def redraw(cls, canvas: tk.Canvas, items, tower: tower.AbstractTower, cell_size, *args, **kwargs):
+        method = cls._find_method(cls.redraw_methods, tower)
+
+        return method(canvas, items, tower, cell_size, *args, **kwargs)
+
+    @classmethod
+    def _get_simple_coords(cls, tower_: tower.SimpleTower, cell_size):
         x, y = tower_.position
-        angle = tower_.rotation
+        angle = getattr(tower_, 'rotation', 0.)  # towers which don't rotate face right
 
         x_diameter, y_diameter = tower_.grid_size
         top_left, bottom_right = tower_.get_bounding_box()
 
+        return (top_left, bottom_right), \
+               (x, y, x + (x_diameter / 2) * cell_size * math.cos(angle),
+                y + (y_diameter / 2) * cell_size * math.sin(angle))
+
+    @classmethod
+    def _draw_simple(cls, canvas: tk.Canvas, tower_: tower.SimpleTower, cell_size, *args, **kwargs):
+        body, barrel = cls._get_simple_coords(tower_, cell_size)
+
         colour = tower_.colour
 
-        return [canvas.create_oval(top_left, bottom_right, tag='tower', fill=colour),
-                canvas.create_line(x, y, x + (x_diameter / 2) * cell_size * math.cos(angle),
-                                   y + (y_diameter / 2) * cell_size * math.sin(angle),
-                                   tag='tower')]
+        return [canvas.create_oval(*body, tag='tower', fill=colour),
+                canvas.create_line(*barrel, tag='tower')]
+
+    @classmethod
+    def _redraw_simple(cls, canvas: tk.Canvas, items, tower_: tower.SimpleTower, cell_size, *args, **kwargs):
+        body, barrel = cls._get_simple_coords(tower_, cell_size)
+        oval, line = items
+
+        canvas.coords(oval, *body[0], *body[1])
+        canvas.itemconfigure(oval, fill=tower_.colour)
+        canvas.coords(line, *barrel)
+
+        return items
@@ -3,12 +3,17 @@ General & Geometric Utilities
 """
 
 import math
-import tkinter as tk
-from typing import Union
+import time
+from typing import Union, TYPE_CHECKING
 from inspect import getmembers, isfunction
 
 from type_hints import Num_T, Point_T, Point2D_T
 
+# tkinter is only needed for annotations, so that the model (which imports this
+# module) can be used without a display
+if TYPE_CHECKING:
+    import tkinter as tk
+
 __author__ = "Benjamin Martin and Brae Webb"
 __copyright__ = "Copyright 2018, The University of Queensland"
 __license__ = "MIT"
@@ -114,15 +119,29 @@ class Stepper:
     runnning step function after a given interval
     
     Can be stopped/paused
+
+    With a fixed timestep, _step is run once per 'delay' of real time elapsed,
+    regardless of how long each step takes, running several steps per interval
+    to catch up when behind, & calling _render once after them. When more than
+    'max_catch_up' steps are due, the excess is dropped & counted as lag
+
+    Note: TowerGameApp doesn't use a fixed timestep, since its game is simulated &
+    paced in a worker process (see remote.RemoteGame), so it only polls for the latest
+    state each interval. The mode is for subclasses that step a game in-process
     """
 
-    def __init__(self, master: Union[tk.Widget, tk.Tk], delay: int = 30):
+    def __init__(self, master: 'Union[tk.Widget, tk.Tk]', delay: int = 30,
+                 fixed_timestep: bool = False, max_catch_up: int = 5):
         """Constructor
         
         Parameters:
             master (tk.Widget|tk.Tk): The tkinter master widget
             delay (int): The number of milliseconds between each _step
-                         (does not include time taken to run _step)
+                         (does not include time taken to run _step, unless
+                         'fixed_timestep' is True)
+            fixed_timestep (bool): If True, steps are paced by real elapsed time
+            max_catch_up (int): The maximum number of steps run before each
+                                render with a fixed timestep
         """
         self._master = master
         self._step_number = -1
@@ -130,6 +149,15 @@ class Stepper:
         self._delay = delay
         self._after_id = None
 
+        self._fixed_timestep = fixed_timestep
+        self._max_catch_up = max_catch_up
+        self._last_time = None
+        self._backlog = 0.
+
+        self.frames = 0  # renders
+        self.dropped_frames = 0  # steps run without being rendered
+        self.lag = 0.  # seconds of steps dropped because catching up exceeded the cap
+
     def is_started(self):
         return self._after_id is not None
 
@@ -144,6 +172,9 @@ class Stepper:
         if self.is_started():
             return
         self._paused = False
+        # time spent stopped or paused is not caught up
+        self._last_time = None
+        self._backlog = 0.
         self._after_id = self._master.after(self._delay, self._step_manager)
 
     def stop(self):
@@ -164,12 +195,74 @@ class Stepper:
         self._master.after_cancel(self._after_id)
         self._after_id = None
 
+    def get_frame_stats(self):
+        """Returns statistics about rendering & pacing
+
+        Returns:
+            dict<str, num>: The number of 'frames' rendered, 'dropped_frames' (steps
+                            not rendered), seconds of 'lag' dropped, & the current
+                            'backlog' of seconds yet to be stepped
+        """
+        return {
+            'frames': self.frames,
+            'dropped_frames': self.dropped_frames,
+            'lag': self.lag,
+            'backlog': self._backlog,
+        }
+
     def _step_manager(self):
         """Internal wrapper around step method to keep track of the number of steps and queue next step"""
-        self._step_number += 1
-
-        if self._step() and not self.is_stopped():
-            self._after_id = self._master.after(self._delay, self._step_manager)
+        if self._fixed_timestep:
+            running, delay = self._catch_up()
+        else:
+            self._step_number += 1
+            running = self._step()
+            self._render()
+            self.frames += 1
+            delay = self._delay
+
+        if running and not self.is_stopped():
+            self._after_id = self._master.after(delay, self._step_manager)
+
+    def _catch_up(self):
+        """Runs every step due since the last call, then renders once
+
+        Returns:
+            tuple<bool, int>: True if stepping should continue, & the number of
+                              milliseconds until the next step is due
+        """
+        interval = self._delay / 1000
+        now = time.perf_counter()
+
+        if self._last_time is None:
+            self._last_time = now - interval
+        self._backlog += now - self._last_time
+        self._last_time = now
+
+        running = True
+        steps = 0
+        while self._backlog >= interval:
+            if steps == self._max_catch_up:
+                # drop whole steps beyond the cap, rather than fall further behind
+                dropped = self._backlog - self._backlog % interval
+                self.lag += dropped
+                self._backlog -= dropped
+                break
+
+            self._step_number += 1
+            running = self._step()
+            self._backlog -= interval
+            steps += 1
+
+            if not running or self.is_stopped():
+                break
+
+        if steps:
+            self._render()
+            self.frames += 1
+            self.dropped_frames += steps - 1
+
+        return running, max(1, round((interval - self._backlog) * 1000))
 
     def _step(self):
         """(bool) Performs a step
@@ -178,14 +271,25 @@ class Stepper:
         """
         raise NotImplementedError("_step must be implemented by a subclass")
 
+    def _render(self):
+        """Renders the result of the steps run since the last render
+
+        Called once after each step, or, with a fixed timestep, once after each
+        batch of steps run to catch up
+        """
+        pass
+
 
 class Countdown:
     """A simple decrementing counter"""
-    current: int = 0
+    __slots__ = ('initial', 'current')
+
+    current: int
     initial: int
 
     def __init__(self, initial: int):
         self.initial = initial
+        self.current = 0
 
     def start(self, initial=None):
         """Starts the countdown"""
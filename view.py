@@ -13,6 +13,131 @@ __license__ = "MIT"
 __version__ = "1.0.0"
 
 
+class CanvasItemPool:
+    """Retained canvas items for a kind of entity, keyed by entity identity
+
+    Each update moves & restyles the items of entities that remain, assigns items
+    to entities that appear, & hides the items of entities that disappear, keeping
+    them for reuse rather than deleting them
+    """
+
+    def __init__(self, canvas, create, render, max_free=256):
+        """Constructor
+
+        Parameters:
+            canvas (tk.Canvas): The canvas on which the items are drawn
+            create (callable): Creates the items for an entity, returning their
+                               ids, as create(entity) -> tuple<int, ...>
+            render (callable): Moves & restyles an entity's items, as
+                               render(items, entity, state) -> state, where
+                               state is whatever render returned last time for
+                               the items, or None if they are newly assigned
+            max_free (int): The maximum number of hidden item sets to keep for reuse
+        """
+        self._canvas = canvas
+        self._create = create
+        self._render = render
+        self._max_free = max_free
+
+        # entity -> [items, state]
+        self._entries = {}
+        self._free = []
+
+    def __len__(self):
+        return len(self._entries)
+
+    def update(self, entities):
+        """Updates the items to display exactly 'entities'
+
+        Parameters:
+            entities (iter<*>): The entities to display
+
+        Returns:
+            bool: True iff any items were created or shown
+        """
+        render = self._render
+        previous = self._entries
+        entries = {}
+        assigned = False
+
+        for entity in entities:
+            entry = previous.pop(entity, None)
+
+            if entry is None:
+                assigned = True
+                entry = self._assign(entity)
+
+            entry[1] = render(entry[0], entity, entry[1])
+            entries[entity] = entry
+
+        for items, _ in previous.values():
+            self._release(items)
+
+        self._entries = entries
+
+        return assigned
+
+    def refresh(self, entities):
+        """Updates the items of only 'entities', leaving those of other entities as they are
+
+        Parameters:
+            entities (iter<*>): The entities that have appeared or changed
+
+        Returns:
+            bool: True iff any items were created or shown
+        """
+        render = self._render
+        entries = self._entries
+        assigned = False
+
+        for entity in entities:
+            entry = entries.get(entity)
+
+            if entry is None:
+                assigned = True
+                entry = entries[entity] = self._assign(entity)
+
+            entry[1] = render(entry[0], entity, entry[1])
+
+        return assigned
+
+    def discard(self, entity):
+        """Hides the items of 'entity', if it has any"""
+        entry = self._entries.pop(entity, None)
+        if entry is not None:
+            self._release(entry[0])
+
+    def clear(self):
+        """Deletes every item in the pool"""
+        for items, _ in self._entries.values():
+            self._canvas.delete(*items)
+        for items in self._free:
+            self._canvas.delete(*items)
+
+        self._entries = {}
+        self._free = []
+
+    def _assign(self, entity):
+        """(list) Returns a new [items, state] entry for 'entity', reusing hidden items if possible"""
+        if self._free:
+            items = self._free.pop()
+            for item in items:
+                self._canvas.itemconfigure(item, state='normal')
+        else:
+            items = self._create(entity)
+
+        return [items, None]
+
+    def _release(self, items):
+        """Hides 'items' for reuse, or deletes them if enough are already kept"""
+        if len(self._free) < self._max_free:
+            for item in items:
+                self._canvas.itemconfigure(item, state='hidden')
+            self._free.append(items)
+        else:
+            self._canvas.delete(*items)
+
+
 class GameView(tk.Canvas):
     """Game view which displays the user interface for the Towers game"""
 
@@ -36,6 +161,21 @@ class GameView(tk.Canvas):
         tk.Canvas.__init__(self, master, width=width, height=height, **kwargs,
                            highlightthickness=0)
 
+        # retained items for each enemy, tower & obstacle drawn last frame
+        self._enemy_items = CanvasItemPool(self, self._create_enemy, self._render_enemy)
+        # towers of different types are drawn with different items, so are never reused
+        self._tower_items = CanvasItemPool(self, self._create_tower, self._render_tower,
+                                           max_free=0)
+        self._obstacle_items = CanvasItemPool(self, self._create_obstacle, self._render_obstacle)
+
+    # bottom to top stacking order of items drawn each frame
+    layers = ('range', 'enemy', 'tower', 'obstacle', 'shadow')
+
+    def restack(self):
+        """Raises the items of each layer above those of the layers before it"""
+        for tag in self.layers:
+            self.tag_raise(tag)
+
     @staticmethod
     def calculate_bounds(position, size):
         """
@@ -79,35 +219,78 @@ class GameView(tk.Canvas):
         Parameters:
             enemies (list<AbstractEnemy>): A list of enemies to draw to the view
         """
-        self.delete('enemy')
-        for enemy in enemies:
-            top_left, bottom_right = self.calculate_bounds(enemy.position,
-                                                           enemy.size)
+        if self._enemy_items.update(enemies):
+            self.restack()
+
+    def _create_enemy(self, enemy):
+        """(tuple<int, int>) Creates the body & health arc items of an enemy"""
+        return (self.create_oval(0, 0, 0, 0, tags='enemy', fill='white smoke'),
+                self.create_arc(0, 0, 0, 0, tags='enemy', start=45, outline=''))
+
+    def _render_enemy(self, items, enemy, state):
+        """Moves & restyles the items of an enemy, returning its drawn state"""
+        body, arc = items
+
+        top_left, bottom_right = self.calculate_bounds(enemy.position,
+                                                       enemy.size)
+        bounds = top_left + bottom_right
+
+        extent = enemy.percentage_health() * 360
+        if extent == 360:  # because tkinter is lame
+            extent = 359.9999
+
+        colour = enemy.colour
 
-            # create
-            self.create_oval(top_left, bottom_right, tags='enemy',
-                             fill='white smoke')
-            extent = enemy.percentage_health() * 360
-            if extent == 360:  # because tkinter is lame
-                extent = 359.9999
+        if state is None:
+            state = None, None, None
+        previous_bounds, previous_extent, previous_colour = state
 
-            self.create_arc(top_left, bottom_right, tags='enemy',
-                            fill=enemy.colour, start=45, extent=-extent,
-                            outline='')
+        if bounds != previous_bounds:
+            self.coords(body, *bounds)
+            self.coords(arc, *bounds)
 
-    def draw_towers(self, towers):
+        if extent != previous_extent or colour != previous_colour:
+            self.itemconfigure(arc, fill=colour, extent=-extent)
+
+        return bounds, extent, colour
+
+    def draw_towers(self, towers, changed=None, removed=()):
         """
         Draw a list of towers to the view, simultaneously removing previous
         towers
 
+        If the towers that changed since the last draw are given, only those
+        are redrawn
+
         Parameters:
-            towers (list<AbstractTower>): A list of towers to draw to the view
+            towers (dict<tuple<int, int>, AbstractTower>): The towers to draw to the view
+            changed (set<AbstractTower>): The towers placed or changed since the
+                                          last draw, or None to redraw every tower
+            removed (set<AbstractTower>): The towers removed since the last draw
         """
-        self.delete('tower')
-        for tower in towers.values():
-            TowerView.draw(self, tower, cell_size=self.cell_size)
+        pool = self._tower_items
+
+        if changed is None:
+            assigned = pool.update(towers.values())
+        else:
+            for tower in removed:
+                pool.discard(tower)
+            assigned = pool.refresh(changed)
+
+        if assigned:
+            self.restack()
 
-        self.tag_raise('shadow')
+    def _create_tower(self, tower):
+        """(tuple<int, ...>) Creates the items of a tower"""
+        return tuple(TowerView.draw(self, tower, cell_size=self.cell_size))
+
+    def _render_tower(self, items, tower, state):
+        """Moves & restyles the items of a tower, returning its drawn state"""
+        drawn = tower.position, getattr(tower, 'rotation', 0.), tower.colour
+        if drawn != state and state is not None:
+            TowerView.redraw(self, items, tower, cell_size=self.cell_size)
+
+        return drawn
 
     def draw_obstacles(self, obstacles):
         """
@@ -117,19 +300,28 @@ class GameView(tk.Canvas):
         Parameters:
             obstacles (list<Unit>): A list of obstacles to draw to the view
         """
-        self.delete('obstacle')
+        if self._obstacle_items.update(obstacles):
+            self.restack()
+
+    def _create_obstacle(self, obstacle):
+        """(tuple<int>) Creates the line item of an obstacle"""
+        return self.create_line(0, 0, 0, 0, tag='obstacle'),
+
+    def _render_obstacle(self, items, missile, state):
+        """Moves the line of an obstacle, returning its drawn state"""
         # assuming missile
-        for missile in obstacles:
-            x, y = missile.position
+        x, y = missile.position
+
+        length, width = missile.size
 
-            length, width = missile.size
+        dx, dy = rotate_point((length / 2, width / 2), missile.rotation)
 
-            dx, dy = rotate_point((length / 2, width / 2), missile.rotation)
+        coords = x + dx, y + dy, x - dx, y - dy
 
-            head = x + dx, y + dy
-            tail = x - dx, y - dy
+        if coords != state:
+            self.coords(items[0], *coords)
 
-            self.create_line(head, tail, tag='obstacle')
+        return coords
 
     def draw_path(self, coordinates):
         """
@@ -179,3 +371,5 @@ class GameView(tk.Canvas):
         else:
             self.create_line(top_left, bottom_right, tag='shadow', fill='black')
             self.create_line((right, top), (left, bottom), tag='shadow', fill='black')
+
+        self.restack()